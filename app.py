@@ -1,10 +1,19 @@
-from flask import Flask, render_template, request, send_file, jsonify, redirect, url_for, flash
+from flask import Flask, Response, render_template, request, send_file, send_from_directory, jsonify, redirect, url_for, flash, stream_with_context
 from scraper import GeneralizedLeadGenScraper
-import pandas as pd
-import io
+from http_cache import ResponseCache
+from crawl_store import CrawlStore
+from result_cache import ScrapeResult, ScrapeResultCache
+from jobs import FAILED, JobManager, JobQueueFull
+from streaming import iter_scrape_events, format_ndjson, format_sse
+from metrics import REGISTRY, profiled
+from exporters import EXPORT_FORMATS, ContactCounts, ExportUnavailable, available_formats, check_format, export_results
+from urllib.parse import urlparse
+import tempfile
 import os
 import logging
+import math
 import time
+import uuid
 
 # Setup basic logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -13,60 +22,193 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.secret_key = os.urandom(24)
 
+# Optional on-disk response cache shared by every scrape in this process
+RESPONSE_CACHE = ResponseCache(os.environ['LEADGEN_CACHE_PATH']) if os.environ.get('LEADGEN_CACHE_PATH') else None
+
+# Optional crawl checkpoints: interrupted scrapes resume and re-scrapes only
+# re-parse pages whose content changed
+CRAWL_STORE = CrawlStore(os.environ['LEADGEN_CRAWL_STORE']) if os.environ.get('LEADGEN_CRAWL_STORE') else None
+
+# Options shared by every scraper this process creates; the byte caps bound
+# how much a single page and a single scrape may download
+SCRAPER_OPTIONS = {
+    'cache': RESPONSE_CACHE,
+    'store': CRAWL_STORE,
+    'max_page_bytes': int(os.environ.get('LEADGEN_MAX_PAGE_BYTES', 2 * 1024 * 1024)),
+    'max_total_bytes': int(os.environ.get('LEADGEN_MAX_SCRAPE_BYTES', 64 * 1024 * 1024)),
+    'extract_workers': int(os.environ.get('LEADGEN_EXTRACT_WORKERS', 0))
+}
+
+# Finished results shared by identical scrape requests (same URL, max_pages
+# and delay) for LEADGEN_RESULT_TTL seconds; identical requests that arrive
+# while a scrape is running wait for it instead of crawling the site again
+RESULTS = ScrapeResultCache(
+    ttl=float(os.environ.get('LEADGEN_RESULT_TTL', 600)),
+    max_entries=int(os.environ.get('LEADGEN_RESULT_CACHE_SIZE', 128))
+)
+
+# Background scrape jobs: a bounded worker pool with a cap on queued jobs,
+# sharing results with identical jobs and requests through RESULTS
+JOBS = JobManager(
+    max_workers=int(os.environ.get('LEADGEN_JOB_WORKERS', 4)),
+    max_pending=int(os.environ.get('LEADGEN_MAX_PENDING_JOBS', 200)),
+    scraper_options=SCRAPER_OPTIONS,
+    result_cache=RESULTS
+)
+
+# Per-request profiling ("profile": true on /api/scrape) is off unless enabled
+PROFILING_ENABLED = os.environ.get('LEADGEN_PROFILING', '').lower() in ('1', 'true', 'yes')
+PROFILE_DIR = os.environ.get('LEADGEN_PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'leadgen-profiles'))
+
+REGISTRY.register_gauge('leadgen_jobs_pending', 'Scrape jobs queued or running.', JOBS.pending_count)
+REGISTRY.register_gauge('leadgen_result_cache_entries', 'Scrape results held in the result cache.', RESULTS.__len__)
+if RESPONSE_CACHE is not None:
+    REGISTRY.register_gauge('leadgen_response_cache_bytes', 'Size of the on-disk response cache.',
+                            RESPONSE_CACHE.total_bytes)
+
 # ---------- Helpers ---------- #
 
-def create_excel_file(results, url, pages_crawled, duration):
-    """Creates an in-memory Excel file with leads, summary, and metadata."""
-    output = io.BytesIO()
-
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        # Main leads sheet
-        results.to_excel(writer, sheet_name='Leads', index=False)
-
-        # Summary sheet
-        summary = pd.DataFrame({
-            'Type': ['Emails', 'Phone Numbers', 'LinkedIn Profiles', 'Total'],
-            'Count': [
-                len(results[results['Contact Type'] == 'Email']),
-                len(results[results['Contact Type'] == 'Phone']),
-                len(results[results['Contact Type'] == 'LinkedIn']),
-                len(results)
-            ]
-        })
-        summary.to_excel(writer, sheet_name='Summary', index=False)
-
-        # Metadata sheet
-        metadata = pd.DataFrame({
-            'Property': ['URL Scraped', 'Pages Crawled', 'Duration (seconds)', 'Date Scraped'],
-            'Value': [
-                url,
-                pages_crawled,
-                f"{duration:.2f}",
-                pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
-            ]
-        })
-        metadata.to_excel(writer, sheet_name='Metadata', index=False)
-
-        # Format "Leads" sheet
-        workbook = writer.book
-        worksheet = writer.sheets['Leads']
-
-        # Apply filters and header styling
-        worksheet.autofilter(0, 0, len(results), len(results.columns) - 1)
-        header_format = workbook.add_format({'bold': True, 'bg_color': '#D3D3D3', 'border': 1})
-
-        for col_num, value in enumerate(results.columns.values):
-            worksheet.write(0, col_num, value, header_format)
-
-        # Adjust column widths for readability
-        worksheet.set_column('A:A', 15)  # Contact Type
-        worksheet.set_column('B:B', 40)  # Value
-        worksheet.set_column('C:C', 30)  # Name
-        worksheet.set_column('D:D', 40)  # Job Title
-        worksheet.set_column('E:E', 60)  # Source URL
-
-    output.seek(0)
-    return output
+def send_export(results, url, pages_crawled, duration, fmt='xlsx'):
+    """Sends scrape results as a download in one of EXPORT_FORMATS.
+
+    Rows are written as they are read from the results, so CSV and NDJSON
+    start streaming straight away and workbooks are built in constant memory.
+    """
+    body, mimetype = export_results(fmt, results.rows(), url, pages_crawled, duration)
+    download_name = f'leads.{fmt}'
+    if hasattr(body, 'read'):
+        return send_file(body, as_attachment=True, download_name=download_name, mimetype=mimetype)
+    return Response(body, mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={download_name}'})
+
+
+def read_export_format(data):
+    """Returns the export format a request asks for, or None for JSON.
+
+    Raises ExportUnavailable when the format needs a package that is not
+    installed, so the request fails before any crawling is done.
+    """
+    fmt = (data.get('format') or '').lower()
+    if fmt not in EXPORT_FORMATS:
+        return None
+    check_format(fmt)
+    return fmt
+
+
+def build_results_payload(results, pages_crawled, duration, metrics=None, people=False):
+    """Builds the JSON body and status code for a finished scrape.
+
+    When the scraper's metrics are given, their per-stage timings, call
+    counts, counters and gauges (such as the achieved request rate) are
+    added to the stats block. people=True adds the merged person records,
+    each with the page every value was found on.
+    """
+    if results.empty:
+        payload = {
+            'status': 'no_results',
+            'message': 'No contact details found.',
+            'stats': {
+                'pages_crawled': pages_crawled,
+                'duration_seconds': round(duration, 2)
+            }
+        }
+    else:
+        counts = ContactCounts.of(results['Contact Type'])
+        payload = {
+            'status': 'success',
+            'data': results.records(),
+            'stats': {
+                'emails': counts.by_type['Email'],
+                'phones': counts.by_type['Phone'],
+                'linkedin': counts.by_type['LinkedIn'],
+                'total': counts.total,
+                'people': len(results.people),
+                'pages_crawled': pages_crawled,
+                'duration_seconds': round(duration, 2)
+            }
+        }
+
+    if people and not results.empty:
+        payload['people'] = results.people
+    if metrics is not None:
+        payload['stats'].update(metrics.to_dict())
+    return payload, 200
+
+
+def profile_path(url):
+    """Picks a unique file name in PROFILE_DIR for a profiled scrape of url."""
+    host = (urlparse(url).hostname or 'site').replace('.', '_')
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    return os.path.join(PROFILE_DIR, f"{stamp}-{host}-{os.getpid()}-{uuid.uuid4().hex[:8]}.prof")
+
+
+class InvalidScrapeParams(ValueError):
+    pass
+
+
+def read_number(data, name, default, cast, minimum):
+    """Reads one numeric crawl setting, raised to at least minimum.
+
+    A missing or empty field takes the default; anything that is not a
+    finite number raises InvalidScrapeParams.
+    """
+    value = data.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        number = cast(value)
+    except (TypeError, ValueError):
+        raise InvalidScrapeParams(f"{name} must be a number, got {value!r}")
+    if not math.isfinite(number):
+        raise InvalidScrapeParams(f"{name} must be a finite number, got {value!r}")
+    return max(number, minimum)
+
+
+def read_scrape_params(data):
+    """Extracts crawl settings from a JSON request body or form."""
+    return {
+        'max_pages': read_number(data, 'max_pages', 15, int, 1),
+        'delay': read_number(data, 'delay', 1.0, float, 0.0),
+        'concurrency': read_number(data, 'concurrency', 1, int, 1)
+    }
+
+
+def run_scrape(url, params, fresh=False):
+    """Scrapes url, sharing the result with identical requests.
+
+    Returns (ScrapeResult, source) where source says whether the result was
+    cached ('hit'), taken from an identical running scrape ('shared') or
+    produced by this call ('miss'). fresh=True ignores a cached result.
+    """
+    def run():
+        start_time = time.time()
+        scraper = GeneralizedLeadGenScraper(
+            max_pages=params['max_pages'], delay=params['delay'], **SCRAPER_OPTIONS
+        )
+        results = scraper.scrape(url, concurrency=params['concurrency'])
+        return ScrapeResult(results, len(scraper.visited_urls), time.time() - start_time, scraper.metrics)
+
+    key = RESULTS.key(url, params['max_pages'], params['delay'])
+    result, source = RESULTS.get_or_run(key, run, fresh=fresh)
+    if source != 'miss':
+        logger.info(f"Served {url} from the result cache ({source})")
+    return result, source
+
+
+def submit_job(url, params, fresh=False):
+    """Queues a scrape job and returns the 202 response describing it."""
+    try:
+        job = JOBS.submit(url, fresh=fresh, **params)
+    except JobQueueFull as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 503
+
+    body = job.to_dict()
+    body['links'] = {
+        'status': url_for('job_status', job_id=job.id),
+        'results': url_for('job_results', job_id=job.id),
+        'download': url_for('job_download', job_id=job.id)
+    }
+    return jsonify(body), 202
 
 
 # ---------- Routes ---------- #
@@ -75,38 +217,39 @@ def create_excel_file(results, url, pages_crawled, duration):
 def index():
     if request.method == 'POST':
         url = request.form['url']
-        max_pages = int(request.form.get('max_pages', 15))
-        delay = float(request.form.get('delay', 1.0))
 
         try:
-            start_time = time.time()
-            logger.info(f"Scraping started: {url}, max_pages={max_pages}, delay={delay}s")
-
-            scraper = GeneralizedLeadGenScraper(max_pages=max_pages, delay=delay)
-            results = scraper.scrape(url)
-            duration = time.time() - start_time
+            params = read_scrape_params(request.form)
+            fmt = read_export_format(request.form) or 'xlsx'
+            logger.info(f"Scraping started: {url}, max_pages={params['max_pages']}, delay={params['delay']}s")
+
+            # The form is the no-JavaScript fallback and answers with the
+            # download itself, so the request waits for the job; running it
+            # as one keeps it within the job pool and its pending cap
+            job = JOBS.submit(url, **params)
+            job.done.wait()
+            if job.result is None:
+                raise RuntimeError(job.error or f"the scrape was {job.status}")
+            result = job.result
+            results = result.results
 
             if results.empty:
-                flash(f"No leads found after scanning {len(scraper.visited_urls)} pages. "
+                flash(f"No leads found after scanning {result.pages_crawled} pages. "
                       f"Try a different URL or adjust the crawl settings.")
                 return redirect(url_for('index'))
 
-            output = create_excel_file(results, url, len(scraper.visited_urls), duration)
-            logger.info(f"Scraping finished in {duration:.2f}s with {len(results)} results")
-
-            return send_file(
-                output,
-                as_attachment=True,
-                download_name='leads.xlsx',
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
+            logger.info(f"Scraping finished in {result.duration:.2f}s with {len(results)} results")
+            return send_export(results, url, result.pages_crawled, result.duration, fmt)
 
+        except (InvalidScrapeParams, JobQueueFull) as e:
+            flash(str(e))
+            return redirect(url_for('index'))
         except Exception as e:
             logger.error(f"Scraping error: {str(e)}")
             flash(f"Something went wrong while scraping: {str(e)}")
             return redirect(url_for('index'))
 
-    return render_template('index.html')
+    return render_template('index.html', export_formats=available_formats())
 
 
 @app.route('/api/scrape', methods=['POST'])
@@ -120,42 +263,167 @@ def api_scrape():
         return jsonify({'error': 'Missing required parameter: url'}), 400
 
     url = data['url']
-    max_pages = data.get('max_pages', 15)
-    delay = data.get('delay', 1.0)
+    params = read_scrape_params(data)
+    fmt = read_export_format(data)
+
+    # Clients that can poll get a job id back immediately
+    if data.get('async'):
+        return submit_job(url, params, fresh=bool(data.get('fresh')))
+
+    profile = bool(data.get('profile'))
+    if profile and not PROFILING_ENABLED:
+        return jsonify({'error': 'Profiling is disabled; set LEADGEN_PROFILING=1 to enable it'}), 400
 
     try:
-        start_time = time.time()
-        scraper = GeneralizedLeadGenScraper(max_pages=max_pages, delay=delay)
-        results = scraper.scrape(url)
-        duration = time.time() - start_time
-
-        if results.empty:
-            return jsonify({
-                'status': 'no_results',
-                'message': 'No contact details found.',
-                'stats': {
-                    'pages_crawled': len(scraper.visited_urls),
-                    'duration_seconds': round(duration, 2)
-                }
-            }), 200
-
-        return jsonify({
-            'status': 'success',
-            'data': results.to_dict(orient='records'),
-            'stats': {
-                'emails': len(results[results['Contact Type'] == 'Email']),
-                'phones': len(results[results['Contact Type'] == 'Phone']),
-                'linkedin': len(results[results['Contact Type'] == 'LinkedIn']),
-                'total': len(results),
-                'pages_crawled': len(scraper.visited_urls),
-                'duration_seconds': round(duration, 2)
-            }
-        })
+        if profile:
+            # A profile has to measure a real crawl, so the result cache is bypassed
+            start_time = time.time()
+            scraper = GeneralizedLeadGenScraper(
+                max_pages=params['max_pages'], delay=params['delay'], **SCRAPER_OPTIONS
+            )
+            path = profile_path(url)
+            with profiled(path):
+                results = scraper.scrape(url, concurrency=params['concurrency'])
+            logger.info(f"Profile of {url} written to {path}")
+            result = ScrapeResult(results, len(scraper.visited_urls), time.time() - start_time, scraper.metrics)
+            source = 'miss'
+        else:
+            result, source = run_scrape(url, params, fresh=bool(data.get('fresh')))
+
+        if fmt is not None:
+            return send_export(result.results, url, result.pages_crawled, result.duration, fmt)
+
+        payload, status_code = build_results_payload(
+            result.results, result.pages_crawled, result.duration, result.metrics,
+            people=bool(data.get('people'))
+        )
+        payload['result_cache'] = source
+        if profile:
+            name = os.path.basename(path)
+            payload['profile'] = {'file': name, 'download': url_for('download_profile', name=name)}
+        return jsonify(payload), status_code
 
     except Exception as e:
         logger.error(f"API scraping error: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 
+@app.route('/api/scrape/stream', methods=['GET', 'POST'])
+def api_scrape_stream():
+    """
+    Streams contacts as pages are parsed, as NDJSON or Server-Sent Events.
+    Accepts the /api/scrape JSON body, or query parameters for EventSource.
+    """
+    data = request.get_json(silent=True) or request.args
+
+    if not data or 'url' not in data:
+        return jsonify({'error': 'Missing required parameter: url'}), 400
+
+    params = read_scrape_params(data)
+    scraper = GeneralizedLeadGenScraper(
+        max_pages=params['max_pages'], delay=params['delay'], **SCRAPER_OPTIONS
+    )
+    events = iter_scrape_events(scraper, data['url'], concurrency=params['concurrency'])
+
+    wants_sse = data.get('format') == 'sse' or 'text/event-stream' in request.headers.get('Accept', '')
+    if wants_sse:
+        body, mimetype = format_sse(events), 'text/event-stream'
+    else:
+        body, mimetype = format_ndjson(events), 'application/x-ndjson'
+
+    return Response(stream_with_context(body), mimetype=mimetype,
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """
+    Starts a background scrape and returns its job id without waiting for it.
+    """
+    data = request.json
+
+    if not data or 'url' not in data:
+        return jsonify({'error': 'Missing required parameter: url'}), 400
+
+    # A "format" the job will be downloaded in is checked before crawling
+    read_export_format(data)
+    return submit_job(data['url'], read_scrape_params(data), fresh=bool(data.get('fresh')))
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = JOBS.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/jobs/<job_id>/results', methods=['GET'])
+def job_results(job_id):
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    if job.status == FAILED:
+        return jsonify({'status': 'error', 'message': job.error}), 500
+    if job.results is None:
+        return jsonify(job.to_dict()), 409
+
+    result = job.result
+    payload, status_code = build_results_payload(
+        result.results, result.pages_crawled, result.duration, result.metrics,
+        people=request.args.get('people') in ('1', 'true')
+    )
+    payload['job'] = job.to_dict()
+    return jsonify(payload), status_code
+
+
+@app.route('/api/jobs/<job_id>/download', methods=['GET'])
+def job_download(job_id):
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    if job.results is None:
+        return jsonify(job.to_dict()), 409
+
+    fmt = read_export_format(request.args) or 'xlsx'
+    return send_export(job.results, job.url, job.result.pages_crawled, job.result.duration, fmt)
+
+
+@app.route('/api/profiles/<name>', methods=['GET'])
+def download_profile(name):
+    """
+    Downloads a cProfile artifact written by a profiled /api/scrape call.
+    """
+    if not PROFILING_ENABLED:
+        return jsonify({'error': 'Profiling is disabled'}), 404
+    return send_from_directory(PROFILE_DIR, name, as_attachment=True)
+
+
+@app.errorhandler(ExportUnavailable)
+def export_unavailable(e):
+    return jsonify({'status': 'error', 'message': str(e)}), 501
+
+
+@app.errorhandler(InvalidScrapeParams)
+def invalid_scrape_params(e):
+    return jsonify({'status': 'error', 'message': str(e)}), 400
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Prometheus scrape endpoint with per-stage timings and counters.
+    """
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+
 if __name__ == '__main__':
     app.run(debug=True)
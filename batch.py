@@ -0,0 +1,377 @@
+"""Batch lead scraping over a list of domains.
+
+    python batch.py domains.txt -o leads.ndjson --workers 8 --concurrency 4
+
+Domains are fanned out across worker processes; each domain is crawled with
+the asyncio engine and its results are appended to the output file as soon
+as it finishes. A domain that errors or runs past --timeout only affects its
+own record.
+
+Several machines can work through one domain list together: run the same
+command on each with --coordinator pointing at a shared SQLite file, and every
+domain is scraped by exactly one of them (a domain leased by a node that dies
+is picked up by another once its lease expires).
+
+With --people, the person records of every domain are merged into one file
+(one JSON record per person) as domains finish: the same email, phone or
+LinkedIn profile found on several domains ends up in a single record.
+"""
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from multiprocessing.connection import wait
+
+from scraper import GeneralizedLeadGenScraper
+from leads import RESULT_COLUMNS
+from entities import PersonIndex
+from crawl_store import CrawlStore
+from coordination import LEASE_SECONDS, SqliteCoordinator, default_worker_id
+
+logger = logging.getLogger(__name__)
+
+# How long past its timeout a domain may run before its worker process is
+# killed. The crawl is cancelled at the timeout and normally stops within a
+# second; this covers a fetch still waiting out its 10 s request timeout.
+KILL_GRACE_SECONDS = 15
+
+# One crawl store connection per worker process, opened on first use
+_stores = {}
+
+
+def read_domains(path):
+    # Read one domain or URL per line, skipping blanks and # comments
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            domain = line.strip()
+            if domain and not domain.startswith('#'):
+                yield domain
+
+
+def leased_domains(coordinator, domains, worker, lease_seconds=LEASE_SECONDS):
+    # Add domains to the coordinator's shared queue, then yield the ones this
+    # node gets to lease until none is left
+    chunk = []
+    for domain in domains:
+        chunk.append(domain)
+        if len(chunk) == 1000:
+            coordinator.add_domains(chunk)
+            chunk = []
+    if chunk:
+        coordinator.add_domains(chunk)
+
+    while True:
+        domain = coordinator.lease_domain(worker, lease_seconds)
+        if domain is None:
+            return
+        yield domain
+
+
+def domain_to_url(domain):
+    if domain.startswith(('http://', 'https://')):
+        return domain
+    return f"https://{domain}/"
+
+
+def get_store(path):
+    if path and path not in _stores:
+        _stores[path] = CrawlStore(path)
+    return _stores.get(path)
+
+
+def scrape_domain(domain, max_pages=15, delay=1.0, concurrency=4, timeout=120, store_path=None):
+    # Scrape one domain and return a plain, picklable record. The timeout is
+    # enforced by cancelling the crawl, so partial results are kept; with a
+    # crawl store, the next batch run resumes the domain where it stopped.
+    # A domain where no page could be fetched is an error, timed out or not.
+    start_time = time.time()
+    cancel_event = threading.Event()
+    timer = threading.Timer(timeout, cancel_event.set)
+    timer.daemon = True
+    scraper = GeneralizedLeadGenScraper(max_pages=max_pages, delay=delay, cancel_event=cancel_event,
+                                        store=get_store(store_path))
+
+    record = {'domain': domain, 'url': domain_to_url(domain), 'status': 'ok', 'error': None}
+    timer.start()
+    try:
+        results = scraper.scrape(record['url'], concurrency=concurrency)
+        record['contacts'] = results.records()
+        record['people'] = results.people
+        if not scraper.visited_urls:
+            record['status'] = 'error'
+            record['error'] = 'no pages could be fetched' + (' before the timeout' if cancel_event.is_set() else '')
+        elif cancel_event.is_set():
+            record['status'] = 'timeout'
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = str(e)
+        record['contacts'] = []
+        record['people'] = []
+    finally:
+        timer.cancel()
+
+    record['pages_crawled'] = len(scraper.visited_urls)
+    record['duration_seconds'] = round(time.time() - start_time, 2)
+    return record
+
+
+class BatchWriter:
+    # Appends per-domain results to an NDJSON (one record per domain) or CSV
+    # (one row per contact) file and flushes after every domain
+    def __init__(self, path):
+        self.path = path
+        self.format = 'csv' if path.endswith('.csv') else 'ndjson'
+        self._file = open(path, 'a', encoding='utf-8', newline='')
+        self._csv = None
+        if self.format == 'csv':
+            self._csv = csv.DictWriter(self._file, fieldnames=['Domain'] + RESULT_COLUMNS)
+            if self._file.tell() == 0:
+                self._csv.writeheader()
+
+    def write(self, record):
+        if self._csv is not None:
+            for contact in record['contacts']:
+                self._csv.writerow({'Domain': record['domain'], **contact})
+        else:
+            self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class BatchStats:
+    def __init__(self):
+        self.started_at = time.time()
+        self.domains = 0
+        self.pages = 0
+        self.contacts = 0
+        self.by_status = {}
+
+    def add(self, record):
+        self.domains += 1
+        self.pages += record['pages_crawled']
+        self.contacts += len(record['contacts'])
+        self.by_status[record['status']] = self.by_status.get(record['status'], 0) + 1
+
+    def summary(self):
+        elapsed = max(time.time() - self.started_at, 1e-9)
+        return {
+            'domains': self.domains,
+            'pages': self.pages,
+            'contacts': self.contacts,
+            'by_status': dict(self.by_status),
+            'elapsed_seconds': round(elapsed, 2),
+            'domains_per_minute': round(self.domains * 60 / elapsed, 2),
+            'pages_per_second': round(self.pages / elapsed, 2)
+        }
+
+
+def write_people(people, path):
+    # The merged person records of a batch, one JSON record per line
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in people.records():
+            f.write(json.dumps(record) + '\n')
+
+
+def _worker_main(conn, log_level):
+    # Body of a DomainWorker process: scrape the domains sent on conn, one at
+    # a time, until it is closed
+    logging.getLogger().setLevel(log_level)
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        domain, options = task
+        conn.send(scrape_domain(domain, **options))
+
+
+class DomainWorker:
+    # A worker process scraping one domain at a time. Unlike a process pool,
+    # a worker can be killed on its own when its domain runs past the
+    # deadline, without failing the domains the other workers are on.
+    def __init__(self, log_level):
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_worker_main, args=(child, log_level), daemon=True)
+        self.process.start()
+        child.close()
+        self.domain = None
+        self.deadline = None
+
+    def submit(self, domain, options, deadline):
+        self.domain = domain
+        self.deadline = deadline
+        self.conn.send((domain, options))
+
+    def result(self):
+        # The finished domain's record; EOFError if the process died
+        record = self.conn.recv()
+        self.domain = self.deadline = None
+        return record
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+def run_batch(domains, output_path, workers=None, max_pages=15, delay=1.0, concurrency=4,
+              timeout=120, report_every=25, log_level=logging.WARNING, store_path=None, coordinator=None,
+              people_path=None):
+    # Scrape every domain on worker processes, writing each result as it
+    # lands. A domain is handed out only when a worker is free, so huge domain
+    # lists are streamed rather than queued up front. A domain still running
+    # KILL_GRACE_SECONDS after its timeout has its worker killed and replaced;
+    # one that crashes its worker is failed the same way. With a coordinator
+    # the domains are shared with the other nodes using it. With people_path
+    # the person records of all domains are merged as they land and written
+    # there at the end. Returns summary stats.
+    workers = workers or os.cpu_count() or 1
+    hard_timeout = timeout + KILL_GRACE_SECONDS
+    node_id = default_worker_id()
+    if coordinator is not None:
+        # Domains are leased as they start, and the leases of the ones still
+        # running are renewed every renew_interval seconds
+        domains = leased_domains(coordinator, domains, node_id)
+    renew_interval = LEASE_SECONDS / 3
+    renewed = time.monotonic()
+    domains = iter(domains)
+    writer = BatchWriter(output_path)
+    stats = BatchStats()
+    people = PersonIndex() if people_path else None
+    options = dict(max_pages=max_pages, delay=delay, concurrency=concurrency, timeout=timeout,
+                   store_path=store_path)
+
+    def failed(domain, message, status='error'):
+        return {'domain': domain, 'url': domain_to_url(domain), 'status': status, 'error': message,
+                'contacts': [], 'people': [], 'pages_crawled': 0, 'duration_seconds': 0.0}
+
+    def record_result(record):
+        writer.write(record)
+        stats.add(record)
+        if people is not None:
+            for person in record['people']:
+                people.add_record(person, stats.domains, record['domain'])
+        if coordinator is not None:
+            coordinator.finish_domain(record['domain'])
+        if report_every and stats.domains % report_every == 0:
+            summary = stats.summary()
+            logger.info(f"{summary['domains']} domains done, {summary['domains_per_minute']} domains/min, "
+                        f"{summary['pages_per_second']} pages/sec")
+
+    idle = []
+    busy = {}
+    try:
+        idle = [DomainWorker(log_level) for _ in range(workers)]
+        exhausted = False
+        while True:
+            while idle and not exhausted:
+                domain = next(domains, None)
+                if domain is None:
+                    exhausted = True
+                    break
+                worker = idle.pop()
+                worker.submit(domain, options, time.monotonic() + hard_timeout)
+                busy[worker.conn] = worker
+
+            if not busy:
+                break
+
+            next_deadline = min(worker.deadline for worker in busy.values())
+            if coordinator is not None:
+                next_deadline = min(next_deadline, renewed + renew_interval)
+            for conn in wait(list(busy), timeout=max(0.0, next_deadline - time.monotonic())):
+                worker = busy.pop(conn)
+                domain = worker.domain
+                try:
+                    record = worker.result()
+                except (EOFError, OSError):
+                    # The worker died (e.g. out of memory); replace it
+                    logger.error(f"Worker process crashed while scraping {domain}; restarting it")
+                    worker.kill()
+                    idle.append(DomainWorker(log_level))
+                    record_result(failed(domain, 'worker process crashed'))
+                    continue
+                idle.append(worker)
+                record_result(record)
+
+            now = time.monotonic()
+            if coordinator is not None and now - renewed >= renew_interval:
+                coordinator.renew_domains(node_id)
+                renewed = now
+            for conn, worker in list(busy.items()):
+                if worker.deadline <= now:
+                    # Past the timeout and not stopping: a hung fetch or a
+                    # stuck site must not hold up the rest of the batch
+                    del busy[conn]
+                    domain = worker.domain
+                    logger.error(f"{domain} did not stop {KILL_GRACE_SECONDS}s after its timeout; "
+                                 f"killing its worker")
+                    worker.kill()
+                    idle.append(DomainWorker(log_level))
+                    record_result(failed(domain, f'did not stop within {hard_timeout:g}s', status='timeout'))
+    finally:
+        for worker in busy.values():
+            worker.kill()
+        for worker in idle:
+            worker.close()
+        writer.close()
+        if people is not None:
+            write_people(people, people_path)
+
+    return stats.summary()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('domains', help='file with one domain or URL per line')
+    parser.add_argument('-o', '--output', default='leads.ndjson',
+                        help='output file; .csv writes one row per contact, anything else NDJSON per domain')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--concurrency', type=int, default=4, help='concurrent fetches per domain')
+    parser.add_argument('--max-pages', type=int, default=15)
+    parser.add_argument('--delay', type=float, default=1.0)
+    parser.add_argument('--timeout', type=float, default=120, help='per-domain crawl time budget in seconds')
+    parser.add_argument('--store', help='SQLite crawl store for resuming and incremental re-scrapes')
+    parser.add_argument('--coordinator', help='SQLite file shared by nodes working through the same domains')
+    parser.add_argument('--people', help='also write person records merged across all domains to this NDJSON file')
+    parser.add_argument('--report-every', type=int, default=25, help='log throughput every N domains')
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args(argv)
+
+    log_level = getattr(logging, args.log_level.upper(), logging.WARNING)
+    logging.getLogger().setLevel(log_level)
+    logger.setLevel(min(log_level, logging.INFO))
+
+    coordinator = SqliteCoordinator(args.coordinator) if args.coordinator else None
+    summary = run_batch(
+        read_domains(args.domains), args.output, workers=args.workers, max_pages=args.max_pages,
+        delay=args.delay, concurrency=args.concurrency, timeout=args.timeout,
+        report_every=args.report_every, log_level=log_level, store_path=args.store,
+        coordinator=coordinator, people_path=args.people
+    )
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Micro-benchmark: text extraction throughput in MB/s.
+
+Compares the single-pass scanner in extraction.py against the per-call
+regex functions the scraper used before it (kept below as legacy_*).
+
+    python benchmarks/bench_extraction.py --size-kb 512 --repeat 5
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction import scan_contacts, group_matches  # noqa: E402
+
+
+FIRST_NAMES = ['Alice', 'Bob', 'Carol', 'David', 'Erin', 'Frank', 'Grace', 'Henry', 'Ivy', 'Jack']
+LAST_NAMES = ['Smith', 'Jones', 'Brown', 'Taylor', 'Wilson', 'Davis', 'Clark', 'Lewis', 'Young', 'King']
+TITLES = ['Senior Software Engineer', 'Chief Financial Officer', 'Head of Data Analyst', 'Lead Product Designer']
+FILLER = ('Our company builds reliable products for customers around the world and '
+          'we care deeply about quality service and long term partnerships. ').split()
+
+
+def legacy_extract_emails(text):
+    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+    return [e for e in re.findall(email_pattern, text) if len(e) <= 320 and '.' in e.split('@')[1]]
+
+
+def legacy_phone_candidates(text):
+    phone_patterns = [
+        r'(?:\+\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b',
+        r'\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b',
+        r'\b\+\d{1,3}\s?\d{3,14}\b',
+    ]
+    candidates = []
+    for pattern in phone_patterns:
+        candidates.extend(re.findall(pattern, text))
+    return candidates
+
+
+def legacy_extract_linkedin(text):
+    return re.findall(r'linkedin\.com/(?:in|company)/[\w-]+', text.lower())
+
+
+def legacy_extract_titles(text):
+    title_pattern = r'\b(?:CEO|CTO|CFO|COO|Director|Manager|VP|Vice President|President|Founder|Owner|Partner|Senior|Lead|Chief|Head|Principal)\s+(?:\w+\s+)*(?:Engineer|Developer|Designer|Architect|Consultant|Advisor|Analyst|Officer|Manager|Director)\b'
+    return [m.group(0) for m in re.finditer(title_pattern, text)]
+
+
+def legacy_scan(text):
+    return {
+        'email': legacy_extract_emails(text),
+        'phone': legacy_phone_candidates(text),
+        'linkedin': legacy_extract_linkedin(text),
+        'title': legacy_extract_titles(text),
+    }
+
+
+def single_pass_scan(text):
+    return group_matches(scan_contacts(text))
+
+
+def make_text(size_bytes, density, seed=0):
+    # Build page-like text with roughly `density` contacts per 1 KB
+    rng = random.Random(seed)
+    chunks = []
+    total = 0
+    while total < size_bytes:
+        words = [rng.choice(FILLER) for _ in range(170)]
+        for _ in range(density):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            contact = rng.choice([
+                f"{first.lower()}.{last.lower()}@example.com",
+                f"+1 415-555-{rng.randint(0, 9999):04d}",
+                f"({rng.randint(200, 999)}) {rng.randint(200, 999)}-{rng.randint(0, 9999):04d}",
+                f"linkedin.com/in/{first.lower()}-{last.lower()}",
+                f"{first} {last} {rng.choice(TITLES)}",
+            ])
+            words.insert(rng.randrange(len(words)), contact)
+        chunk = ' '.join(words) + '\n'
+        chunks.append(chunk)
+        total += len(chunk)
+    return ''.join(chunks)
+
+
+def measure(func, text, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(text)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size-kb', type=int, default=512, help='size of the synthetic text')
+    parser.add_argument('--density', type=int, default=3, help='contacts per ~1 KB of text')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per implementation; best is reported')
+    args = parser.parse_args()
+
+    text = make_text(args.size_kb * 1024, args.density)
+    megabytes = len(text.encode('utf-8')) / (1024 * 1024)
+
+    print(f"text: {megabytes:.2f} MB, density {args.density} contacts/KB")
+    results = {}
+    for label, func in [('legacy (4 functions)', legacy_scan), ('single-pass scanner', single_pass_scan)]:
+        elapsed, found = measure(func, text, args.repeat)
+        results[label] = elapsed
+        counts = ', '.join(f"{kind}={len(values)}" for kind, values in found.items())
+        print(f"{label:<22} {elapsed * 1000:8.1f} ms  {megabytes / elapsed:7.2f} MB/s  ({counts})")
+
+    legacy, single = results.values()
+    print(f"speedup: {legacy / single:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
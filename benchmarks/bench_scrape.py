@@ -0,0 +1,182 @@
+"""End-to-end and per-stage scraper benchmarks on synthetic local sites.
+
+    python benchmarks/bench_scrape.py                      # all scenarios
+    python benchmarks/bench_scrape.py -s directory -r 5    # one scenario
+    python benchmarks/bench_scrape.py --latency 0.05 --concurrency 8
+    python benchmarks/bench_scrape.py --workers 4          # pipelined crawl
+    python benchmarks/bench_scrape.py --update-golden      # after an intended change
+
+Every run compares the leads found with benchmarks/golden/<scenario>.json and
+exits non-zero on a mismatch, so speedups cannot silently change results.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from sitegen import SiteSpec, generate_site, serve_site  # noqa: E402
+from scraper import GeneralizedLeadGenScraper  # noqa: E402
+from extraction import scan_contacts, group_matches  # noqa: E402
+from page import Page  # noqa: E402
+
+GOLDEN_DIR = os.path.join(BENCH_DIR, 'golden')
+
+SCENARIOS = {
+    'small': SiteSpec(pages=20, fanout=5, page_kb=8, team_size=12),
+    'directory': SiteSpec(pages=8, fanout=3, page_kb=4, team_size=500, card_nesting=3, person_markup=0.3),
+    'wide': SiteSpec(pages=150, fanout=60, page_kb=4, team_size=20, contact_density=4),
+    'edge_cases': SiteSpec(pages=12, fanout=4, page_kb=2, team_size=6, edge_cases=True),
+    'budget': SiteSpec(pages=60, fanout=8, page_kb=2, team_size=8),
+}
+
+# Page budgets of the scenarios that stop before the whole site is crawled;
+# the others get one larger than the site. Which pages fit a budget depends
+# on the order fetches finish in, so these goldens are only compared on the
+# sequential crawl.
+PAGE_BUDGETS = {
+    'budget': 20,
+}
+
+
+def best_of(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def leads_of(results):
+    # The golden view of a result: which leads were found and who they belong
+    # to. Source URLs are left out because they depend on crawl order.
+    return sorted([contact_type, value, name, title] for contact_type, value, name, title, _ in results.rows())
+
+
+def bench_scenario(name, spec, repeat, latency, concurrency, workers=0):
+    site = generate_site(spec)
+    max_pages = PAGE_BUDGETS.get(name, len(site) + 5)
+    timings = {}
+
+    with serve_site(site, latency=latency) as base_url:
+        scraper = GeneralizedLeadGenScraper(max_pages=max_pages, delay=0, extract_workers=workers)
+        results = None
+
+        def run_scrape():
+            nonlocal results
+            results = scraper.scrape(base_url, concurrency=concurrency)
+
+        timings['scrape'] = best_of(run_scrape, repeat)
+        pages_crawled = len(scraper.visited_urls)
+
+    # Stage timings run on the already generated HTML, without the network
+    stage_scraper = GeneralizedLeadGenScraper(max_pages=max_pages, delay=0)
+    documents = [(base_url.rstrip('/') + path, html) for path, html in site.items()]
+    pages = [Page(url, html) for url, html in documents]
+
+    timings['parse_html'] = best_of(lambda: [Page(url, html) for url, html in documents], repeat)
+    timings['parse_contacts'] = best_of(lambda: [stage_scraper.parse_contacts(page) for page in pages], repeat)
+    timings['extract_names'] = best_of(lambda: [stage_scraper.extract_names(page) for page in pages], repeat)
+
+    association_inputs = []
+    for page in pages:
+        matches = group_matches(scan_contacts(page.text))
+        association_inputs.append((
+            page, matches['email'], stage_scraper.validate_phone_numbers(matches['phone']),
+            stage_scraper.extract_linkedin_profiles(page, matches['linkedin']),
+            stage_scraper.extract_names(page), stage_scraper.extract_job_titles(page, matches['title'])
+        ))
+
+    def run_association():
+        for page, emails, phones, linkedin, names, titles in association_inputs:
+            stage_scraper.associate_contacts_with_context(
+                page, list(emails), list(phones), list(linkedin), names, titles
+            )
+
+    timings['associate_contacts'] = best_of(run_association, repeat)
+    timings['organize_results'] = best_of(scraper.organize_results, repeat)
+
+    return {
+        'scenario': name,
+        'pages_crawled': pages_crawled,
+        'html_bytes': sum(len(html.encode('utf-8')) for html in site.values()),
+        'leads': len(results),
+        'timings': timings,
+        'golden': leads_of(results),
+    }
+
+
+def check_golden(report, update, sequential=True):
+    path = os.path.join(GOLDEN_DIR, f"{report['scenario']}.json")
+    if report['scenario'] in PAGE_BUDGETS and not sequential:
+        return 'not compared (page budget, concurrent crawl)'
+    if update or not os.path.exists(path):
+        os.makedirs(GOLDEN_DIR, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report['golden'], f, indent=1)
+            f.write('\n')
+        return 'written'
+
+    with open(path, encoding='utf-8') as f:
+        expected = json.load(f)
+    if expected == report['golden']:
+        return 'ok'
+
+    found = {tuple(row) for row in report['golden']}
+    wanted = {tuple(row) for row in expected}
+    for row in sorted(wanted - found)[:10]:
+        print(f"  missing: {row}")
+    for row in sorted(found - wanted)[:10]:
+        print(f"  extra:   {row}")
+    return 'MISMATCH'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-s', '--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='scenario to run (repeatable; default: all)')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='runs per measurement; best is reported')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds of server latency per request')
+    parser.add_argument('--concurrency', type=int, default=1, help='scrape() concurrency')
+    parser.add_argument('--workers', type=int, default=0, help='extraction worker processes (pipelined crawl)')
+    parser.add_argument('--update-golden', action='store_true', help='rewrite the golden outputs')
+    parser.add_argument('--json', help='also write the timings to this file')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    failed = False
+    reports = []
+    for name in args.scenario or sorted(SCENARIOS):
+        report = bench_scenario(name, SCENARIOS[name], args.repeat, args.latency, args.concurrency,
+                                args.workers)
+        sequential = args.concurrency <= 1 and not args.workers
+        status = check_golden(report, args.update_golden, sequential)
+        failed = failed or status == 'MISMATCH'
+
+        pages_per_second = report['pages_crawled'] / report['timings']['scrape']
+        print(f"\n{name}: {report['pages_crawled']} pages, {report['html_bytes'] / 1024:.0f} KB HTML, "
+              f"{report['leads']} leads, golden {status}")
+        print(f"  {'scrape (end to end)':<22} {report['timings']['scrape'] * 1000:9.1f} ms  "
+              f"({pages_per_second:.1f} pages/s)")
+        for stage, seconds in report['timings'].items():
+            if stage != 'scrape':
+                print(f"  {stage:<22} {seconds * 1000:9.1f} ms")
+
+        report.pop('golden')
+        reports.append(report)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
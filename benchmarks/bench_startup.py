@@ -0,0 +1,114 @@
+"""Cold-start benchmark: import time, resident memory and one small crawl.
+
+Each run is a fresh Python process, like a short-lived batch worker or a
+newly scaled web pod. It imports the scraper, crawls a small synthetic site
+served locally, and optionally exports the leads, reporting time and peak
+RSS at each step.
+
+    python benchmarks/bench_startup.py                  # core path only
+    python benchmarks/bench_startup.py --export xlsx    # plus the Excel export
+    python benchmarks/bench_startup.py --export dataframe -r 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+
+EXPORTS = ['none', 'xlsx', 'dataframe']
+
+
+def peak_rss_mb():
+    # Peak resident set size of this process so far
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def run_child(base_url, max_pages, export):
+    # The measured process: prints one JSON line of timings
+    import logging
+    logging.disable(logging.INFO)
+    sys.path.insert(0, ROOT_DIR)
+
+    start = time.perf_counter()
+    from scraper import GeneralizedLeadGenScraper
+    report = {'import_seconds': time.perf_counter() - start, 'import_rss_mb': peak_rss_mb()}
+
+    start = time.perf_counter()
+    scraper = GeneralizedLeadGenScraper(max_pages=max_pages, delay=0)
+    results = scraper.scrape(base_url)
+    report['crawl_seconds'] = time.perf_counter() - start
+    report['crawl_rss_mb'] = peak_rss_mb()
+    report['leads'] = len(results)
+
+    if export != 'none':
+        start = time.perf_counter()
+        if export == 'xlsx':
+            from exporters import export_xlsx
+            export_xlsx(results.rows(), base_url, len(scraper.visited_urls), 0.0).close()
+        else:
+            results.to_dataframe()
+        report['export_seconds'] = time.perf_counter() - start
+        report['export_rss_mb'] = peak_rss_mb()
+
+    report['modules'] = {name: name in sys.modules for name in ('pandas', 'numpy', 'xlsxwriter')}
+    print(json.dumps(report))
+
+
+def measure(base_url, max_pages, export):
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', base_url,
+         '--max-pages', str(max_pages), '--export', export],
+        check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    ).stdout
+    report = json.loads(output.strip().splitlines()[-1])
+    report['process_seconds'] = time.perf_counter() - start
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='fresh processes to run; medians are reported')
+    parser.add_argument('--export', choices=EXPORTS, default='none', help='export step to include')
+    parser.add_argument('--pages', type=int, default=10, help='pages in the synthetic site')
+    parser.add_argument('--child', metavar='URL', help=argparse.SUPPRESS)
+    parser.add_argument('--max-pages', type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--json', help='also write the medians to this file')
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.max_pages, args.export)
+        return 0
+
+    sys.path.insert(0, BENCH_DIR)
+    from sitegen import SiteSpec, generate_site, serve_site
+
+    site = generate_site(SiteSpec(pages=args.pages, fanout=3, page_kb=4, team_size=8))
+    with serve_site(site) as base_url:
+        reports = [measure(base_url, len(site) + 5, args.export) for _ in range(args.repeat)]
+
+    medians = {key: statistics.median(report[key] for report in reports)
+               for key, value in reports[0].items() if isinstance(value, float)}
+    print(f"{args.repeat} cold starts, {args.pages}-page site, {reports[0]['leads']} leads, export: {args.export}")
+    for key, value in medians.items():
+        unit = 'MB' if key.endswith('_mb') else 'ms'
+        print(f"  {key:<18} {value if unit == 'MB' else value * 1000:9.1f} {unit}")
+    loaded = [name for name, present in reports[0]['modules'].items() if present]
+    print(f"  loaded: {', '.join(loaded) or 'none of pandas, numpy, xlsxwriter'}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'export': args.export, 'medians': medians}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
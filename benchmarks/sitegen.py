@@ -0,0 +1,197 @@
+"""Synthetic lead-bearing websites for offline benchmarks.
+
+generate_site() builds a deterministic site (path -> HTML) from a SiteSpec;
+serve_site() serves it from a local threaded HTTP server with an optional
+per-request latency, so crawls can be measured without touching the network.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+FIRST_NAMES = ['Alice', 'Bruno', 'Chiara', 'Deepak', 'Elena', 'Farid', 'Greta', 'Hiro', 'Ines', 'Jonas',
+               'Keiko', 'Liam', 'Maya', 'Nikhil', 'Olga', 'Pedro', 'Quinn', 'Rosa', 'Sven', 'Tariq']
+LAST_NAMES = ['Anders', 'Baker', 'Costa', 'Dubois', 'Evans', 'Fischer', 'Garcia', 'Hughes', 'Ivanova', 'Jensen',
+              'Kowalski', 'Larsen', 'Moreau', 'Novak', 'Okafor', 'Patel', 'Quiroga', 'Rossi', 'Schmidt', 'Tanaka']
+TITLES = ['Senior Software Engineer', 'Chief Financial Officer', 'Director of Sales Manager',
+          'Lead Product Designer', 'Head of Research Analyst', 'Vice President Marketing Director',
+          'Principal Solutions Architect', 'Founder and Managing Director']
+WORDS = ('our team builds reliable products for customers around the world and we care deeply about '
+         'quality service long term partnerships research design delivery support growth').split()
+
+HIGH_VALUE_PAGES = ['/about', '/contact', '/team', '/leadership']
+
+# Markup that extraction has got wrong before, served on /people when a
+# SiteSpec asks for edge cases so the goldens keep it fixed
+EDGE_CASE_CARDS = [
+    # A phone number written between two titles on separate lines
+    '<div class="member-card">\n<h3>Nora Quist</h3>\n'
+    '<p>Managing Partner\n415 555 1234\nSales Director</p>\n'
+    '<a href="mailto:nora.quist@example-corp.com">nora.quist@example-corp.com</a>\n</div>',
+    # Contactless cards around a wrapper's own contact, whose names and
+    # titles belong to neither
+    '<div class="team-grid">\n'
+    '<div class="member-card">\n<h3>Ivo Brandt</h3>\n<p>Chief Executive Officer</p>\n</div>\n'
+    '<div class="member-card">\n<h3>Lena Maris</h3>\n<p>Head of Sales</p>\n</div>\n'
+    '<p>Office: <a href="mailto:office@example-corp.com">office@example-corp.com</a></p>\n</div>',
+]
+
+
+class SiteSpec:
+    # Shape of a synthetic site:
+    #   pages            total pages, including the high-value ones
+    #   fanout           extra same-site links per page
+    #   page_kb          filler text per page
+    #   team_size        people on /team
+    #   card_nesting     wrapper elements around each person card
+    #   person_markup    share of cards with schema.org Person markup
+    #   contact_density  loose emails/phones/LinkedIn URLs per content page
+    #   edge_cases       add a /people page with the EDGE_CASE_CARDS
+    def __init__(self, pages=20, fanout=5, page_kb=8, team_size=12, card_nesting=2,
+                 person_markup=0.5, contact_density=2, seed=0, edge_cases=False):
+        self.pages = pages
+        self.fanout = fanout
+        self.page_kb = page_kb
+        self.team_size = team_size
+        self.card_nesting = card_nesting
+        self.person_markup = person_markup
+        self.contact_density = contact_density
+        self.seed = seed
+        self.edge_cases = edge_cases
+
+
+def _person(rng, index):
+    first = FIRST_NAMES[index % len(FIRST_NAMES)]
+    last = LAST_NAMES[(index // len(FIRST_NAMES) + index) % len(LAST_NAMES)]
+    suffix = '' if index < len(FIRST_NAMES) else str(index)
+    return {
+        'name': f"{first} {last}",
+        'email': f"{first.lower()}.{last.lower()}{suffix}@example-corp.com",
+        'phone': f"+1 415-555-{1000 + index:04d}",
+        'linkedin': f"https://www.linkedin.com/in/{first.lower()}-{last.lower()}{suffix}",
+        'title': rng.choice(TITLES),
+    }
+
+
+def _filler(rng, size_bytes):
+    paragraphs = []
+    total = 0
+    while total < size_bytes:
+        paragraph = ' '.join(rng.choice(WORDS) for _ in range(60)).capitalize() + '.'
+        paragraphs.append(f"<p>{paragraph}</p>")
+        total += len(paragraph) + 7
+    return '\n'.join(paragraphs)
+
+
+def _card(rng, person, spec):
+    if rng.random() < spec.person_markup:
+        inner = (f'<div class="member-card" itemscope itemtype="https://schema.org/Person">\n'
+                 f'<h3 itemprop="name">{person["name"]}</h3>\n'
+                 f'<p itemprop="jobTitle">{person["title"]}</p>\n')
+    else:
+        inner = (f'<div class="member-card">\n<h3>{person["name"]}</h3>\n'
+                 f'<p>{person["title"]}</p>\n')
+    inner += (f'<a href="mailto:{person["email"]}">{person["email"]}</a>\n'
+              f'<span class="phone">{person["phone"]}</span>\n'
+              f'<a href="{person["linkedin"]}">LinkedIn</a>\n</div>')
+    for level in range(spec.card_nesting):
+        inner = f'<div class="profile-wrap level-{level}">\n{inner}\n</div>'
+    return inner
+
+
+def _loose_contacts(rng, spec, page_index):
+    items = []
+    for i in range(spec.contact_density):
+        kind = rng.randrange(3)
+        if kind == 0:
+            items.append(f"<p>Write to press{page_index}x{i}@example-corp.com for details.</p>")
+        elif kind == 1:
+            items.append(f"<p>Call +1 212-555-{(page_index * 7 + i) % 10000:04d} today.</p>")
+        else:
+            items.append(f'<p><a href="https://www.linkedin.com/company/example-corp-{page_index}">Follow us</a></p>')
+    return '\n'.join(items)
+
+
+def _page(title, nav, body):
+    links = '\n'.join(f'<li><a href="{href}">{text}</a></li>' for href, text in nav)
+    return (f"<!DOCTYPE html>\n<html>\n<head><title>{title}</title></head>\n<body>\n"
+            f"<nav><ul>\n{links}\n</ul></nav>\n<main>\n{body}\n</main>\n"
+            f"<footer>\n<p>Example Corp, info@example-corp.com, +1 415-555-0100</p>\n</footer>\n"
+            f"</body>\n</html>\n")
+
+
+def generate_site(spec):
+    # Build every page of the site; returns {path: html}
+    rng = random.Random(spec.seed)
+    high_value_pages = HIGH_VALUE_PAGES + (['/people'] if spec.edge_cases else [])
+    content_pages = [f"/blog/post-{i}" for i in range(max(spec.pages - 1 - len(high_value_pages), 0))]
+    all_paths = ['/'] + high_value_pages + content_pages
+    base_nav = [('/', 'Home'), ('/about', 'About'), ('/team', 'Team'), ('/contact', 'Contact')]
+
+    site = {}
+    for index, path in enumerate(all_paths):
+        nav = list(base_nav)
+        for _ in range(spec.fanout):
+            target = rng.choice(all_paths)
+            nav.append((target + rng.choice(['', '/', '?utm_source=nav']), 'More'))
+
+        body = f"<h1>Page {index}</h1>\n" + _filler(rng, spec.page_kb * 1024)
+        if path == '/team':
+            people = [_person(rng, i) for i in range(spec.team_size)]
+            cards = '\n'.join(_card(rng, person, spec) for person in people)
+            body += f'\n<section class="team-section">\n<div class="team-grid">\n{cards}\n</div>\n</section>'
+        elif path == '/leadership':
+            for i in range(min(3, spec.team_size)):
+                person = _person(rng, 1000 + i)
+                body += f"\n<h2>{person['name']}</h2>\n<p>{person['title']}</p>\n<p>{person['email']}</p>"
+        elif path == '/people':
+            body += '\n<section class="team-section">\n' + '\n'.join(EDGE_CASE_CARDS) + '\n</section>'
+        elif path == '/contact':
+            body += '\n<p>Sales: sales@example-corp.com, (415) 555-0123</p>'
+        else:
+            body += '\n' + _loose_contacts(rng, spec, index)
+
+        site[path] = _page(f"Page {index}", nav, body)
+    return site
+
+
+class _SiteHandler(BaseHTTPRequestHandler):
+    site = {}
+    latency = 0.0
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        path = self.path.split('?', 1)[0].split('#', 1)[0]
+        if len(path) > 1:
+            path = path.rstrip('/')
+        html = self.site.get(path)
+        if html is None:
+            self.send_error(404)
+            return
+        body = html.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def serve_site(site, latency=0.0):
+    # Serve a generated site on an ephemeral local port; yields the base URL
+    handler = type('Handler', (_SiteHandler,), {'site': site, 'latency': latency})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,174 @@
+from urllib.parse import urljoin
+
+from bs4.element import CData, NavigableString, Tag
+
+from extraction import TITLE_PATTERN, WHITESPACE_PATTERN, scan_contacts, group_matches, validate_phone
+
+TEXT_TYPES = (NavigableString, CData)
+NAME_TAGS = frozenset(['h2', 'h3', 'h4', 'strong'])
+TITLE_TAGS = frozenset(['p', 'span', 'div'])
+
+# Elements longer than this (before whitespace is collapsed) are never
+# joined into a string to be tested as a name or a title
+MAX_CANDIDATE_CHARS = 2000
+
+
+class ContactCard:
+    # A card that owns at least one contact, with the first name heading and
+    # job title found inside it
+    __slots__ = ('element', 'name', 'email', 'phone', 'linkedin', 'title')
+
+    def __init__(self, element, name=None, email=None, phone=None, linkedin=None, title=None):
+        self.element = element
+        self.name = name
+        self.email = email
+        self.phone = phone
+        self.linkedin = linkedin
+        self.title = title
+
+
+class _OpenCard:
+    # A card being walked. Candidates are stored as (pre-order position,
+    # value) so the earliest one wins when a card is folded into its parent.
+    # Names and titles folded in from inner cards are kept apart from the
+    # card's own and used only when a single inner card brought any: with
+    # several, none of them can be told to belong to the wrapper's contacts.
+    __slots__ = ('element', 'position', 'start', 'name', 'title', 'linkedin', 'folded', 'folds')
+
+    def __init__(self, element, position, start):
+        self.element = element
+        self.position = position
+        self.start = start
+        self.name = None
+        self.title = None
+        self.linkedin = None
+        self.folded = {}
+        self.folds = 0
+
+    def offer(self, field, position, value):
+        current = getattr(self, field)
+        if current is None or position < current[0]:
+            setattr(self, field, (position, value))
+
+    def candidate(self, field):
+        # The card's own candidate, or an earlier one folded in from its
+        # only inner card that had a name or title
+        own = getattr(self, field)
+        folded = self.folded.get(field) if self.folds == 1 else None
+        if folded is not None and (own is None or folded[0] < own[0]):
+            return folded
+        return own
+
+    def fold_into(self, parent):
+        name, title = self.candidate('name'), self.candidate('title')
+        if name is not None or title is not None:
+            parent.folds += 1
+            for field, candidate in (('name', name), ('title', title)):
+                current = parent.folded.get(field)
+                if candidate is not None and (current is None or candidate[0] < current[0]):
+                    parent.folded[field] = candidate
+        if self.linkedin is not None:
+            parent.offer('linkedin', *self.linkedin)
+
+
+def _clean(text):
+    return WHITESPACE_PATTERN.sub(' ', text).strip()
+
+
+def find_contact_cards(page, country=None):
+    # Assign every contact inside the page's cards to exactly one card: the
+    # innermost card that contains it. The tree is walked once; text is
+    # collected bottom-up into a shared buffer, and a card that owns contacts
+    # removes its text from the buffer, so wrappers around it (team grids,
+    # sections) only see what is left over. Cards without contacts are folded
+    # into the card around them, along with their name and title candidates
+    # when no sibling card brought any. Returns ContactCard objects in document order.
+    card_ids = {id(card) for card in page.cards}
+    if not card_ids:
+        return []
+
+    pieces = []
+    offsets = [0]
+    open_cards = []
+    found = []
+    position = 0
+
+    def text_since(start):
+        return ''.join(pieces[start:])
+
+    def close_card(card):
+        # Record the card if it owns contacts, or fold it into its parent
+        text = text_since(card.start)
+        matches = group_matches(scan_contacts(text, titles=False)) if text else {'email': [], 'phone': []}
+        phone = None
+        for candidate in matches['phone']:
+            phone = validate_phone(candidate, country)
+            if phone:
+                break
+
+        email = matches['email'][0] if matches['email'] else None
+        linkedin = urljoin(page.base_url, card.linkedin[1]) if card.linkedin else None
+        if email or phone or linkedin:
+            # Like the first heading itself, an overlong one means no name
+            name, title = card.candidate('name'), card.candidate('title')
+            name = name[1] if name else None
+            if name is not None and (len(name) > 40 or len(name.split()) > 4):
+                name = None
+            found.append((card.position, ContactCard(
+                card.element, name=name, email=email, phone=phone, linkedin=linkedin,
+                title=title[1] if title else None
+            )))
+            # The card owns this text now; drop it from the enclosing cards
+            del pieces[card.start:]
+            del offsets[card.start + 1:]
+            return
+        if open_cards:
+            card.fold_into(open_cards[-1])
+
+    # Iterative walk; a (tag, card, start, position) tuple marks where a tag ends
+    stack = [page.soup]
+    while stack:
+        node = stack.pop()
+
+        if type(node) is tuple:
+            tag, card, start, tag_position = node
+            if card is not None:
+                # A card is never a candidate of the card around it: it either
+                # owns its contacts or has folded its own candidates in
+                open_cards.pop()
+                close_card(card)
+                continue
+
+            # A finished tag is a name or title candidate of the card around it
+            owner = open_cards[-1] if open_cards else None
+            if owner is not None and (tag.name in NAME_TAGS or tag.name in TITLE_TAGS):
+                text = None
+                if offsets[-1] - offsets[start] <= MAX_CANDIDATE_CHARS:
+                    text = _clean(text_since(start))
+                if tag.name in NAME_TAGS:
+                    owner.offer('name', tag_position, text)
+                if text and tag.name in TITLE_TAGS and len(text) < 100 and TITLE_PATTERN.search(text):
+                    owner.offer('title', tag_position, text)
+            continue
+
+        if not isinstance(node, Tag):
+            if type(node) in TEXT_TYPES:
+                pieces.append(node)
+                offsets.append(offsets[-1] + len(node))
+            continue
+
+        position += 1
+        card = None
+        if id(node) in card_ids:
+            card = _OpenCard(node, position, len(pieces))
+            open_cards.append(card)
+        elif open_cards and node.name == 'a':
+            href = node.get('href')
+            if href and 'linkedin.com/in/' in href.lower():
+                open_cards[-1].offer('linkedin', position, href)
+
+        stack.append((node, card, len(pieces), position))
+        stack.extend(reversed(node.contents))
+
+    found.sort(key=lambda item: item[0])
+    return [card for _, card in found]
@@ -0,0 +1,356 @@
+import hashlib
+import math
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+from frontier import canonicalize_url
+
+# How long a node owns the URLs and domains it leases. A node renews its
+# leases while it works on them; those of a node that died go back to the
+# queue once they expire.
+LEASE_SECONDS = 120.0
+
+# How often an idle node checks for work that other nodes may still add
+POLL_INTERVAL = 1.0
+
+# The shared seen-URL filter of a site is sized for this many distinct URLs
+# per page of its crawl budget (and at least MIN_SEEN_CAPACITY), with this
+# false-positive rate: about one URL in 10,000 is wrongly taken as seen
+SEEN_URLS_PER_PAGE = 200
+MIN_SEEN_CAPACITY = 10000
+SEEN_ERROR_RATE = 0.0001
+
+# The seen-URL filter is stored in blocks of this many bytes, so adding a
+# URL reads and rewrites only the few blocks its bits fall in
+SEEN_BLOCK_BYTES = 4096
+
+
+def default_worker_id():
+    # Unique name for this node: host, process and a random suffix
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+def bloom_size(capacity, error_rate=SEEN_ERROR_RATE):
+    # (bits, hashes) of a Bloom filter holding `capacity` keys at error_rate
+    bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+
+def bloom_positions(key, bits, hashes):
+    # Bit positions of a key, from two 64-bit halves of one blake2b digest
+    # (double hashing), so the filter is the same on every node
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+    first = int.from_bytes(digest[:8], 'big')
+    second = int.from_bytes(digest[8:], 'big') | 1
+    return [(first + i * second) % bits for i in range(hashes)]
+
+
+class CrawlCoordinator(ABC):
+    # Work shared by several crawler nodes: a queue of domains, and for each
+    # site crawled together a queue of leased URLs, a seen-URL filter, a
+    # page budget and the per-host pacing state that SharedHostRateController
+    # keeps. Implementations must make each method atomic across nodes.
+    # SqliteCoordinator is the reference implementation.
+
+    @abstractmethod
+    def open_site(self, site, max_pages, seeds):
+        # Join the crawl of site (its canonical start URL), creating it with
+        # the (url, priority, depth) seeds and a budget of max_pages unless a
+        # crawl of it is already under way. A finished crawl starts over.
+        ...
+
+    @abstractmethod
+    def push(self, site, entries):
+        # Queue the (url, priority, depth) entries not seen before (in any
+        # spelling) in this crawl of site; returns how many were queued
+        ...
+
+    @abstractmethod
+    def lease(self, site, worker, count, lease_seconds=LEASE_SECONDS):
+        # Lease up to count of the best queued (url, depth) pairs to worker,
+        # including URLs whose lease expired, within the page budget
+        ...
+
+    @abstractmethod
+    def renew(self, site, worker, lease_seconds=LEASE_SECONDS):
+        # Extend every lease worker holds on site's URLs
+        ...
+
+    @abstractmethod
+    def complete(self, site, worker, url, fetched=True):
+        # Take a URL leased to worker off the queue; fetched pages count to
+        # the budget. Returns False (and changes nothing) when worker's lease
+        # expired and the URL has been leased to another worker since.
+        ...
+
+    @abstractmethod
+    def release(self, site, worker, urls):
+        # Give leased URLs that worker will not crawl back to the queue
+        ...
+
+    @abstractmethod
+    def pending(self, site):
+        # (URLs that can still be leased within the budget, URLs under an
+        # unexpired lease); the crawl is over when both are 0
+        ...
+
+    @abstractmethod
+    def update_host(self, host, update):
+        # Call update(row) with the host's pacing row (None at first) and
+        # store the row it returns; returns update's second value
+        ...
+
+    @abstractmethod
+    def add_domains(self, urls):
+        # Queue domains (start URLs) for batch scraping; known ones are skipped
+        ...
+
+    @abstractmethod
+    def lease_domain(self, worker, lease_seconds=LEASE_SECONDS):
+        # The next unfinished domain nobody holds an unexpired lease on, or None
+        ...
+
+    @abstractmethod
+    def renew_domains(self, worker, lease_seconds=LEASE_SECONDS):
+        # Extend every lease worker holds on unfinished domains
+        ...
+
+    @abstractmethod
+    def finish_domain(self, url):
+        # Mark a domain done so it is never leased again
+        ...
+
+
+class SqliteCoordinator(CrawlCoordinator):
+    # CrawlCoordinator on a SQLite file, for nodes that share a filesystem
+    # (processes on one machine, or machines with the file on a network
+    # share that supports locking). Every operation is one IMMEDIATE
+    # transaction, which serializes writers across processes. Completed URLs
+    # are deleted from the queue; the site's Bloom filter, kept as blocks of
+    # SEEN_BLOCK_BYTES (a missing block is all zeros), is what remembers them.
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sites (
+                site TEXT PRIMARY KEY,
+                max_pages INTEGER NOT NULL,
+                pages INTEGER NOT NULL,
+                filter_bits INTEGER NOT NULL,
+                filter_hashes INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                started_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS seen_blocks (
+                site TEXT NOT NULL,
+                block INTEGER NOT NULL,
+                bits BLOB NOT NULL,
+                PRIMARY KEY (site, block)
+            );
+            CREATE TABLE IF NOT EXISTS urls (
+                site TEXT NOT NULL,
+                url TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                depth INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                owner TEXT,
+                lease_expires REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (site, url)
+            );
+            CREATE INDEX IF NOT EXISTS urls_by_priority ON urls (site, priority, seq);
+            CREATE TABLE IF NOT EXISTS hosts (
+                host TEXT PRIMARY KEY,
+                delay REAL NOT NULL,
+                last_start REAL,
+                hold_until REAL NOT NULL,
+                latency REAL
+            );
+            CREATE TABLE IF NOT EXISTS domains (
+                url TEXT PRIMARY KEY,
+                seq INTEGER NOT NULL,
+                owner TEXT,
+                lease_expires REAL NOT NULL DEFAULT 0,
+                done INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def _push(self, conn, site, entries):
+        row = conn.execute('SELECT filter_bits, filter_hashes, seq FROM sites WHERE site = ?',
+                           (site,)).fetchone()
+        if row is None:
+            return 0
+        bits, hashes, seq = row
+        block_bits = SEEN_BLOCK_BYTES * 8
+        entries = [(url, priority, depth, bloom_positions(canonicalize_url(url), bits, hashes))
+                   for url, priority, depth in entries]
+        wanted = sorted({position // block_bits for *_, positions in entries for position in positions})
+        blocks = {block: bytearray(SEEN_BLOCK_BYTES) for block in wanted}
+        for start in range(0, len(wanted), 500):
+            chunk = wanted[start:start + 500]
+            query = (f'SELECT block, bits FROM seen_blocks WHERE site = ? '
+                     f'AND block IN ({", ".join("?" * len(chunk))})')
+            for block, data in conn.execute(query, (site, *chunk)):
+                blocks[block][:] = data
+
+        rows = []
+        changed = set()
+        for url, priority, depth, positions in entries:
+            if all(blocks[position // block_bits][(position % block_bits) >> 3] & (1 << (position & 7))
+                   for position in positions):
+                continue
+            for position in positions:
+                block = position // block_bits
+                blocks[block][(position % block_bits) >> 3] |= 1 << (position & 7)
+                changed.add(block)
+            seq += 1
+            rows.append((site, url, priority, depth, seq))
+        if changed:
+            conn.executemany('INSERT OR REPLACE INTO seen_blocks (site, block, bits) VALUES (?, ?, ?)',
+                             [(site, block, bytes(blocks[block])) for block in sorted(changed)])
+        if rows:
+            conn.executemany('INSERT OR IGNORE INTO urls (site, url, priority, depth, seq) VALUES (?, ?, ?, ?, ?)',
+                             rows)
+            conn.execute('UPDATE sites SET seq = ? WHERE site = ?', (seq, site))
+        return len(rows)
+
+    def open_site(self, site, max_pages, seeds):
+        with self._transaction() as conn:
+            if any(self._pending(conn, site, time.time())):
+                return False
+            conn.execute('DELETE FROM urls WHERE site = ?', (site,))
+            conn.execute('DELETE FROM seen_blocks WHERE site = ?', (site,))
+            bits, hashes = bloom_size(max(MIN_SEEN_CAPACITY, max_pages * SEEN_URLS_PER_PAGE))
+            conn.execute(
+                'INSERT OR REPLACE INTO sites '
+                '(site, max_pages, pages, filter_bits, filter_hashes, seq, started_at) '
+                'VALUES (?, ?, 0, ?, ?, 0, ?)',
+                (site, max_pages, bits, hashes, time.time())
+            )
+            self._push(conn, site, seeds)
+            return True
+
+    def push(self, site, entries):
+        if not entries:
+            return 0
+        with self._transaction() as conn:
+            return self._push(conn, site, entries)
+
+    def _leased(self, conn, site, now):
+        return conn.execute('SELECT COUNT(*) FROM urls WHERE site = ? AND owner IS NOT NULL AND lease_expires > ?',
+                            (site, now)).fetchone()[0]
+
+    def _budget(self, conn, site, now):
+        # Pages that may still be leased: the budget minus the pages fetched
+        # and the URLs under an unexpired lease
+        row = conn.execute('SELECT max_pages, pages FROM sites WHERE site = ?', (site,)).fetchone()
+        if row is None:
+            return 0
+        return max(0, row[0] - row[1] - self._leased(conn, site, now))
+
+    def lease(self, site, worker, count, lease_seconds=LEASE_SECONDS):
+        with self._transaction() as conn:
+            now = time.time()
+            count = min(count, self._budget(conn, site, now))
+            if count <= 0:
+                return []
+            rows = conn.execute(
+                'SELECT url, depth FROM urls WHERE site = ? AND (owner IS NULL OR lease_expires <= ?) '
+                'ORDER BY priority, seq LIMIT ?', (site, now, count)
+            ).fetchall()
+            conn.executemany(
+                'UPDATE urls SET owner = ?, lease_expires = ? WHERE site = ? AND url = ?',
+                [(worker, now + lease_seconds, site, url) for url, _ in rows]
+            )
+            return rows
+
+    def renew(self, site, worker, lease_seconds=LEASE_SECONDS):
+        with self._transaction() as conn:
+            conn.execute('UPDATE urls SET lease_expires = ? WHERE site = ? AND owner = ?',
+                         (time.time() + lease_seconds, site, worker))
+
+    def complete(self, site, worker, url, fetched=True):
+        with self._transaction() as conn:
+            deleted = conn.execute('DELETE FROM urls WHERE site = ? AND url = ? AND owner = ?',
+                                   (site, url, worker)).rowcount
+            if deleted and fetched:
+                conn.execute('UPDATE sites SET pages = pages + 1 WHERE site = ?', (site,))
+            return bool(deleted)
+
+    def release(self, site, worker, urls):
+        with self._transaction() as conn:
+            conn.executemany('UPDATE urls SET owner = NULL, lease_expires = 0 '
+                             'WHERE site = ? AND url = ? AND owner = ?',
+                             [(site, url, worker) for url in urls])
+
+    def _pending(self, conn, site, now):
+        queued = conn.execute('SELECT COUNT(*) FROM urls WHERE site = ? AND (owner IS NULL OR lease_expires <= ?)',
+                              (site, now)).fetchone()[0]
+        return min(queued, self._budget(conn, site, now)), self._leased(conn, site, now)
+
+    def pending(self, site):
+        with self._transaction() as conn:
+            return self._pending(conn, site, time.time())
+
+    def update_host(self, host, update):
+        with self._transaction() as conn:
+            row = conn.execute('SELECT delay, last_start, hold_until, latency FROM hosts WHERE host = ?',
+                               (host,)).fetchone()
+            row, result = update(row)
+            conn.execute('INSERT OR REPLACE INTO hosts (host, delay, last_start, hold_until, latency) '
+                         'VALUES (?, ?, ?, ?, ?)', (host, *row))
+            return result
+
+    def add_domains(self, urls):
+        with self._transaction() as conn:
+            seq = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM domains').fetchone()[0]
+            conn.executemany('INSERT OR IGNORE INTO domains (url, seq) VALUES (?, ?)',
+                             [(url, seq + i) for i, url in enumerate(urls, start=1)])
+
+    def lease_domain(self, worker, lease_seconds=LEASE_SECONDS):
+        with self._transaction() as conn:
+            now = time.time()
+            row = conn.execute('SELECT url FROM domains WHERE done = 0 AND (owner IS NULL OR lease_expires <= ?) '
+                               'ORDER BY seq LIMIT 1', (now,)).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE domains SET owner = ?, lease_expires = ? WHERE url = ?',
+                         (worker, now + lease_seconds, row[0]))
+            return row[0]
+
+    def renew_domains(self, worker, lease_seconds=LEASE_SECONDS):
+        with self._transaction() as conn:
+            conn.execute('UPDATE domains SET lease_expires = ? WHERE owner = ? AND done = 0',
+                         (time.time() + lease_seconds, worker))
+
+    def finish_domain(self, url):
+        with self._transaction() as conn:
+            conn.execute('UPDATE domains SET done = 1, owner = NULL WHERE url = ?', (url,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from leads import Contact
+
+
+def content_hash(html):
+    # Fingerprint of a page body, used to skip re-parsing unchanged pages
+    return hashlib.blake2b(html.encode('utf-8', errors='replace'), digest_size=16).hexdigest()
+
+
+class StoredPage:
+    __slots__ = ('url', 'content_hash', 'contacts', 'links', 'depth', 'order')
+
+    def __init__(self, url, content_hash, contacts, links, depth, order):
+        self.url = url
+        self.content_hash = content_hash
+        self.contacts = contacts
+        self.links = links
+        self.depth = depth
+        self.order = order
+
+
+class CrawlState:
+    # What a scrape needs to pick up an interrupted pass: the pages already
+    # visited in it (in crawl order) and the URLs still queued
+    def __init__(self, start_url, run, resumed, pages, frontier, seq=0):
+        self.start_url = start_url
+        self.run = run
+        self.resumed = resumed
+        self.pages = pages
+        self.frontier = frontier
+        self.seq = seq
+
+
+def _encode_contacts(contacts):
+    return json.dumps([[c.name, c.email, c.phone, c.linkedin, c.title] for c in contacts])
+
+
+def _decode_contacts(data, url):
+    return [Contact(name, email, phone, linkedin, title, url)
+            for name, email, phone, linkedin, title in json.loads(data)]
+
+
+class CrawlStore:
+    # Persistent SQLite checkpoint of site crawls, keyed by the canonical start
+    # URL. Every parsed page is written with its content hash, contacts and
+    # links, and the frontier is kept in step, so a scrape that stops part way
+    # can resume, and a later re-scrape of the same site can reuse the
+    # contacts of every page whose content has not changed.
+    #
+    # Each pass over a site has a run number. An unfinished pass is resumed;
+    # once a pass completes, the next scrape starts a new run from the start
+    # URL while the pages of earlier runs stay available for reuse.
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS crawls (
+                start_url TEXT PRIMARY KEY,
+                run INTEGER NOT NULL,
+                complete INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                start_url TEXT NOT NULL,
+                url TEXT NOT NULL,
+                run INTEGER NOT NULL,
+                page_order INTEGER NOT NULL,
+                depth INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                contacts TEXT NOT NULL,
+                links TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (start_url, url)
+            );
+            CREATE TABLE IF NOT EXISTS frontier (
+                start_url TEXT NOT NULL,
+                url TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                depth INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                PRIMARY KEY (start_url, url)
+            );
+        """)
+        self._conn.commit()
+
+    def begin(self, start_url):
+        # Resume the site's unfinished pass, or start a new one
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT run, complete FROM crawls WHERE start_url = ?', (start_url,)
+            ).fetchone()
+            if row is not None and not row[1]:
+                run = row[0]
+                pages = [
+                    StoredPage(url, digest, _decode_contacts(contacts, url), json.loads(links), depth, order)
+                    for url, digest, contacts, links, depth, order in self._conn.execute(
+                        'SELECT url, content_hash, contacts, links, depth, page_order FROM pages '
+                        'WHERE start_url = ? AND run = ? ORDER BY page_order', (start_url, run)
+                    )
+                ]
+                frontier = self._conn.execute(
+                    'SELECT url, priority, depth, seq FROM frontier WHERE start_url = ? ORDER BY seq',
+                    (start_url,)
+                ).fetchall()
+                seq = frontier[-1][3] if frontier else 0
+                return CrawlState(start_url, run, True, pages, [row[:3] for row in frontier], seq)
+
+            run = row[0] + 1 if row is not None else 1
+            self._conn.execute(
+                'INSERT OR REPLACE INTO crawls (start_url, run, complete, updated_at) VALUES (?, ?, 0, ?)',
+                (start_url, run, time.time())
+            )
+            self._conn.execute('DELETE FROM frontier WHERE start_url = ?', (start_url,))
+            self._conn.commit()
+            return CrawlState(start_url, run, False, [], [])
+
+    def lookup(self, start_url, url):
+        # The stored record of a page from any run, or None
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT content_hash, contacts, links, depth, page_order FROM pages '
+                'WHERE start_url = ? AND url = ?', (start_url, url)
+            ).fetchone()
+        if row is None:
+            return None
+        digest, contacts, links, depth, order = row
+        return StoredPage(url, digest, _decode_contacts(contacts, url), json.loads(links), depth, order)
+
+    def push(self, state, entries):
+        # Add (url, priority, depth) entries to the stored frontier
+        rows = []
+        for url, priority, depth in entries:
+            state.seq += 1
+            rows.append((state.start_url, url, priority, depth, state.seq))
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO frontier (start_url, url, priority, depth, seq) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+            self._conn.commit()
+
+    def record_page(self, state, url, digest, contacts, links, depth, order):
+        # Checkpoint a parsed page and take it off the frontier
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO pages '
+                '(start_url, url, run, page_order, depth, content_hash, contacts, links, fetched_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (state.start_url, url, state.run, order, depth, digest,
+                 _encode_contacts(contacts), json.dumps(links), time.time())
+            )
+            self._conn.execute('DELETE FROM frontier WHERE start_url = ? AND url = ?', (state.start_url, url))
+            self._conn.commit()
+
+    def discard(self, state, url):
+        # Drop a URL that could not be fetched from the frontier
+        with self._lock:
+            self._conn.execute('DELETE FROM frontier WHERE start_url = ? AND url = ?', (state.start_url, url))
+            self._conn.commit()
+
+    def finish(self, state):
+        # Mark the pass complete; the next scrape of the site starts a new run
+        with self._lock:
+            self._conn.execute(
+                'UPDATE crawls SET complete = 1, updated_at = ? WHERE start_url = ?',
+                (time.time(), state.start_url)
+            )
+            self._conn.execute('DELETE FROM frontier WHERE start_url = ?', (state.start_url,))
+            self._conn.commit()
+
+    def forget(self, start_url):
+        # Delete everything stored about a site
+        with self._lock:
+            for table in ('crawls', 'pages', 'frontier'):
+                self._conn.execute(f'DELETE FROM {table} WHERE start_url = ?', (start_url,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
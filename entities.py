@@ -0,0 +1,256 @@
+import re
+
+from extraction import LINKEDIN_SLUG_PATTERN
+
+NAME_TOKEN_PATTERN = re.compile(r'[^\W\d_]+')
+
+# Dropped before names are compared
+HONORIFICS = frozenset(['mr', 'mrs', 'ms', 'miss', 'dr', 'prof', 'sir'])
+
+# Words that mean a LinkedIn slug names a page rather than a person
+NON_PERSON_SLUG_WORDS = frozenset(['page', 'profile', 'company', 'business'])
+
+def name_from_email(email):
+    # "John Smith" for john.smith@..., or None when the address does not
+    # look like first.last
+    local_part = email.split('@')[0]
+    parts = local_part.split('.')
+    if len(parts) == 2 and all(part.isalpha() for part in parts):
+        return f"{parts[0].capitalize()} {parts[1].capitalize()}"
+    return None
+
+
+def name_from_linkedin(url):
+    # "John Smith" for linkedin.com/in/john-smith, or None
+    match = LINKEDIN_SLUG_PATTERN.search(url)
+    if not match:
+        return None
+    name = match.group(1).replace('-', ' ').title()
+    if any(word.lower() in NON_PERSON_SLUG_WORDS for word in name.split()):
+        return None
+    return name
+
+
+def name_tokens(name):
+    # Lowercase name words without honorifics, e.g. {'john', 'smith'}
+    if not name:
+        return frozenset()
+    return frozenset(token for token in NAME_TOKEN_PATTERN.findall(name.lower()) if token not in HONORIFICS)
+
+
+def linkedin_key(url):
+    # The same profile reached over http/https, with or without www
+    url = url.lower().split('://', 1)[-1]
+    if url.startswith('www.'):
+        url = url[4:]
+    return url.rstrip('/')
+
+
+class _Person:
+    # The merged data of one union-find root. name_rank orders candidate
+    # names: names read from the page beat names guessed from an address,
+    # then the earlier find wins. Identifier dicts map each value to the
+    # first page it was found on.
+    __slots__ = ('name', 'name_rank', 'name_source', 'tokens', 'title', 'title_rank', 'title_source',
+                 'emails', 'phones', 'linkedin', 'sources', 'rank')
+
+    def __init__(self, rank):
+        self.name = None
+        self.name_rank = None
+        self.name_source = None
+        self.tokens = frozenset()
+        self.title = None
+        self.title_rank = None
+        self.title_source = None
+        self.emails = {}
+        self.phones = {}
+        self.linkedin = {}
+        self.sources = set()
+        self.rank = rank
+
+    def compatible(self, tokens):
+        # Two names may belong to one person when either is unknown or the
+        # words of one are all in the other ("John Smith", "John A. Smith")
+        return not tokens or not self.tokens or tokens <= self.tokens or self.tokens <= tokens
+
+    def set_name(self, name, rank, source, tokens):
+        if name and (self.name_rank is None or rank < self.name_rank):
+            self.name, self.name_rank, self.name_source, self.tokens = name, rank, source, tokens
+
+    def set_title(self, title, rank, source):
+        if title and (self.title_rank is None or rank < self.title_rank):
+            self.title, self.title_rank, self.title_source = title, rank, source
+
+    def absorb(self, other):
+        self.set_name(other.name, other.name_rank, other.name_source, other.tokens)
+        self.set_title(other.title, other.title_rank, other.title_source)
+        for mine, theirs in ((self.emails, other.emails), (self.phones, other.phones)):
+            for value, source in theirs.items():
+                mine.setdefault(value, source)
+        for profile, source in other.linkedin.items():
+            self.add_linkedin(profile, source)
+        self.sources |= other.sources
+        self.rank = min(self.rank, other.rank)
+
+    def add_linkedin(self, profile, source):
+        # Keep one URL per profile, however it was linked
+        key = linkedin_key(profile)
+        if not any(linkedin_key(known) == key for known in self.linkedin):
+            self.linkedin[profile] = source
+
+    def record(self):
+        provenance = {}
+        if self.name:
+            provenance['Name'] = self.name_source
+        if self.title:
+            provenance['Job Title'] = self.title_source
+        for values in (self.emails, self.phones, self.linkedin):
+            provenance.update(values)
+        return {
+            'Name': self.name or '',
+            'Job Title': self.title or '',
+            'Emails': list(self.emails),
+            'Phones': list(self.phones),
+            'LinkedIn': list(self.linkedin),
+            'Sources': sorted(self.sources),
+            'Provenance': provenance
+        }
+
+
+class PersonIndex:
+    # Incremental entity resolution of contact fragments into people.
+    #
+    # Every fragment (a Contact: any of email/phone/LinkedIn with the name
+    # and title found next to them) is linked through its keys: the email,
+    # the phone, the LinkedIn profile, and the normalized name within one
+    # site. Fragments sharing a key are merged with union-find (union by
+    # size, path halving), so indexing a page costs near-constant time per
+    # fragment however many pages came before, and memory grows with the
+    # number of people rather than with every repeated hit.
+    #
+    # A merge is refused when both sides already have names that cannot be
+    # the same person, so a switchboard number or a shared inbox listed
+    # next to several people does not fuse them into one record; the shared
+    # value is then kept on each of them. Merges happen in the order pages
+    # are indexed, so a concurrent crawl may group a few ambiguous
+    # fragments differently from a sequential one.
+    def __init__(self):
+        self._parent = []
+        self._size = []
+        self._people = []
+        self._keys = {}
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _find(self, node):
+        parent = self._parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def _union(self, a, b):
+        if self._size[a] < self._size[b]:
+            a, b = b, a
+        self._parent[b] = a
+        self._size[a] += self._size[b]
+        self._people[a].absorb(self._people[b])
+        self._people[b] = None
+        self._count -= 1
+        return a
+
+    def add_fragment(self, name=None, title=None, emails=(), phones=(), linkedin=(), source=None,
+                     rank=(0, 0), site=''):
+        # Merge one fragment into the index; returns True if it started a
+        # new person. rank orders fragments (page order, place on page).
+        return self._merge(name, title, emails, phones, linkedin, [source] if source else [], rank, site)[0]
+
+    def _merge(self, name, title, emails, phones, linkedin, sources, rank, site, provenance=None):
+        # (created, person) for a fragment found on sources; provenance maps
+        # values (or 'Name', 'Job Title') to the page they came from when
+        # that is not the first source
+        emails = [email.lower() for email in emails if email]
+        phones = [phone for phone in phones if phone]
+        linkedin = [profile for profile in linkedin if profile]
+        if not (emails or phones or linkedin):
+            return False, None
+
+        tokens = name_tokens(name)
+        guessed = bool(name) and any(
+            name == guess for guess in [name_from_email(email) for email in emails]
+            + [name_from_linkedin(profile) for profile in linkedin]
+        )
+        keys = [('email', email) for email in emails] + [('phone', phone) for phone in phones]
+        keys += [('linkedin', linkedin_key(profile)) for profile in linkedin]
+        if len(tokens) >= 2:
+            keys.append(('name', site, ' '.join(sorted(tokens))))
+
+        # The people this fragment links, skipping any whose name rules it out
+        roots = []
+        for key in keys:
+            node = self._keys.get(key)
+            if node is None:
+                continue
+            root = self._find(node)
+            if root not in roots and self._people[root].compatible(tokens):
+                roots.append(root)
+
+        created = not roots
+        if created:
+            root = len(self._parent)
+            self._parent.append(root)
+            self._size.append(1)
+            self._people.append(_Person(rank))
+            self._count += 1
+        else:
+            root = roots[0]
+            for other in roots[1:]:
+                other = self._find(other)
+                if other != root and self._people[root].compatible(self._people[other].tokens):
+                    root = self._union(root, other)
+
+        provenance = provenance or {}
+        source = sources[0] if sources else None
+        person = self._people[root]
+        person.set_name(name, (guessed, rank), provenance.get('Name', source), tokens)
+        person.set_title(title, rank, provenance.get('Job Title', source))
+        for values, found in ((person.emails, emails), (person.phones, phones)):
+            for value in found:
+                values.setdefault(value, provenance.get(value, source))
+        for profile in linkedin:
+            person.add_linkedin(profile, provenance.get(profile, source))
+        person.sources.update(sources)
+        person.rank = min(person.rank, rank)
+
+        for key in keys:
+            self._keys.setdefault(key, root)
+        return created, person
+
+    def add(self, contacts, order=0, site=''):
+        # Index the contacts of one page; returns how many new people it added
+        added = 0
+        for position, contact in enumerate(contacts):
+            added += self.add_fragment(
+                contact.name, contact.title,
+                [contact.email] if contact.email else (),
+                [contact.phone] if contact.phone else (),
+                [contact.linkedin] if contact.linkedin else (),
+                contact.source, (order, position), site
+            )
+        return added
+
+    def add_record(self, record, order=0, site=''):
+        # Merge a person record produced by another index (for example the
+        # records of one domain of a batch), keeping its provenance
+        return self._merge(record['Name'], record['Job Title'], record['Emails'], record['Phones'],
+                           record['LinkedIn'], record['Sources'], (order, 0), site, record['Provenance'])[0]
+
+    def records(self):
+        # One dict per person (Name, Job Title, Emails, Phones, LinkedIn,
+        # Sources and the Provenance of each value), ordered by name and then
+        # by where the person was first found
+        people = [person for node, person in enumerate(self._people) if person is not None and self._parent[node] == node]
+        people.sort(key=lambda person: (person.name is None, person.name or '', person.rank))
+        return [person.record() for person in people]
@@ -0,0 +1,193 @@
+import csv
+import importlib.util
+import io
+import json
+import tempfile
+import time
+
+from leads import CONTACT_TYPES, RESULT_COLUMNS
+
+# Exports are written to a temporary file that stays in memory up to this
+# size and moves to disk beyond it
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# Rows per chunk sent to the client by the text exporters, and per Parquet
+# row group
+STREAM_BATCH_ROWS = 500
+PARQUET_BATCH_ROWS = 10000
+
+EXPORT_FORMATS = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+
+class ExportUnavailable(Exception):
+    pass
+
+
+class ContactCounts:
+    # Rows per contact type, counted while the rows are being written
+    def __init__(self):
+        self.by_type = {contact_type: 0 for _, contact_type in CONTACT_TYPES}
+        self.total = 0
+
+    def add(self, contact_type):
+        self.by_type[contact_type] = self.by_type.get(contact_type, 0) + 1
+        self.total += 1
+
+    def count(self, rows):
+        # Pass rows through, counting each one on the way
+        for row in rows:
+            self.add(row[0])
+            yield row
+
+    @classmethod
+    def of(cls, contact_types):
+        counts = cls()
+        for contact_type in contact_types:
+            counts.add(contact_type)
+        return counts
+
+
+def check_format(fmt):
+    # Raise ExportUnavailable if fmt needs an optional package that is missing
+    if fmt == 'parquet' and importlib.util.find_spec('pyarrow') is None:
+        raise ExportUnavailable('Parquet export needs pyarrow (pip install pyarrow)')
+
+
+def available_formats():
+    # The export formats this process can write, in EXPORT_FORMATS order
+    formats = []
+    for fmt in EXPORT_FORMATS:
+        try:
+            check_format(fmt)
+        except ExportUnavailable:
+            continue
+        formats.append(fmt)
+    return formats
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def export_xlsx(rows, url, pages_crawled, duration):
+    # Leads, Summary and Metadata sheets, written with xlsxwriter's
+    # constant-memory mode so each row is flushed as soon as it is written.
+    # Returns the workbook as a file object positioned at the start.
+    # Source URLs are written as plain text: hyperlinks are held in memory
+    # until the workbook closes, and Excel caps them at 65,530 per sheet.
+    # xlsxwriter is imported here so JSON-only processes never load it.
+    import xlsxwriter
+
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True, 'strings_to_urls': False})
+
+    leads = workbook.add_worksheet('Leads')
+    summary = workbook.add_worksheet('Summary')
+    metadata = workbook.add_worksheet('Metadata')
+
+    # Same look as the sheets pandas used to write
+    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    leads_header_format = workbook.add_format({'bold': True, 'bg_color': '#D3D3D3', 'border': 1})
+
+    leads.set_column('A:A', 15)  # Contact Type
+    leads.set_column('B:B', 40)  # Value
+    leads.set_column('C:C', 30)  # Name
+    leads.set_column('D:D', 40)  # Job Title
+    leads.set_column('E:E', 60)  # Source URL
+    leads.write_row(0, 0, RESULT_COLUMNS, leads_header_format)
+
+    counts = ContactCounts()
+    row_number = 0
+    for row_number, row in enumerate(counts.count(rows), start=1):
+        leads.write_row(row_number, 0, row)
+    leads.autofilter(0, 0, row_number, len(RESULT_COLUMNS) - 1)
+
+    summary.write_row(0, 0, ['Type', 'Count'], header_format)
+    summary_rows = [
+        ('Emails', counts.by_type['Email']),
+        ('Phone Numbers', counts.by_type['Phone']),
+        ('LinkedIn Profiles', counts.by_type['LinkedIn']),
+        ('Total', counts.total)
+    ]
+    for row_number, row in enumerate(summary_rows, start=1):
+        summary.write_row(row_number, 0, row)
+
+    metadata.write_row(0, 0, ['Property', 'Value'], header_format)
+    metadata_rows = [
+        ('URL Scraped', url),
+        ('Pages Crawled', pages_crawled),
+        ('Duration (seconds)', f"{duration:.2f}"),
+        ('Date Scraped', time.strftime('%Y-%m-%d %H:%M:%S'))
+    ]
+    for row_number, row in enumerate(metadata_rows, start=1):
+        metadata.write_row(row_number, 0, row)
+
+    workbook.close()
+    output.seek(0)
+    return output
+
+
+def iter_csv(rows):
+    # CSV with a header row, yielded as UTF-8 chunks of STREAM_BATCH_ROWS rows
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(RESULT_COLUMNS)
+    for batch in _batches(rows, STREAM_BATCH_ROWS):
+        writer.writerows(batch)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def iter_ndjson(rows):
+    # One JSON object per row, yielded in chunks of STREAM_BATCH_ROWS rows
+    for batch in _batches(rows, STREAM_BATCH_ROWS):
+        yield ''.join(json.dumps(dict(zip(RESULT_COLUMNS, row))) + '\n' for row in batch).encode('utf-8')
+
+
+def export_parquet(rows):
+    # Parquet with one string column per result column, written a row group
+    # at a time. Needs pyarrow, which is optional.
+    check_format('parquet')
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(column, pa.string()) for column in RESULT_COLUMNS])
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    with pq.ParquetWriter(output, schema) as writer:
+        for batch in _batches(rows, PARQUET_BATCH_ROWS):
+            columns = [pa.array(column, type=pa.string()) for column in zip(*batch)]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+    output.seek(0)
+    return output
+
+
+def export_results(fmt, rows, url='', pages_crawled=0, duration=0.0):
+    # Export rows in one of EXPORT_FORMATS. Returns (body, mimetype), where
+    # body is a file object (xlsx, parquet) or an iterator of byte chunks
+    # (csv, ndjson) that can be streamed to a response as it is produced.
+    if fmt == 'xlsx':
+        body = export_xlsx(rows, url, pages_crawled, duration)
+    elif fmt == 'csv':
+        body = iter_csv(rows)
+    elif fmt == 'ndjson':
+        body = iter_ndjson(rows)
+    elif fmt == 'parquet':
+        body = export_parquet(rows)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return body, EXPORT_FORMATS[fmt]
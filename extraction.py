@@ -0,0 +1,111 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+import phonenumbers
+
+
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+
+PHONE_PATTERNS = [
+    re.compile(r'(?:\+\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b'),
+    re.compile(r'\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b'),
+    re.compile(r'\b\+\d{1,3}\s?\d{3,14}\b'),
+]
+
+LINKEDIN_TEXT_PATTERN = re.compile(r'linkedin\.com/(?:in|company)/[\w-]+', re.I)
+
+TITLE_PATTERN = re.compile(
+    r'\b(?:CEO|CTO|CFO|COO|Director|Manager|VP|Vice President|President|Founder|Owner|Partner|Senior|Lead|Chief|Head|Principal)'
+    r'\s+(?:\w+\s+)*'
+    r'(?:Engineer|Developer|Designer|Architect|Consultant|Advisor|Analyst|Officer|Manager|Director)\b'
+)
+
+# The PHONE_PATTERNS alternatives in one regex, so each text is scanned once
+# and overlapping spellings of one number yield a single candidate. The
+# lookahead lets the regex engine reject most positions with one class test.
+PHONE_PATTERN = re.compile(r'(?=[+(\d])(?:' + '|'.join(p.pattern for p in PHONE_PATTERNS) + ')')
+
+PHONE_CLEAN_PATTERN = re.compile(r'[^\d+]')
+
+LINKEDIN_SLUG_PATTERN = re.compile(r'linkedin\.com/in/([\w-]+)')
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# One alternation over the identifier kinds so a page's text is scanned once.
+# LinkedIn and email come first so digits inside URLs and addresses are not
+# reported again as phone numbers. Emails can only start after a
+# non-alphanumeric character, so the leading guard skips the middle of words
+# unless a phone or LinkedIn match could start there.
+CONTACT_SCAN_PATTERN = re.compile(
+    r'(?:(?<![A-Za-z0-9])|(?=[+(\dlL]))(?:'
+    + '|'.join([
+        r'(?P<linkedin>(?i:linkedin\.com/(?:in|company)/[\w-]+))',
+        f"(?P<email>{EMAIL_PATTERN.pattern})",
+        f"(?P<phone>{PHONE_PATTERN.pattern})",
+    ])
+    + ')'
+)
+
+# Titles are matched in a pass of their own: their word chain may run across
+# lines and digits, and in the alternation above it would swallow a phone
+# number written between two titles ("Managing Partner 415 555 1234 Sales
+# Director"). Same matches as TITLE_PATTERN; the lookahead rejects most
+# positions with one class test.
+TITLE_SCAN_PATTERN = re.compile(r'\b(?=[CDMVPFOSLH])' + TITLE_PATTERN.pattern[2:])
+
+ContactMatch = namedtuple('ContactMatch', ['kind', 'value', 'start', 'end'])
+
+
+def scan_contacts(text, titles=True):
+    # Scan text and yield typed, position-tagged matches; phone values are
+    # raw candidates that still need validation. Titles come after the other
+    # kinds, from their own pass, unless titles is off.
+    for match in CONTACT_SCAN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'linkedin':
+            value = value.lower()
+        yield ContactMatch(kind, value, match.start(), match.end())
+    if titles:
+        for match in TITLE_SCAN_PATTERN.finditer(text):
+            yield ContactMatch('title', match.group(), match.start(), match.end())
+
+
+def group_matches(matches):
+    # Split scanner output into per-kind value lists, keeping text order
+    grouped = {'email': [], 'phone': [], 'linkedin': [], 'title': []}
+    for match in matches:
+        grouped[match.kind].append(match.value)
+    return grouped
+
+
+@lru_cache(maxsize=8192)
+def _validate_phone_digits(digits, region):
+    try:
+        if region:
+            phone_obj = phonenumbers.parse(digits, region)
+        else:
+            phone_obj = phonenumbers.parse(digits)
+
+        if phonenumbers.is_valid_number(phone_obj):
+            return phonenumbers.format_number(phone_obj, phonenumbers.PhoneNumberFormat.INTERNATIONAL)
+        return None
+    except phonenumbers.NumberParseException:
+        if len(digits) >= 10:
+            return digits
+        return None
+
+
+def validate_phone(number, region=None):
+    # Validate one raw phone candidate and return it in international format,
+    # or None. Results are memoized on (normalized digits, region) for the
+    # whole process, so header and footer numbers are checked once.
+    digits = PHONE_CLEAN_PATTERN.sub('', number)
+    if digits.startswith('+'):
+        region = None
+    return _validate_phone_digits(digits, region)
+
+
+def phone_cache_info():
+    return _validate_phone_digits.cache_info()
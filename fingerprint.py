@@ -0,0 +1,109 @@
+import re
+import zlib
+
+WORD_PATTERN = re.compile(r'\w+')
+
+SIGNATURE_BITS = 64
+SIGNATURE_MASK = (1 << SIGNATURE_BITS) - 1
+
+# Odd 64-bit multipliers: the first three spread the 32-bit hashes of a
+# shingle's words over 64 bits, the last remixes the sampled shingles
+SHINGLE_MIXERS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9)
+SAMPLE_MIXER = 0xD6E8FEB86659FD93
+
+# Pages whose signatures differ in at most this many bits are near-duplicates
+NEAR_DUPLICATE_DISTANCE = 3
+
+# Pages with fewer distinct shingles than this get no signature: there is
+# too little text for the comparison to mean anything
+MIN_SHINGLES = 8
+
+# Only the shingles with the smallest hashes vote; the sample depends on the
+# content alone, so near-duplicate pages still draw nearly the same one
+MAX_SHINGLES = 256
+
+
+def simhash(text):
+    # 64-bit SimHash of the text's three-word shingles, or None for very
+    # short text. Each sampled shingle votes on every bit with its hash, and
+    # a bit is set when most of them have it set. Words are hashed with
+    # CRC32 rather than hash() so signatures do not change between runs.
+    word_hashes = {}
+    hashes = []
+    for word in WORD_PATTERN.findall(text.lower()):
+        value = word_hashes.get(word)
+        if value is None:
+            value = word_hashes[word] = zlib.crc32(word.encode('utf-8'))
+        hashes.append(value)
+
+    first, second, third = SHINGLE_MIXERS
+    shingles = {(a * first ^ b * second ^ c * third) & SIGNATURE_MASK
+                for a, b, c in zip(hashes, hashes[1:], hashes[2:])}
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    if len(shingles) > MAX_SHINGLES:
+        # The smallest values all start with zero bits; remix before voting
+        shingles = [(shingle * SAMPLE_MIXER) & SIGNATURE_MASK for shingle in sorted(shingles)[:MAX_SHINGLES]]
+
+    # Count the set bits column by column, most significant bit first
+    bit_strings = [format(shingle, '064b') for shingle in shingles]
+    half = len(bit_strings) / 2
+    signature = 0
+    for column in zip(*bit_strings):
+        signature = (signature << 1) | (column.count('1') > half)
+    return signature
+
+
+def hamming_distance(a, b):
+    # Number of bits that differ between two signatures
+    return bin(a ^ b).count('1')
+
+
+class PageFingerprints:
+    # Content fingerprints of the pages seen in one crawl: exact body hashes
+    # and SimHash signatures of their text. Signatures are indexed by bands:
+    # split into max_distance + 1 slices, two signatures within max_distance
+    # bits agree exactly on at least one slice, so only the pages sharing a
+    # slice with a new signature are compared with it.
+    def __init__(self, max_distance=NEAR_DUPLICATE_DISTANCE):
+        self.max_distance = max_distance
+        self.digests = {}
+        self.signatures = []
+        band_count = min(max_distance + 1, SIGNATURE_BITS)
+        self.band_bits = -(-SIGNATURE_BITS // band_count)
+        self.band_mask = (1 << self.band_bits) - 1
+        self.bands = [{} for _ in range(band_count)]
+
+    def exact_duplicate(self, digest, url):
+        # The URL of an earlier page with the same body, or None (and the
+        # page is recorded)
+        original = self.digests.get(digest)
+        if original is None:
+            self.digests[digest] = url
+        return original
+
+    def band_keys(self, signature):
+        shift = self.band_bits
+        mask = self.band_mask
+        return [(signature >> (shift * index)) & mask for index in range(len(self.bands))]
+
+    def near_duplicate(self, signature, url):
+        # The URL of the earliest page whose signature is within max_distance
+        # bits, or None; the page's signature is recorded either way
+        if signature is None:
+            return None
+        keys = self.band_keys(signature)
+        match = None
+        for band, key in zip(self.bands, keys):
+            for index in band.get(key, ()):
+                if match is not None and index >= match:
+                    break
+                if hamming_distance(signature, self.signatures[index][0]) <= self.max_distance:
+                    match = index
+                    break
+
+        index = len(self.signatures)
+        self.signatures.append((signature, url))
+        for band, key in zip(self.bands, keys):
+            band.setdefault(key, []).append(index)
+        return None if match is None else self.signatures[match][1]
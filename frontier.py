@@ -0,0 +1,140 @@
+import heapq
+import re
+from functools import lru_cache
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+TRACKING_PARAMS = frozenset([
+    'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid',
+    '_ga', '_gl', '_hsenc', '_hsmi', 'igshid', 'ref_src'
+])
+
+
+# Links to these are never fetched: they cannot be parsed for contacts
+BINARY_EXTENSIONS = frozenset([
+    '.pdf', '.zip', '.gz', '.tgz', '.tar', '.bz2', '.xz', '.rar', '.7z',
+    '.exe', '.msi', '.dmg', '.pkg', '.deb', '.rpm', '.apk', '.iso', '.bin',
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico', '.bmp', '.tif', '.tiff', '.heic',
+    '.mp3', '.wav', '.ogg', '.m4a', '.flac', '.mp4', '.m4v', '.mov', '.avi', '.mkv', '.webm', '.wmv', '.flv',
+    '.woff', '.woff2', '.ttf', '.otf', '.eot', '.css', '.js', '.map',
+    '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.odt', '.ods', '.csv', '.json', '.rss'
+])
+
+
+def is_binary_url(url):
+    # True when the URL path ends in a known non-HTML file extension
+    path = urlsplit(url).path
+    dot = path.rfind('.')
+    if dot == -1 or '/' in path[dot:]:
+        return False
+    return path[dot:].lower() in BINARY_EXTENSIONS
+
+
+DIGITS_PATTERN = re.compile(r'\d+')
+
+
+def url_template(url):
+    # Group URLs that are probably rendered from the same template: the
+    # directory of the path with digits generalized (so /blog/page/2 and
+    # /blog/page/3, or /tag/a and /tag/b, match) plus the query parameter
+    # names. Top-level pages (/about, /team) keep their whole path.
+    parts = urlsplit(canonicalize_url(url))
+    path = parts.path.rstrip('/')
+    directory = path.rpartition('/')[0]
+    names = sorted({name for name, _ in parse_qsl(parts.query, keep_blank_values=True)})
+    template = parts.netloc + DIGITS_PATTERN.sub('0', directory + '/*' if directory else path or '/')
+    return template + '?' + '&'.join(names) if names else template
+
+
+def is_tracking_param(name):
+    name = name.lower()
+    return name.startswith('utm_') or name in TRACKING_PARAMS
+
+
+def canonicalize_netloc(scheme, netloc):
+    # Lowercase the host and drop the port when it is the scheme default
+    scheme = scheme.lower()
+    userinfo, _, hostport = netloc.rpartition('@')
+    host, _, port = hostport.partition(':')
+    if hostport.startswith('['):
+        host, _, port = hostport.partition(']')
+        host += ']'
+        port = port.lstrip(':')
+    host = host.lower().rstrip('.')
+    if port and (not port.isdigit() or int(port) == DEFAULT_PORTS.get(scheme)):
+        port = ''
+    netloc = f"{host}:{port}" if port else host
+    return f"{userinfo}@{netloc}" if userinfo else netloc
+
+
+@lru_cache(maxsize=65536)
+def canonicalize_url(url):
+    # Normalize a URL so that trivially different spellings of the same page
+    # (case, default ports, trailing slashes, fragments, tracking params)
+    # deduplicate to a single frontier entry. This is a key for comparing
+    # URLs only: pages are fetched by the URL as it was linked, since the
+    # server may treat /team and /team/ differently and relative links on
+    # the page resolve against the latter.
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = canonicalize_netloc(scheme, parts.netloc)
+
+    path = parts.path or '/'
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/') or '/'
+
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not is_tracking_param(k)]
+    query.sort()
+
+    return urlunsplit((scheme, netloc, path, urlencode(query), ''))
+
+
+class CrawlFrontier:
+    # Priority queue of URLs to crawl plus a hash set of the canonical form of
+    # every URL ever queued. Lower priority values are popped first; ties keep
+    # insertion order. URLs come back out as they were pushed.
+    def __init__(self):
+        self._heap = []
+        self._counter = 0
+        self.seen = set()
+
+    def push(self, url, priority=0, depth=0):
+        # Queue a URL unless one with the same canonical form was already
+        # seen; returns True if queued
+        key = canonicalize_url(url)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        heapq.heappush(self._heap, (priority, self._counter, url, depth))
+        self._counter += 1
+        return True
+
+    def pop(self, rescore=None):
+        # Remove and return the best (url, depth) pair. With rescore(url,
+        # depth), an entry whose score has risen since it was queued goes
+        # back in at its new score instead; scores may only rise.
+        while True:
+            entry = heapq.heappop(self._heap)
+            priority, counter, url, depth = entry
+            if rescore is not None and self._heap:
+                current = rescore(url, depth)
+                if current > priority:
+                    heapq.heappush(self._heap, (current, counter, url, depth))
+                    continue
+            return url, depth
+
+    def mark_seen(self, url):
+        # Never queue this URL (or another spelling of it)
+        self.seen.add(canonicalize_url(url))
+
+    def __contains__(self, url):
+        return canonicalize_url(url) in self.seen
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __bool__(self):
+        return bool(self._heap)
@@ -0,0 +1,175 @@
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ChunkedEncodingError, ConnectionError, ContentDecodingError
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError
+from urllib3.response import HTTPResponse
+
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+def get_shared_session(pool_size=32):
+    # Return the process-wide pooled session so keep-alive connections are
+    # reused across pages and across scrapes of the same host
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _shared_session = session
+        return _shared_session
+
+
+def iter_body(response, chunk_size=64 * 1024):
+    # Yield a streamed body in pieces as they arrive (up to chunk_size each),
+    # raising the same errors iter_content does. iter_content itself waits
+    # until a whole chunk is in, so callers could not notice a deadline or a
+    # cancellation while a server drips bytes; urllib3 before 2.0 has no
+    # read1, and there it is the fallback.
+    raw = response.raw
+    if not (isinstance(raw, HTTPResponse) and hasattr(raw, 'read1')):
+        yield from response.iter_content(chunk_size=chunk_size)
+        return
+    try:
+        while True:
+            chunk = raw.read1(chunk_size, decode_content=True)
+            if not chunk:
+                return
+            yield chunk
+    except ProtocolError as e:
+        raise ChunkedEncodingError(e)
+    except DecodeError as e:
+        raise ContentDecodingError(e)
+    except ReadTimeoutError as e:
+        raise ConnectionError(e)
+
+
+def decode_body(body, encoding=None):
+    # Decode a body in the charset the server declared, falling back to
+    # UTF-8 when it names one Python does not know; bad bytes are replaced
+    # either way, so a page is never lost to its encoding
+    try:
+        return body.decode(encoding or 'utf-8', errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+
+class CachedResponse:
+    __slots__ = ('url', 'text', 'etag', 'last_modified', 'content_type')
+
+    def __init__(self, url, text, etag, last_modified, content_type):
+        self.url = url
+        self.text = text
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_type = content_type
+
+    def conditional_headers(self):
+        # Validators to send so the server can answer 304 Not Modified
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    # Persistent SQLite store of page bodies keyed by URL. Only responses that
+    # carry an ETag or Last-Modified validator are kept, since those are the
+    # ones a repeat scrape can revalidate. Least recently used entries are
+    # evicted once the stored bodies exceed max_bytes.
+    def __init__(self, path, max_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                content_type TEXT,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)')
+        self._conn.commit()
+
+    def lookup(self, url):
+        # Return the cached response for a URL, or None
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT body, etag, last_modified, content_type FROM responses WHERE url = ?',
+                (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return CachedResponse(url, *row)
+
+    def mark_hit(self, url):
+        # Record that a cached body was revalidated by a 304
+        self.hits += 1
+        with self._lock:
+            self._conn.execute('UPDATE responses SET last_access = ? WHERE url = ?', (time.time(), url))
+            self._conn.commit()
+
+    def store(self, url, response, text=None):
+        # Save a 200 response if it can be revalidated later; text is the
+        # decoded body when the response was streamed
+        self.misses += 1
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        body = response.text if text is None else text
+        size = len(body.encode('utf-8', errors='replace'))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses '
+                '(url, body, etag, last_modified, content_type, size, last_access) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, body, etag, last_modified, response.headers.get('Content-Type'), size, time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute('SELECT url, size FROM responses ORDER BY last_access').fetchall()
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute('DELETE FROM responses WHERE url = ?', (url,))
+            total -= size
+
+    def total_bytes(self):
+        with self._lock:
+            return self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
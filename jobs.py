@@ -0,0 +1,197 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from result_cache import ScrapeResult
+from scraper import GeneralizedLeadGenScraper
+
+logger = logging.getLogger(__name__)
+
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class ScrapeJob:
+    # One scrape request tracked from submission to its final results
+    def __init__(self, url, max_pages=15, delay=1.0, concurrency=1, fresh=False, scraper_options=None):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.max_pages = max_pages
+        self.delay = delay
+        self.concurrency = concurrency
+        self.fresh = fresh
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.result_source = None
+        self.error = None
+        self.progress = None
+        self.cancel_event = threading.Event()
+        self.done = threading.Event()
+        self.scraper = GeneralizedLeadGenScraper(
+            max_pages=max_pages, delay=delay, cancel_event=self.cancel_event,
+            **(scraper_options or {})
+        )
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    @property
+    def results(self):
+        return None if self.result is None else self.result.results
+
+    @property
+    def duration(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def to_dict(self):
+        # Status document returned by the job endpoints
+        scraper = self.scraper
+        return {
+            'job_id': self.id,
+            'url': self.url,
+            'status': self.status,
+            'progress': self.progress if scraper is None else scraper.progress(),
+            'created_at': self.created_at,
+            'duration_seconds': round(self.duration, 2),
+            'results_count': None if self.results is None else len(self.results),
+            'result_cache': self.result_source,
+            'error': self.error
+        }
+
+    def run_scrape(self):
+        # Crawl the site with this job's own scraper; a cancelled crawl
+        # yields an incomplete result that is never shared
+        start_time = time.time()
+        results = self.scraper.scrape(self.url, concurrency=self.concurrency)
+        return ScrapeResult(results, len(self.scraper.visited_urls), time.time() - start_time,
+                            self.scraper.metrics, complete=not self.cancel_event.is_set())
+
+    def finish(self, status):
+        # Settle the job and let go of its scraper, with the visited set and
+        # leads it still holds; a finished job keeps only its status, final
+        # progress and result for as long as it is retained
+        progress = self.scraper.progress()
+        if self.result is not None:
+            progress['pages_visited'] = self.result.pages_crawled
+        self.progress = progress
+        self.scraper = None
+        self.finished_at = time.time()
+        self.status = status
+        self.done.set()
+
+
+class JobManager:
+    # Runs scrape jobs on a bounded worker pool. At most max_pending jobs may
+    # be queued or running at once; finished jobs are kept for result_ttl
+    # seconds so clients can collect their results. With a result cache
+    # (a ScrapeResultCache), jobs share finished and running scrapes with
+    # identical jobs and synchronous requests instead of crawling again.
+    def __init__(self, max_workers=4, max_pending=200, result_ttl=3600, scraper_options=None,
+                 result_cache=None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.scraper_options = scraper_options or {}
+        self.result_cache = result_cache
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scrape-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def pending_count(self):
+        with self._lock:
+            self._prune()
+            return sum(1 for job in self._jobs.values() if not job.finished)
+
+    def submit(self, url, max_pages=15, delay=1.0, concurrency=1, fresh=False):
+        # Queue a scrape and return its job immediately; fresh skips a
+        # cached result, as for a synchronous scrape
+        with self._lock:
+            self._prune()
+            pending = sum(1 for job in self._jobs.values() if not job.finished)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"Too many pending jobs ({pending}); try again later")
+
+            job = ScrapeJob(url, max_pages=max_pages, delay=delay, concurrency=concurrency,
+                            fresh=fresh, scraper_options=self.scraper_options)
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job)
+        logger.info(f"Queued job {job.id} for {url}")
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        # Ask a job to stop; queued jobs never start, running ones stop after
+        # their current page and keep the contacts found so far
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel_event.set()
+        with self._lock:
+            if job.status == QUEUED:
+                job.finish(CANCELLED)
+        return job
+
+    def _run(self, job):
+        with self._lock:
+            if job.status != QUEUED:
+                return
+            job.status = RUNNING
+            job.started_at = time.time()
+
+        try:
+            if self.result_cache is None:
+                job.result, job.result_source = job.run_scrape(), 'miss'
+            else:
+                key = self.result_cache.key(job.url, job.max_pages, job.delay)
+                job.result, job.result_source = self.result_cache.get_or_run(
+                    key, job.run_scrape, fresh=job.fresh, cancel_event=job.cancel_event
+                )
+                if job.result_source in ('hit', 'shared'):
+                    logger.info(f"Job {job.id} served {job.url} from the result cache ({job.result_source})")
+            status = CANCELLED if job.cancel_event.is_set() else DONE
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}")
+            job.error = str(e)
+            status = FAILED
+
+        with self._lock:
+            job.finish(status)
+
+    def _prune(self):
+        # Drop finished jobs whose results have outlived result_ttl
+        cutoff = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel_event.set()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,147 @@
+CONTACT_TYPES = [('email', 'Email'), ('phone', 'Phone'), ('linkedin', 'LinkedIn')]
+
+RESULT_COLUMNS = ['Contact Type', 'Value', 'Name', 'Job Title', 'Source URL']
+
+
+class Contact:
+    # One associated contact found on a page: any of email/phone/linkedin with
+    # the name and title it was found next to. Slotted, as a crawl creates
+    # one per raw hit.
+    __slots__ = ('name', 'email', 'phone', 'linkedin', 'title', 'source')
+
+    def __init__(self, name=None, email=None, phone=None, linkedin=None, title=None, source=None):
+        self.name = name
+        self.email = email
+        self.phone = phone
+        self.linkedin = linkedin
+        self.title = title
+        self.source = source
+
+    def __repr__(self):
+        fields = ', '.join(f"{field}={getattr(self, field)!r}" for field in self.__slots__
+                           if getattr(self, field) is not None)
+        return f"Contact({fields})"
+
+
+class LeadTable:
+    # The leads of a finished scrape as plain columns, one list per
+    # RESULT_COLUMNS entry. The scraper returns this rather than a DataFrame
+    # so crawling never needs pandas; to_dataframe() converts on request.
+    # people holds the merged person records of the scrape (see entities).
+    __slots__ = ('columns', 'people')
+
+    def __init__(self, columns=None, people=None):
+        self.columns = columns if columns is not None else {name: [] for name in RESULT_COLUMNS}
+        self.people = people if people is not None else []
+
+    def __len__(self):
+        return len(self.columns[RESULT_COLUMNS[0]])
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    def rows(self):
+        # Rows as tuples in RESULT_COLUMNS order, produced lazily
+        return zip(*(self.columns[name] for name in RESULT_COLUMNS))
+
+    def records(self):
+        # Rows as dicts keyed by column name
+        return [dict(zip(RESULT_COLUMNS, row)) for row in self.rows()]
+
+    def to_dataframe(self):
+        # A pandas DataFrame of the leads; pandas is imported only here
+        import pandas as pd
+        return pd.DataFrame(self.columns, columns=RESULT_COLUMNS)
+
+
+def contact_rows(contact):
+    # Expand one associated contact into a result row per contact type
+    for key, contact_type in CONTACT_TYPES:
+        value = getattr(contact, key)
+        if value:
+            yield {
+                'Contact Type': contact_type,
+                'Value': value,
+                'Name': contact.name or '',
+                'Job Title': contact.title or '',
+                'Source URL': contact.source
+            }
+
+
+class LeadIndex:
+    # Unique leads of a scrape, deduplicated on (Contact Type, Value) as pages
+    # are parsed and kept column by column, so memory grows with the number
+    # of distinct leads rather than with every repeated hit.
+    #
+    # Every row remembers the position it was found at (page order, then its
+    # place on the page). When the same lead turns up again the earlier
+    # position wins, which keeps results identical whether pages were parsed
+    # in crawl order or as concurrent fetches completed.
+    def __init__(self):
+        self._slots = {}
+        self.types = []
+        self.values = []
+        self.names = []
+        self.titles = []
+        self.sources = []
+        self._positions = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def __contains__(self, key):
+        return key in self._slots
+
+    def add(self, contacts, order=0):
+        # Index the contacts of one page; returns how many leads were new
+        added = 0
+        position = 0
+        for contact in contacts:
+            for key, contact_type in CONTACT_TYPES:
+                value = getattr(contact, key)
+                if not value:
+                    continue
+                rank = (order, position)
+                position += 1
+
+                slot = self._slots.get((contact_type, value))
+                if slot is None:
+                    self._slots[(contact_type, value)] = len(self.values)
+                    self.types.append(contact_type)
+                    self.values.append(value)
+                    self.names.append(contact.name or '')
+                    self.titles.append(contact.title or '')
+                    self.sources.append(contact.source)
+                    self._positions.append(rank)
+                    added += 1
+                elif rank < self._positions[slot]:
+                    self.names[slot] = contact.name or ''
+                    self.titles[slot] = contact.title or ''
+                    self.sources[slot] = contact.source
+                    self._positions[slot] = rank
+        return added
+
+    def counts(self):
+        # Number of unique leads per contact type
+        counts = {contact_type: 0 for _, contact_type in CONTACT_TYPES}
+        for contact_type in self.types:
+            counts[contact_type] += 1
+        return counts
+
+    def to_table(self):
+        # Build the result table straight from the columns, sorted by contact
+        # type and name with ties kept in discovery order
+        order = sorted(range(len(self.values)),
+                       key=lambda i: (self.types[i], self.names[i], self._positions[i]))
+        columns = (self.types, self.values, self.names, self.titles, self.sources)
+        return LeadTable({
+            name: [column[i] for i in order]
+            for name, column in zip(RESULT_COLUMNS, columns)
+        })
+
+    def to_dataframe(self):
+        return self.to_table().to_dataframe()
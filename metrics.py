@@ -0,0 +1,158 @@
+import cProfile
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ScrapeMetrics:
+    # Per-scrape stage timings and counters. Stages accumulate wall time and a
+    # call count; counters are plain integers and gauges hold the last value
+    # set. Safe to update from the fetch threads of the asyncio crawl.
+    def __init__(self):
+        self.timings = {}
+        self.calls = {}
+        self.counters = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+            self.calls[stage] = self.calls.get(stage, 0) + 1
+
+    def incr(self, counter, amount=1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def set(self, gauge, value):
+        with self._lock:
+            self.gauges[gauge] = value
+
+    def merge(self, timings, calls, counters):
+        # Fold in a snapshot() taken elsewhere, e.g. in an extraction worker
+        with self._lock:
+            for stage, seconds in timings.items():
+                self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+            for stage, count in calls.items():
+                self.calls[stage] = self.calls.get(stage, 0) + count
+            for counter, value in counters.items():
+                self.counters[counter] = self.counters.get(counter, 0) + value
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.timings), dict(self.calls), dict(self.counters)
+
+    def to_dict(self):
+        timings, calls, counters = self.snapshot()
+        with self._lock:
+            gauges = {gauge: round(value, 4) for gauge, value in self.gauges.items()}
+        return {
+            'timings': {stage: round(seconds, 4) for stage, seconds in timings.items()},
+            'calls': calls,
+            'counters': counters,
+            'gauges': gauges
+        }
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsRegistry:
+    # Process-wide totals of every finished scrape, rendered in the Prometheus
+    # text exposition format. Gauges are read from callbacks at render time.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stage_seconds = {}
+        self._stage_calls = {}
+        self._counters = {}
+        self._scrapes = {}
+        self._scrape_seconds = 0.0
+        self._gauges = {}
+
+    def record_scrape(self, metrics, duration, status='ok'):
+        timings, calls, counters = metrics.snapshot()
+        with self._lock:
+            for stage, seconds in timings.items():
+                self._stage_seconds[stage] = self._stage_seconds.get(stage, 0.0) + seconds
+            for stage, count in calls.items():
+                self._stage_calls[stage] = self._stage_calls.get(stage, 0) + count
+            for counter, value in counters.items():
+                self._counters[counter] = self._counters.get(counter, 0) + value
+            self._scrapes[status] = self._scrapes.get(status, 0) + 1
+            self._scrape_seconds += duration
+
+    def register_gauge(self, name, help_text, callback):
+        with self._lock:
+            self._gauges[name] = (help_text, callback)
+
+    def render(self):
+        # Prometheus text format (version 0.0.4)
+        with self._lock:
+            stage_seconds = dict(self._stage_seconds)
+            stage_calls = dict(self._stage_calls)
+            counters = dict(self._counters)
+            scrapes = dict(self._scrapes)
+            scrape_seconds = self._scrape_seconds
+            gauges = dict(self._gauges)
+
+        lines = [
+            '# HELP leadgen_scrapes_total Finished scrapes by outcome.',
+            '# TYPE leadgen_scrapes_total counter',
+        ]
+        lines += [f'leadgen_scrapes_total{{status="{_escape_label(status)}"}} {count}'
+                  for status, count in sorted(scrapes.items())]
+        lines += [
+            '# HELP leadgen_scrape_duration_seconds_total Wall time spent in finished scrapes.',
+            '# TYPE leadgen_scrape_duration_seconds_total counter',
+            f'leadgen_scrape_duration_seconds_total {scrape_seconds:.6f}',
+            '# HELP leadgen_stage_seconds_total Time spent per scrape stage.',
+            '# TYPE leadgen_stage_seconds_total counter',
+        ]
+        lines += [f'leadgen_stage_seconds_total{{stage="{_escape_label(stage)}"}} {seconds:.6f}'
+                  for stage, seconds in sorted(stage_seconds.items())]
+        lines += [
+            '# HELP leadgen_stage_calls_total Number of times each scrape stage ran.',
+            '# TYPE leadgen_stage_calls_total counter',
+        ]
+        lines += [f'leadgen_stage_calls_total{{stage="{_escape_label(stage)}"}} {calls}'
+                  for stage, calls in sorted(stage_calls.items())]
+        for counter, value in sorted(counters.items()):
+            lines += [
+                f'# TYPE leadgen_{counter}_total counter',
+                f'leadgen_{counter}_total {value}',
+            ]
+        for name, (help_text, callback) in sorted(gauges.items()):
+            lines += [
+                f'# HELP {name} {help_text}',
+                f'# TYPE {name} gauge',
+                f'{name} {callback()}',
+            ]
+        return '\n'.join(lines) + '\n'
+
+
+@contextmanager
+def profiled(path):
+    # Profile the enclosed block with cProfile and dump the stats to `path`
+    # (readable with pstats or snakeviz). Only the calling thread is
+    # profiled, so fetch threads of the asyncio crawl show up as waits.
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,77 @@
+import re
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+PERSON_ITEMTYPE_PATTERN = re.compile(r'schema.org/Person')
+CARD_CLASS_PATTERN = re.compile(r'team|member|staff|person|profile|card', re.I)
+PROFILE_CLASS_PATTERN = re.compile(r'team|member|staff|person|profile|card|contact', re.I)
+NAME_CANDIDATE_TAGS = frozenset(['h1', 'h2', 'h3', 'h4', 'strong', 'span', 'div'])
+
+
+def resolve_parser(parser=None):
+    # Pick the BeautifulSoup tree builder, falling back when lxml is missing
+    if parser == 'lxml' and not LXML_AVAILABLE:
+        return 'html.parser'
+    return parser or 'html.parser'
+
+
+def _class_matches(tag, pattern):
+    classes = tag.get('class')
+    if not classes:
+        return False
+    if isinstance(classes, str):
+        classes = [classes]
+    return any(pattern.search(cls) for cls in classes)
+
+
+class Page:
+    # A fetched page parsed exactly once. The tree is walked a single time to
+    # collect everything the extractors and the link extractor need. Links
+    # resolve against base_url, the URL the page was served from after any
+    # redirects, which defaults to url.
+    def __init__(self, url, html, parser=None, base_url=None):
+        self.url = url
+        self.base_url = base_url or url
+        self.soup = BeautifulSoup(html, resolve_parser(parser))
+        self._text = None
+
+        self.anchors = []
+        self.person_elements = []
+        self.name_candidates = []
+        self.profile_elements = []
+        self.cards = []
+
+        for tag in self.soup.find_all(True):
+            if tag.name == 'a' and tag.get('href') is not None:
+                self.anchors.append(tag)
+            if tag.name in NAME_CANDIDATE_TAGS:
+                self.name_candidates.append(tag)
+
+            itemtype = tag.get('itemtype')
+            if itemtype and PERSON_ITEMTYPE_PATTERN.search(itemtype):
+                self.person_elements.append(tag)
+
+            if _class_matches(tag, PROFILE_CLASS_PATTERN):
+                self.profile_elements.append(tag)
+                if _class_matches(tag, CARD_CLASS_PATTERN):
+                    self.cards.append(tag)
+
+    @property
+    def text(self):
+        # Full page text, computed on first use and reused by every extractor
+        if self._text is None:
+            self._text = self.soup.get_text()
+        return self._text
+
+    def links(self):
+        # Yield (raw href, absolute URL) for every anchor on the page
+        for a in self.anchors:
+            href = a['href']
+            yield href, urljoin(self.base_url, href)
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from leads import Contact
+from metrics import ScrapeMetrics
+
+logger = logging.getLogger(__name__)
+
+# Characters of fetched HTML per crawl that may wait for or be under
+# extraction before fetching pauses; fetches already in flight still land, so
+# the peak can exceed it by up to one page per concurrent fetch
+PIPELINE_QUEUE_BYTES = 16 * 1024 * 1024
+
+# One process pool per worker count, shared by every pipelined crawl in the
+# process so workers are not forked again for each scrape
+_executors = {}
+_executors_lock = threading.Lock()
+
+# The scraper each worker process extracts with, one per parser
+_worker_scrapers = {}
+
+
+def get_extraction_executor(workers):
+    with _executors_lock:
+        executor = _executors.get(workers)
+        if executor is None:
+            executor = _executors[workers] = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(logging.getLogger().level,)
+            )
+        return executor
+
+
+def discard_extraction_executor(executor):
+    # Forget a pool whose worker died, so the next crawl starts a fresh one
+    with _executors_lock:
+        for workers, cached in list(_executors.items()):
+            if cached is executor:
+                del _executors[workers]
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _init_worker(log_level):
+    logging.getLogger().setLevel(log_level)
+
+
+def pack_contacts(contacts):
+    # Contacts as plain tuples, which pickle far smaller than slotted objects
+    return [tuple(getattr(contact, field) for field in Contact.__slots__) for contact in contacts]
+
+
+def unpack_contacts(rows):
+    return [Contact(*row) for row in rows]
+
+
+def extract_page(parser, domain, url, html, country, base_url=None):
+    # Run in a worker process: the CPU-bound part of processing a page
+    # (parsing, contact extraction, link extraction and the SimHash
+    # signature). Returns compact, picklable results and the stage timings.
+    scraper = _worker_scrapers.get(parser)
+    if scraper is None:
+        from scraper import GeneralizedLeadGenScraper
+        scraper = _worker_scrapers[parser] = GeneralizedLeadGenScraper(parser=parser)
+
+    scraper.domain = domain
+    scraper.metrics = ScrapeMetrics()
+    contacts, links, signature = scraper.extract_page(url, html, country, base_url)
+    return pack_contacts(contacts), links, signature, scraper.metrics.snapshot()
+
+
+class ExtractionPool:
+    # The extraction stage of a pipelined crawl. Fetched pages are put on a
+    # queue and handed to worker processes, at most one page per worker at a
+    # time; the rest wait here, so the HTML held in memory is what is queued
+    # plus what the workers are extracting. full() is the backpressure signal
+    # the crawl checks before starting another fetch.
+    def __init__(self, workers=None, parser='html.parser', max_queued_bytes=PIPELINE_QUEUE_BYTES):
+        self.workers = workers or os.cpu_count() or 1
+        self.parser = parser
+        self.max_queued_bytes = max_queued_bytes
+        self.queued_bytes = 0
+        self.peak_bytes = 0
+        self.running = {}
+        self._queue = deque()
+        self._executor = get_extraction_executor(self.workers)
+
+    def __len__(self):
+        return len(self._queue) + len(self.running)
+
+    def full(self):
+        return self.queued_bytes >= self.max_queued_bytes
+
+    def put(self, key, domain, url, html, country, base_url=None):
+        # Queue a page for extraction; key comes back with its result
+        self._queue.append((key, (self.parser, domain, url, html, country, base_url), len(html)))
+        self.queued_bytes += len(html)
+        self.peak_bytes = max(self.peak_bytes, self.queued_bytes)
+        self._start()
+
+    def _start(self):
+        loop = asyncio.get_running_loop()
+        while self._queue and len(self.running) < self.workers:
+            key, args, size = self._queue.popleft()
+            future = loop.run_in_executor(self._executor, extract_page, *args)
+            self.running[future] = (key, args[2], size)
+
+    def collect(self, future):
+        # (key, (contacts, links, signature, metrics snapshot)) for a finished
+        # extraction from self.running, or (key, None) if extracting the page
+        # failed. Only a broken pool is raised: one bad page must not end the
+        # crawl, but a dead worker leaves nothing to extract the rest with.
+        key, url, size = self.running.pop(future)
+        self.queued_bytes -= size
+        try:
+            packed, links, signature, snapshot = future.result()
+        except BrokenProcessPool:
+            discard_extraction_executor(self._executor)
+            raise
+        except Exception as e:
+            logger.warning(f"Extracting {url} failed: {e!r}")
+            self._start()
+            return key, None
+        self._start()
+        return key, (unpack_contacts(packed), links, signature, snapshot)
@@ -0,0 +1,122 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from frontier import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeResult:
+    # A finished scrape as served to clients: the leads table and the
+    # numbers reported alongside it. Shared between requests, so read-only.
+    # A scrape that was cancelled part way is not complete: it is returned
+    # to the request that ran it but never cached or shared.
+    __slots__ = ('results', 'pages_crawled', 'duration', 'metrics', 'complete', 'finished_at')
+
+    def __init__(self, results, pages_crawled, duration, metrics=None, complete=True):
+        self.results = results
+        self.pages_crawled = pages_crawled
+        self.duration = duration
+        self.metrics = metrics
+        self.complete = complete
+        self.finished_at = time.time()
+
+
+class _InFlight:
+    # A scrape that is running for one request while others wait on it
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ScrapeResultCache:
+    # Finished scrape results keyed by canonical URL and crawl parameters,
+    # kept for `ttl` seconds with least-recently-used eviction beyond
+    # max_entries. Identical requests that arrive while a scrape is running
+    # wait for it instead of starting their own crawl of the same site.
+    # A ttl of 0 keeps nothing but still coalesces concurrent requests.
+    def __init__(self, ttl=600, max_entries=128):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url, max_pages, delay):
+        return canonicalize_url(url), int(max_pages), float(delay)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _lookup(self, key):
+        result = self._entries.get(key)
+        if result is None:
+            return None
+        if time.time() - result.finished_at >= self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def _store(self, key, result):
+        if self.ttl <= 0 or self.max_entries <= 0 or not result.complete:
+            return
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_or_run(self, key, run, fresh=False, cancel_event=None):
+        # Return (ScrapeResult, source), where source is 'hit' for a cached
+        # result, 'shared' for one waited on from an identical running
+        # request, or 'miss' when run() was called here. fresh skips the
+        # cached result, but still joins a scrape that is already running.
+        # Errors are passed to every waiter and are never cached. A waiter
+        # whose leader was cancelled starts over, and one whose own
+        # cancel_event is set stops waiting and gets (None, 'cancelled').
+        while True:
+            with self._lock:
+                if not fresh:
+                    result = self._lookup(key)
+                    if result is not None:
+                        return result, 'hit'
+                flight = self._in_flight.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._in_flight[key] = _InFlight()
+
+            if leader:
+                break
+
+            logger.info(f"Waiting for the running scrape of {key[0]}")
+            while not flight.done.wait(0.5):
+                if cancel_event is not None and cancel_event.is_set():
+                    return None, 'cancelled'
+            if flight.error is not None:
+                raise flight.error
+            if flight.result.complete:
+                return flight.result, 'shared'
+
+        try:
+            flight.result = run()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+                if flight.error is None:
+                    self._store(key, flight.result)
+            flight.done.set()
+        return flight.result, 'miss'
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
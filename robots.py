@@ -0,0 +1,224 @@
+import logging
+import math
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+from xml.etree import ElementTree
+
+from requests.exceptions import RequestException
+
+from http_cache import iter_body
+from scheduler import parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+# Token matched against robots.txt User-agent lines; sites rarely name us, so
+# in practice the '*' rules apply
+ROBOTS_USER_AGENT = 'LeadGenScraper'
+
+MAX_ROBOTS_BYTES = 512 * 1024
+MAX_SITEMAP_BYTES = 16 * 1024 * 1024
+MAX_SITEMAP_DOCUMENTS = 10
+MAX_SITEMAP_URLS = 50000
+
+POLICY_TTL = 3600
+
+# Policies kept in memory at once, least recently used dropped first; a
+# policy can hold up to MAX_SITEMAP_URLS URLs
+MAX_CACHED_POLICIES = 64
+
+# Longest one robots.txt or sitemap download may take; what arrived by then
+# is used
+MAX_FETCH_SECONDS = 30
+
+# urllib.robotparser only understands whole-second Crawl-delay values
+CRAWL_DELAY_PATTERN = re.compile(r'^(\s*crawl-delay\s*:\s*)(\d*\.\d+)', re.IGNORECASE)
+
+_policies = OrderedDict()
+_policies_lock = threading.Lock()
+
+
+def _read_limited(response, limit, cancel_event=None):
+    # Read at most limit bytes, stopping early after MAX_FETCH_SECONDS or
+    # once cancel_event is set
+    deadline = time.monotonic() + MAX_FETCH_SECONDS
+    chunks = []
+    size = 0
+    for chunk in iter_body(response):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= limit or time.monotonic() > deadline or (cancel_event is not None and cancel_event.is_set()):
+            break
+    return b''.join(chunks)[:limit]
+
+
+def _gunzip(data, limit):
+    # Sitemaps may be served as .xml.gz files; inflate at most `limit` bytes
+    if not data.startswith(b'\x1f\x8b'):
+        return data
+    try:
+        return zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(data, limit)
+    except zlib.error:
+        return b''
+
+
+def _robots_lines(text):
+    # Round fractional Crawl-delay values up so they are honoured rather than
+    # ignored by the parser
+    return [CRAWL_DELAY_PATTERN.sub(lambda m: m.group(1) + str(math.ceil(float(m.group(2)))), line)
+            for line in text.splitlines()]
+
+
+def _same_site(url, base_url):
+    # Whether url is on base_url's host, or a parent or subdomain of it
+    # (www.example.com, example.com and blog.example.com are one site)
+    host = (urlsplit(url).hostname or '').lower()
+    site = (urlsplit(base_url).hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if site.startswith('www.'):
+        site = site[4:]
+    return bool(host) and (host == site or host.endswith('.' + site) or site.endswith('.' + host))
+
+
+def _sitemap_locations(data):
+    # Return (is_index, [loc, ...]) for a sitemap or sitemap index document
+    try:
+        root = ElementTree.fromstring(data)
+    except ElementTree.ParseError:
+        return False, []
+    is_index = root.tag.endswith('sitemapindex')
+    locations = [elem.text.strip() for elem in root.iter() if elem.tag.endswith('loc') and elem.text]
+    return is_index, locations
+
+
+class SitePolicy:
+    # What a site says about crawling it: the robots.txt rules, its
+    # Crawl-delay and the page URLs listed in its sitemaps
+    def __init__(self, base_url, robots=None, sitemap_urls=None):
+        self.base_url = base_url
+        self.robots = robots
+        self.sitemap_urls = sitemap_urls or []
+        self.fetched_at = time.time()
+
+    def can_fetch(self, url):
+        if self.robots is None:
+            return True
+        return self.robots.can_fetch(ROBOTS_USER_AGENT, url)
+
+    @property
+    def crawl_delay(self):
+        if self.robots is None:
+            return None
+        delay = self.robots.crawl_delay(ROBOTS_USER_AGENT)
+        if delay is None:
+            rate = self.robots.request_rate(ROBOTS_USER_AGENT)
+            if rate is not None and rate.requests:
+                delay = rate.seconds / rate.requests
+        return float(delay) if delay is not None else None
+
+
+def _fetch(session, url, headers, limit, cancel_event=None, rate=None):
+    # GET a small resource; returns (status code, body) or (None, b'') on
+    # error. With a HostRateController the request waits for the host's next
+    # slot and its outcome adjusts the host's delay, like a page fetch.
+    host = urlsplit(url).netloc
+    if rate is not None:
+        wait = rate.reserve(host)
+        if wait > 0:
+            if cancel_event is not None:
+                if cancel_event.wait(wait):
+                    return None, b''
+            else:
+                time.sleep(wait)
+
+    start = time.perf_counter()
+    try:
+        with session.get(url, headers=headers, timeout=10, stream=True) as response:
+            status = response.status_code
+            if rate is not None:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                rate.record(host, time.perf_counter() - start, status, retry_after)
+            if status != 200:
+                return status, b''
+            return 200, _read_limited(response, limit, cancel_event)
+    except RequestException as e:
+        if rate is not None:
+            rate.record(host)
+        logger.warning(f"Could not fetch {url}: {e}")
+        return None, b''
+
+
+def load_site_policy(base_url, session, headers=None, sitemaps=True, cancel_event=None, rate=None):
+    # Fetch robots.txt and, if wanted, the sitemaps it lists (or
+    # /sitemap.xml), following sitemap indexes on the same site up to
+    # MAX_SITEMAP_DOCUMENTS. Requests are paced by rate when one is given.
+    # Returns None if cancel_event is set before the policy is complete.
+    robots_url = urljoin(base_url, '/robots.txt')
+    status, body = _fetch(session, robots_url, headers, MAX_ROBOTS_BYTES, cancel_event, rate)
+    if cancel_event is not None and cancel_event.is_set():
+        return None
+
+    robots = RobotFileParser(robots_url)
+    if status in (401, 403):
+        robots.disallow_all = True
+    elif status == 200:
+        robots.parse(_robots_lines(body.decode('utf-8', errors='replace')))
+    else:
+        robots.allow_all = True
+
+    sitemap_urls = []
+    if sitemaps:
+        pending = list(robots.site_maps() or []) or [urljoin(base_url, '/sitemap.xml')]
+        fetched = set()
+        while pending and len(fetched) < MAX_SITEMAP_DOCUMENTS and len(sitemap_urls) < MAX_SITEMAP_URLS:
+            sitemap_url = pending.pop(0)
+            if sitemap_url in fetched:
+                continue
+            fetched.add(sitemap_url)
+
+            status, body = _fetch(session, sitemap_url, headers, MAX_SITEMAP_BYTES, cancel_event, rate)
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            if status != 200:
+                continue
+            is_index, locations = _sitemap_locations(_gunzip(body, MAX_SITEMAP_BYTES))
+            if is_index:
+                pending.extend(location for location in locations if _same_site(location, base_url))
+            else:
+                sitemap_urls.extend(locations[:MAX_SITEMAP_URLS - len(sitemap_urls)])
+
+    logger.info(f"Loaded site policy for {base_url}: {len(sitemap_urls)} sitemap URLs")
+    return SitePolicy(base_url, robots, sitemap_urls)
+
+
+def get_site_policy(url, session, headers=None, sitemaps=True, cancel_event=None, rate=None):
+    # The site policy for url's host, loaded once and shared by every scrape
+    # in this process for POLICY_TTL seconds (at most MAX_CACHED_POLICIES of
+    # them); None if cancel_event is set while it loads
+    parts = urlsplit(url)
+    base_url = f"{parts.scheme}://{parts.netloc}/"
+    key = (base_url, sitemaps)
+
+    with _policies_lock:
+        policy = _policies.get(key)
+        if policy is not None and time.time() - policy.fetched_at < POLICY_TTL:
+            _policies.move_to_end(key)
+            return policy
+
+    policy = load_site_policy(base_url, session, headers, sitemaps, cancel_event, rate)
+    if policy is None:
+        return None
+    with _policies_lock:
+        cutoff = time.time() - POLICY_TTL
+        for expired in [cached_key for cached_key, cached in _policies.items() if cached.fetched_at <= cutoff]:
+            del _policies[expired]
+        _policies[key] = policy
+        _policies.move_to_end(key)
+        while len(_policies) > MAX_CACHED_POLICIES:
+            _policies.popitem(last=False)
+    return policy
@@ -0,0 +1,196 @@
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+# Bounds for the adaptive delay between request starts on one host; the
+# first backoff from a delay below BACKOFF_DELAY jumps straight to it
+MAX_DELAY = 60.0
+BACKOFF_DELAY = 1.0
+MAX_RETRY_AFTER = 120.0
+
+# Requests per second added to a host's rate after each healthy response,
+# and the factors its delay is multiplied by after a throttling response
+# (429/503), after any other failure, and after an unusually slow response
+RATE_STEP = 0.2
+THROTTLE_BACKOFF = 2.0
+ERROR_BACKOFF = 1.5
+SLOW_BACKOFF = 1.25
+# Responses slower than this multiple of the host's average latency (and
+# slower than SLOW_RESPONSE seconds) count as a sign the host is struggling
+SLOW_FACTOR = 2.0
+SLOW_RESPONSE = 0.5
+LATENCY_SMOOTHING = 0.3
+
+THROTTLE_STATUSES = frozenset([429, 503])
+
+
+def parse_retry_after(value):
+    # Seconds to wait from a Retry-After header (delta-seconds or HTTP date)
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+class _HostRate:
+    __slots__ = ('delay', 'last_start', 'hold_until', 'latency')
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.last_start = None
+        self.hold_until = 0.0
+        self.latency = None
+
+
+class HostRateController:
+    # Per-host AIMD pacing of request starts. Each healthy response raises the
+    # host's request rate by RATE_STEP (down to min_delay between requests);
+    # slow responses, errors and 429/503 responses cut it multiplicatively,
+    # and a Retry-After header holds the host back for as long as it asks.
+    # Thread-safe: slots are reserved from the event loop and outcomes are
+    # recorded from fetch threads.
+    clock = staticmethod(time.monotonic)
+    # Whether reserve() may block (on shared storage), so the event loop
+    # must call it from a thread
+    blocking = False
+
+    def __init__(self, delay=1, min_delay=None, max_delay=MAX_DELAY):
+        self.delay = delay
+        self.min_delay = delay if min_delay is None else min(min_delay, delay)
+        self.max_delay = max(max_delay, delay)
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostRate(self.delay)
+        return state
+
+    def reserve(self, host):
+        # Claim the host's next request slot, `delay` after the previous one;
+        # returns the seconds to wait for it
+        with self._lock:
+            return self._reserve(self._host(host))
+
+    def record(self, host, latency=None, status=None, retry_after=None):
+        # Adjust the host's delay after a response (latency in seconds to the
+        # headers, HTTP status) or a failed request (no status)
+        with self._lock:
+            self._record(self._host(host), latency, status, retry_after)
+
+    def delay_for(self, host):
+        with self._lock:
+            state = self._hosts.get(host)
+            return state.delay if state is not None else self.delay
+
+    def raise_floor(self, min_delay):
+        # Never start requests less than min_delay apart from now on (a
+        # robots.txt Crawl-delay learned after pacing began)
+        with self._lock:
+            self.delay = max(self.delay, min_delay)
+            self.min_delay = max(self.min_delay, min_delay)
+            self.max_delay = max(self.max_delay, min_delay)
+            for state in self._hosts.values():
+                state.delay = max(state.delay, min_delay)
+
+    def _reserve(self, state):
+        now = self.clock()
+        slot = max(now, state.hold_until)
+        if state.last_start is not None:
+            slot = max(slot, state.last_start + state.delay)
+        state.last_start = slot
+        return slot - now
+
+    def _record(self, state, latency, status, retry_after):
+        if status is None or status >= 500 or status in THROTTLE_STATUSES:
+            factor = THROTTLE_BACKOFF if status in THROTTLE_STATUSES else ERROR_BACKOFF
+            state.delay = min(self.max_delay, max(state.delay * factor, BACKOFF_DELAY))
+            if retry_after is not None:
+                hold = self.clock() + min(retry_after, MAX_RETRY_AFTER)
+                state.hold_until = max(state.hold_until, hold)
+            return
+
+        average = state.latency
+        state.latency = latency if average is None else (
+            LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * average
+        )
+        if average is not None and latency > SLOW_RESPONSE and latency > SLOW_FACTOR * average:
+            state.delay = min(self.max_delay, max(state.delay, self.min_delay) * SLOW_BACKOFF)
+        elif state.delay > self.min_delay:
+            # Additive increase of the rate 1/delay
+            state.delay = max(self.min_delay, state.delay / (1 + RATE_STEP * state.delay))
+
+
+class SharedHostRateController(HostRateController):
+    # HostRateController whose per-host state lives in a crawl coordinator
+    # (see coordination.py), so every node crawling a host reserves slots
+    # from one schedule and adapts one delay: adding nodes never makes the
+    # host see more requests than a single node would send it. Times are
+    # wall-clock seconds, as they are compared across processes.
+    clock = staticmethod(time.time)
+    blocking = True
+
+    def __init__(self, coordinator, delay=1, min_delay=None, max_delay=MAX_DELAY):
+        super().__init__(delay, min_delay=min_delay, max_delay=max_delay)
+        self.coordinator = coordinator
+
+    def _shared(self, host, func):
+        # Run func(state) on the host's shared state in one transaction
+        def update(row):
+            state = _HostRate(self.delay)
+            if row is not None:
+                state.delay, state.last_start, state.hold_until, state.latency = row
+                state.delay = min(self.max_delay, max(self.min_delay, state.delay))
+            result = func(state)
+            return (state.delay, state.last_start, state.hold_until, state.latency), result
+        return self.coordinator.update_host(host, update)
+
+    def reserve(self, host):
+        return self._shared(host, self._reserve)
+
+    def record(self, host, latency=None, status=None, retry_after=None):
+        self._shared(host, lambda state: self._record(state, latency, status, retry_after))
+
+    def delay_for(self, host):
+        return self._shared(host, lambda state: state.delay)
+
+
+class HostScheduler:
+    # Per-host politeness for the asyncio crawl: caps in-flight fetches per host
+    # and waits for each host's next request slot from a HostRateController
+    # without blocking other hosts
+    def __init__(self, delay=1, concurrency=4, rate=None):
+        self.rate = rate if rate is not None else HostRateController(delay)
+        self.concurrency = max(1, int(concurrency))
+        self._semaphores = {}
+
+    async def acquire(self, host):
+        # Wait for a free fetch slot on the host, then for its next start time;
+        # returns the seconds spent waiting on the politeness delay. A caller
+        # cancelled while it waits gives the slot back.
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.concurrency)
+        await semaphore.acquire()
+        try:
+            if self.rate.blocking:
+                wait = await asyncio.get_running_loop().run_in_executor(None, self.rate.reserve, host)
+            else:
+                wait = self.rate.reserve(host)
+            if wait > 0:
+                await asyncio.sleep(wait)
+        except BaseException:
+            semaphore.release()
+            raise
+        return wait
+
+    def release(self, host):
+        self._semaphores[host].release()
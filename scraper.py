@@ -1,12 +1,29 @@
-import requests
-from bs4 import BeautifulSoup
 import re
-import pandas as pd
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urldefrag, urlparse
 import logging
 import time
-from requests.exceptions import RequestException
-import phonenumbers
+import asyncio
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.exceptions import ChunkedEncodingError, ConnectionError, HTTPError, RequestException, Timeout
+from scheduler import HostRateController, HostScheduler, SharedHostRateController, parse_retry_after
+from page import Page
+from frontier import CrawlFrontier, canonicalize_url, is_binary_url, url_template
+from fingerprint import PageFingerprints, simhash
+from pipeline import PIPELINE_QUEUE_BYTES, ExtractionPool
+from coordination import LEASE_SECONDS, POLL_INTERVAL, default_worker_id
+from http_cache import decode_body, get_shared_session, iter_body
+from crawl_store import content_hash
+from robots import get_site_policy
+from metrics import ScrapeMetrics, REGISTRY
+from leads import Contact, LeadIndex
+from entities import PersonIndex, name_from_email, name_from_linkedin
+from cards import find_contact_cards
+from extraction import (
+    EMAIL_PATTERN, PHONE_PATTERN, LINKEDIN_TEXT_PATTERN, TITLE_PATTERN, WHITESPACE_PATTERN, scan_contacts, group_matches,
+    validate_phone
+)
 
 # Configure logging
 logging.basicConfig(
@@ -15,63 +32,323 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+COUNTRY_BY_TLD = {
+    'us': 'US', 'uk': 'GB', 'ca': 'CA', 'au': 'AU',
+    'de': 'DE', 'fr': 'FR', 'in': 'IN'
+}
+
+HTML_CONTENT_TYPES = frozenset(['text/html', 'application/xhtml+xml'])
+
+# Types that misconfigured servers send for HTML; the body is sniffed instead
+AMBIGUOUS_CONTENT_TYPES = frozenset(['', 'application/octet-stream', 'text/plain'])
+
+FETCH_CHUNK_SIZE = 64 * 1024
+
+# Longest a page body may take to download. The read timeout only bounds the
+# wait for each piece, so a server dripping bytes could otherwise hold a
+# fetch open indefinitely; a slower body is cut off like an oversized one.
+MAX_BODY_SECONDS = 30
+
+# Responses that are worth retrying: throttling and transient server errors
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+RETRY_BACKOFF = 0.5
+
+# Added to the frontier score of URLs sharing a template with pages that
+# turned out to be (near-)duplicates without new leads, once per such page up
+# to MAX_TEMPLATE_STRIKES times
+NEAR_DUPLICATE_PENALTY = 5
+MAX_TEMPLATE_STRIKES = 4
+
+# How far below the configured delay the adaptive pacing may go on a host
+# that keeps answering quickly
+MIN_DELAY_FACTOR = 0.25
+
+HIGH_VALUE_URL_PATTERN = re.compile('|'.join([
+    r'/contact', r'/about', r'/team', r'/staff', r'/people',
+    r'/leadership', r'/management', r'/directory', r'/faculty',
+    r'/meet', r'/our-team', r'/who-we-are', r'/employees'
+]))
+
 
 class GeneralizedLeadGenScraper:
-    def __init__(self, max_pages=15, delay=1):
-        # Initialize the scraper with configuration settings
+    def __init__(self, max_pages=15, delay=1, parser='html.parser', cache=None, session=None,
+                 cancel_event=None, max_page_bytes=2 * 1024 * 1024, max_total_bytes=64 * 1024 * 1024,
+                 store=None, respect_robots=True, use_sitemaps=True, max_retries=2, adaptive_delay=True,
+                 extract_workers=0, max_queued_bytes=PIPELINE_QUEUE_BYTES, coordinator=None, worker_id=None):
+        # Initialize the scraper with configuration settings; parser='lxml'
+        # selects the faster tree builder when lxml is installed, an optional
+        # ResponseCache revalidates previously fetched pages, and setting
+        # cancel_event (a threading.Event) stops the crawl after the current page.
+        # Page bodies are cut off at max_page_bytes, and the crawl stops once
+        # max_total_bytes have been downloaded (None disables either cap).
+        # With a CrawlStore, interrupted scrapes resume where they stopped and
+        # re-scrapes reuse the contacts of pages whose content is unchanged.
+        # robots.txt rules and Crawl-delay are obeyed unless respect_robots is
+        # off, and high-value pages listed in the site's sitemaps are queued
+        # up front unless use_sitemaps is off. delay is where the per-host
+        # pacing starts: with adaptive_delay it speeds up to a quarter of it
+        # on hosts that answer quickly and backs off on slow or throttling
+        # ones. Transient failures are retried up to max_retries times.
+        # extract_workers > 0 pipelines the crawl: pages are parsed by that
+        # many worker processes while fetching goes on, and no new fetch
+        # starts while max_queued_bytes of HTML are waiting for them.
+        # With a CrawlCoordinator, scrapes are crawled together with every
+        # other node (named by worker_id) sharing it.
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         self.max_pages = max_pages
         self.delay = delay
         self.visited_urls = set()
-        self.all_contacts = []
+        self.leads = LeadIndex()
+        self.people = PersonIndex()
         self.domain = ""
         self.page_data = {}
+        self.fingerprints = PageFingerprints()
+        self.template_strikes = {}
+        self.parser = parser
+        self.cache = cache
+        self.session = session or get_shared_session()
+        self.cancel_event = cancel_event
+        self.max_page_bytes = max_page_bytes
+        self.max_total_bytes = max_total_bytes
+        self.store = store
+        self.crawl_state = None
+        self.respect_robots = respect_robots
+        self.use_sitemaps = use_sitemaps
+        self.site_policy = None
+        self.max_retries = max_retries
+        self.adaptive_delay = adaptive_delay
+        self.extract_workers = extract_workers
+        self.max_queued_bytes = max_queued_bytes
+        self.coordinator = coordinator
+        self.worker_id = worker_id or default_worker_id()
+        self.rate = HostRateController(delay)
+        self._crawl_started = None
+        self.bytes_downloaded = 0
+        self._bytes_lock = threading.Lock()
+        self.metrics = ScrapeMetrics()
+
+    def is_cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def is_allowed(self, url):
+        # Whether robots.txt lets us fetch the URL
+        if not self.respect_robots or self.site_policy is None:
+            return True
+        return self.site_policy.can_fetch(url)
+
+    def robots_delay(self):
+        # The site's robots.txt Crawl-delay, or 0 when it sets none
+        if self.respect_robots and self.site_policy is not None:
+            return self.site_policy.crawl_delay or 0
+        return 0
+
+    def effective_delay(self):
+        # The configured delay, raised to the site's Crawl-delay if it asks for more
+        return max(self.delay, self.robots_delay())
 
-    def fetch(self, url):
-        # Fetch a URL with error handling and return the HTML content
+    def byte_budget_exhausted(self):
+        return self.max_total_bytes is not None and self.bytes_downloaded >= self.max_total_bytes
+
+    def progress(self):
+        # Snapshot of crawl progress that is safe to read from another thread
+        return {
+            'pages_visited': len(self.visited_urls),
+            'max_pages': self.max_pages
+        }
+
+    def fetch(self, url, paced=False):
+        # Fetch a URL with error handling and return (HTML content, the URL
+        # it was served from after redirects), or (None, url). Each attempt
+        # waits for the host's next slot from the rate controller
+        # (the first one only unless the caller already did, paced=True), and
+        # connection errors, timeouts, 429s and 5xx responses are retried up
+        # to max_retries times after a jittered exponential backoff.
+        host = urlparse(url).netloc
+        for attempt in range(self.max_retries + 1):
+            if self.byte_budget_exhausted():
+                return None, url
+            if (attempt or not paced) and not self.wait_for_slot(host, attempt):
+                return None, url
+            
+            try:
+                return self.fetch_once(url, host)
+            except RequestException as e:
+                retry = attempt < self.max_retries and self.is_transient(e)
+                if retry:
+                    self.metrics.incr('retries')
+                    logger.warning(f"Retrying {url} after error: {e}")
+                else:
+                    self.metrics.incr('fetch_errors')
+                    logger.error(f"Error fetching {url}: {e}")
+                    return None, url
+        return None, url
+
+    def wait_for_slot(self, host, attempt=0):
+        # Block until the host's next request slot; a retry also waits out a
+        # jittered exponential backoff. Returns False if the crawl was
+        # cancelled while waiting.
+        wait = self.rate.reserve(host)
+        if attempt:
+            wait = max(wait, random.uniform(0, RETRY_BACKOFF * 2 ** attempt))
+        if wait > 0:
+            with self.metrics.time('politeness_sleep'):
+                if self.cancel_event is not None:
+                    return not self.cancel_event.wait(wait)
+                time.sleep(wait)
+        return not self.is_cancelled()
+
+    def is_transient(self, error):
+        # Whether a failed fetch may succeed if tried again
+        if isinstance(error, HTTPError):
+            return error.response is not None and error.response.status_code in RETRY_STATUSES
+        return isinstance(error, (ConnectionError, Timeout, ChunkedEncodingError))
+
+    def fetch_once(self, url, host):
+        # A single attempt at fetching a URL. The body is streamed: non-HTML
+        # responses are dropped after the headers and the download stops at
+        # the per-page and per-scrape byte caps. The fetch is timed in two
+        # parts, split at response.elapsed: waiting for the response headers
+        # (including DNS and connect on a new connection, summed over any
+        # redirects) and the body download. The outcome is reported
+        # to the rate controller; failures raise RequestException. Returns
+        # (text or None, final URL) like fetch.
+        metrics = self.metrics
+        logger.info(f"Fetching: {url}")
+        headers = self.headers
+        cached = self.cache.lookup(url) if self.cache else None
+        if cached:
+            headers = {**self.headers, **cached.conditional_headers()}
+        
         try:
-            logger.info(f"Fetching: {url}")
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.session.get(url, headers=headers, timeout=10, stream=True)
+        except RequestException:
+            self.rate.record(host)
+            raise
+        
+        with response:
+            latency = sum(hop.elapsed.total_seconds() for hop in (*response.history, response))
+            metrics.add('fetch_wait', latency)
+            metrics.incr('fetches')
+            
+            status = response.status_code
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            self.rate.record(host, latency, status, retry_after)
+            if status in RETRY_STATUSES:
+                metrics.incr('throttled' if status in (429, 503) else 'server_errors')
+            
+            if cached and status == 304:
+                metrics.incr('not_modified')
+                self.cache.mark_hit(url)
+                return cached.text, response.url
+            
             response.raise_for_status()
-            return response.text
-        except RequestException as e:
-            logger.error(f"Error fetching {url}: {e}")
-            return None
+            
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+            sniff = content_type in AMBIGUOUS_CONTENT_TYPES
+            if not sniff and content_type not in HTML_CONTENT_TYPES:
+                logger.info(f"Skipping {url}: content type {content_type}")
+                metrics.incr('skipped_content_type')
+                return None, url
+            
+            limit = self.max_page_bytes
+            if self.max_total_bytes is not None:
+                remaining = self.max_total_bytes - self.bytes_downloaded
+                limit = remaining if limit is None else min(limit, remaining)
+            
+            with metrics.time('fetch_download'):
+                body, truncated = self.read_body(response, limit, sniff, time.monotonic() + MAX_BODY_SECONDS)
+            if body is None and self.is_cancelled():
+                return None, url
+            if body is None:
+                logger.info(f"Skipping {url}: {content_type or 'untyped'} body is not HTML")
+                metrics.incr('skipped_content_type')
+                return None, url
+        
+        with self._bytes_lock:
+            self.bytes_downloaded += len(body)
+        metrics.incr('bytes_downloaded', len(body))
+        text = decode_body(body, response.encoding)
+        
+        if truncated:
+            logger.warning(f"Truncated {url} at {len(body)} bytes")
+            metrics.incr('truncated_pages')
+        elif self.cache:
+            self.cache.store(url, response, text)
+        return text, response.url
+
+    def read_body(self, response, limit=None, sniff=False, deadline=None):
+        # Read a streamed body up to `limit` bytes; returns (bytes, truncated).
+        # With sniff set, gives up with (None, False) when the first chunk
+        # does not look like markup. Cancellation and the deadline (a
+        # time.monotonic() value) are checked whenever data arrives: a
+        # cancelled crawl gives up with (None, False), and a body still
+        # arriving at the deadline is cut off there.
+        chunks = []
+        size = 0
+        for chunk in iter_body(response, FETCH_CHUNK_SIZE):
+            if self.is_cancelled():
+                return None, False
+            if sniff:
+                # Pieces can be small, so look past leading blanks in all of them
+                head = (b''.join(chunks) + chunk).lstrip(b'\xef\xbb\xbf \t\r\n')
+                if head and not head.startswith(b'<'):
+                    return None, False
+                sniff = not head
+            if limit is not None and size + len(chunk) > limit:
+                chunks.append(chunk[:limit - size])
+                return b''.join(chunks), True
+            chunks.append(chunk)
+            size += len(chunk)
+            if deadline is not None and time.monotonic() > deadline:
+                return b''.join(chunks), True
+        if sniff:
+            return None, False
+        return b''.join(chunks), False
 
     def is_valid_url(self, url):
         # Check if URL belongs to the same domain and is not already visited
-        parsed = urlparse(url)
-        return parsed.netloc == self.domain and url not in self.visited_urls
+        # (in any spelling)
+        key = canonicalize_url(url)
+        return urlparse(key).netloc == self.domain and key not in self.visited_urls
 
     def is_high_value_url(self, url):
         # Identify URLs that are likely to contain contact information
-        high_value_patterns = [
-            r'/contact', r'/about', r'/team', r'/staff', r'/people',
-            r'/leadership', r'/management', r'/directory', r'/faculty',
-            r'/meet', r'/our-team', r'/who-we-are', r'/employees'
-        ]
-        
-        url_lower = url.lower()
-        for pattern in high_value_patterns:
-            if re.search(pattern, url_lower):
-                return True
-        return False
-
-    def extract_urls(self, soup, base_url):
-        # Extract and prioritize URLs from a page, putting high-value URLs first
+        return HIGH_VALUE_URL_PATTERN.search(url.lower()) is not None
+
+    def url_priority(self, url, depth):
+        # Score a frontier URL; lower scores are crawled first, so high-value
+        # pages jump ahead of everything else and shallower pages come next
+        score = depth
+        if self.is_high_value_url(url):
+            score -= 10
+        if self.template_strikes:
+            strikes = self.template_strikes.get(url_template(url), 0)
+            score += NEAR_DUPLICATE_PENALTY * min(strikes, MAX_TEMPLATE_STRIKES)
+        return score
+
+    def strike_template(self, url):
+        # Deprioritize the URLs that look like a page that added nothing new
+        template = url_template(url)
+        self.template_strikes[template] = self.template_strikes.get(template, 0) + 1
+
+    def extract_urls(self, page, include_visited=False):
+        # Extract same-domain URLs (as linked, without fragments) from a page,
+        # putting high-value URLs first
         urls = []
         high_priority_urls = []
         
-        for a in soup.find_all('a', href=True):
-            href = a['href']
-            full_url = urljoin(base_url, href)
+        for href, full_url in page.links():
+            if not full_url.startswith(('http://', 'https://')):
+                continue
             
-            if not full_url.startswith(('http://', 'https://')) or '#' in full_url:
+            full_url = urldefrag(full_url)[0]
+            if is_binary_url(full_url):
                 continue
-                
-            if self.is_valid_url(full_url):
+            if include_visited and urlparse(canonicalize_url(full_url)).netloc != self.domain:
+                continue
+            if include_visited or self.is_valid_url(full_url):
                 if self.is_high_value_url(full_url):
                     high_priority_urls.append(full_url)
                 else:
@@ -83,13 +360,12 @@ class GeneralizedLeadGenScraper:
         # Remove extra whitespace and normalize text
         if not text:
             return ""
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = WHITESPACE_PATTERN.sub(' ', text).strip()
         return text
 
     def extract_emails(self, text):
         # Find and validate email addresses in text
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, text)
+        emails = EMAIL_PATTERN.findall(text)
         
         valid_emails = []
         for email in emails:
@@ -100,46 +376,28 @@ class GeneralizedLeadGenScraper:
 
     def extract_phone_numbers(self, text, country=None):
         # Extract and validate phone numbers from text
-        phone_patterns = [
-            r'(?:\+\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b',
-            r'\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b',
-            r'\b\+\d{1,3}\s?\d{3,14}\b',
-        ]
-        
-        potential_numbers = []
-        for pattern in phone_patterns:
-            potential_numbers.extend(re.findall(pattern, text))
-            
+        return self.validate_phone_numbers(PHONE_PATTERN.findall(text), country)
+
+    def validate_phone_numbers(self, candidates, country=None):
+        # Validate raw phone candidates and return them in international format
         validated_numbers = []
-        for number in potential_numbers:
-            cleaned = re.sub(r'[^\d+]', '', number)
-            
-            try:
-                if not cleaned.startswith('+') and country:
-                    phone_obj = phonenumbers.parse(cleaned, country)
-                else:
-                    phone_obj = phonenumbers.parse(cleaned)
-                
-                if phonenumbers.is_valid_number(phone_obj):
-                    formatted = phonenumbers.format_number(phone_obj, phonenumbers.PhoneNumberFormat.INTERNATIONAL)
-                    validated_numbers.append(formatted)
-            except:
-                if len(cleaned) >= 10:  
-                    validated_numbers.append(cleaned)
+        for number in candidates:
+            formatted = validate_phone(number, country)
+            if formatted:
+                validated_numbers.append(formatted)
                     
         return validated_numbers
 
-    def extract_names(self, soup):
+    def extract_names(self, page):
         # Identify potential person names from HTML using multiple heuristics
         names = []
         
-        person_elements = soup.find_all(itemtype=re.compile(r'schema.org/Person'))
-        for elem in person_elements:
+        for elem in page.person_elements:
             name_elem = elem.find(itemprop="name")
             if name_elem:
                 names.append(self.clean_text(name_elem.get_text()))
         
-        for elem in soup.find_all(['h1', 'h2', 'h3', 'h4', 'strong', 'span', 'div']):
+        for elem in page.name_candidates:
             text = self.clean_text(elem.get_text())
             if len(text) > 40 or len(text) < 4:
                 continue
@@ -151,7 +409,7 @@ class GeneralizedLeadGenScraper:
                     if not any(word.lower() in skip_words for word in words):
                         names.append(text)
         
-        for elem in soup.find_all(class_=re.compile(r'team|member|staff|person|profile|card|contact', re.I)):
+        for elem in page.profile_elements:
             header = elem.find(['h2', 'h3', 'h4', 'strong'])
             if header:
                 text = self.clean_text(header.get_text())
@@ -165,300 +423,672 @@ class GeneralizedLeadGenScraper:
                 
         return unique_names
 
-    def extract_linkedin_profiles(self, soup, base_url, text):
-        # Find LinkedIn profile URLs from both HTML links and text content
+    def extract_linkedin_profiles(self, page, text_matches=None):
+        # Find LinkedIn profile URLs from both HTML links and text content;
+        # text_matches lets parse_contacts pass in what the page scan found
         linkedin_links = []
         
-        for a in soup.find_all('a', href=True):
-            href = a['href'].lower()
+        for href, full_url in page.links():
+            href = href.lower()
             if 'linkedin.com/in/' in href or 'linkedin.com/company/' in href:
-                full_url = urljoin(base_url, a['href'])
                 linkedin_links.append(full_url)
         
-        linkedin_text_pattern = r'linkedin\.com/(?:in|company)/[\w-]+'
-        for match in re.findall(linkedin_text_pattern, text.lower()):
+        if text_matches is None:
+            text_matches = [match.lower() for match in LINKEDIN_TEXT_PATTERN.findall(page.text)]
+        for match in text_matches:
             linkedin_links.append(f"https://{match}")
         
         linkedin_links = list(set(linkedin_links))
         
         return linkedin_links
 
-    def extract_job_titles(self, soup, text):
+    def extract_job_titles(self, page, text_matches=None):
         # Extract job titles using patterns and structured data
         titles = []
         
-        title_pattern = r'\b(?:CEO|CTO|CFO|COO|Director|Manager|VP|Vice President|President|Founder|Owner|Partner|Senior|Lead|Chief|Head|Principal)\s+(?:\w+\s+)*(?:Engineer|Developer|Designer|Architect|Consultant|Advisor|Analyst|Officer|Manager|Director)\b'
-        
-        for elem in soup.find_all(itemtype=re.compile(r'schema.org/Person')):
+        for elem in page.person_elements:
             job_elem = elem.find(itemprop="jobTitle")
             if job_elem:
                 titles.append(self.clean_text(job_elem.get_text()))
         
-        for elem in soup.find_all(class_=re.compile(r'team|member|staff|person|profile|card', re.I)):
+        # A nested card's elements were already visited with its outermost card
+        outer_cards = set()
+        for elem in page.cards:
+            if any(id(parent) in outer_cards for parent in elem.parents):
+                continue
+            outer_cards.add(id(elem))
             for child in elem.find_all(['p', 'span', 'div']):
                 child_text = self.clean_text(child.get_text())
-                if re.search(title_pattern, child_text) and len(child_text) < 100:
+                if TITLE_PATTERN.search(child_text) and len(child_text) < 100:
                     titles.append(child_text)
         
-        for match in re.finditer(title_pattern, text):
-            titles.append(match.group(0))
+        if text_matches is None:
+            text_matches = TITLE_PATTERN.findall(page.text)
+        titles.extend(text_matches)
         
         titles = list(set(titles))
         
         return titles
 
-    def associate_contacts_with_context(self, soup, url, emails, phones, linkedin_profiles, names, titles):
+    def associate_contacts_with_context(self, page, emails, phones, linkedin_profiles, names, titles, country=None):
         # Connect contacts with their names, titles and other context
         contacts = []
+        url = page.url
+        claimed = set()
         
-        team_cards = soup.find_all(class_=re.compile(r'team|member|staff|person|profile|card', re.I))
+        for card in find_contact_cards(page, country):
+            contacts.append(Contact(
+                name=card.name, email=card.email, phone=card.phone,
+                linkedin=card.linkedin, title=card.title, source=url
+            ))
+            claimed.update((card.email, card.phone, card.linkedin))
         
-        for card in team_cards:
-            card_text = card.get_text()
-            card_email = None
-            card_phone = None
-            card_linkedin = None
-            card_name = None
-            card_title = None
-            
-            name_elem = card.find(['h2', 'h3', 'h4', 'strong'])
-            if name_elem:
-                card_name = self.clean_text(name_elem.get_text())
-                if len(card_name) > 40 or len(card_name.split()) > 4:
-                    card_name = None
-            
-            card_emails = self.extract_emails(card_text)
-            if card_emails:
-                card_email = card_emails[0]
-            
-            card_phones = self.extract_phone_numbers(card_text)
-            if card_phones:
-                card_phone = card_phones[0]
-            
-            for a in card.find_all('a', href=True):
-                if 'linkedin.com/in/' in a['href'].lower():
-                    card_linkedin = urljoin(url, a['href'])
-                    break
-            
-            title_pattern = r'\b(?:CEO|CTO|CFO|COO|Director|Manager|VP|Vice President|President|Founder|Owner|Partner|Senior|Lead|Chief|Head|Principal)\s+(?:\w+\s+)*(?:Engineer|Developer|Designer|Architect|Consultant|Advisor|Analyst|Officer|Manager|Director)\b'
-            for p in card.find_all(['p', 'span', 'div']):
-                p_text = self.clean_text(p.get_text())
-                if re.search(title_pattern, p_text) and len(p_text) < 100:
-                    card_title = p_text
-                    break
-            
-            if card_email or card_phone or card_linkedin:
-                contacts.append({
-                    'name': card_name,
-                    'email': card_email,
-                    'phone': card_phone,
-                    'linkedin': card_linkedin,
-                    'title': card_title,
-                    'source': url
-                })
-                
-                if card_email and card_email in emails:
-                    emails.remove(card_email)
-                if card_phone and card_phone in phones:
-                    phones.remove(card_phone)
-                if card_linkedin and card_linkedin in linkedin_profiles:
-                    linkedin_profiles.remove(card_linkedin)
+        # Whatever no card claimed is reported on its own
+        emails = [email for email in emails if email not in claimed]
+        phones = [phone for phone in phones if phone not in claimed]
+        linkedin_profiles = [linkedin for linkedin in linkedin_profiles if linkedin not in claimed]
         
         for email in emails:
-            name_guess = None
-            
-            email_name_part = email.split('@')[0]
-            if '.' in email_name_part:
-                parts = email_name_part.split('.')
-                if len(parts) == 2 and all(part.isalpha() for part in parts):
-                    name_guess = f"{parts[0].capitalize()} {parts[1].capitalize()}"
-            
-            contacts.append({
-                'name': name_guess,
-                'email': email,
-                'phone': None,
-                'linkedin': None,
-                'title': None,
-                'source': url
-            })
+            contacts.append(Contact(name=name_from_email(email), email=email, source=url))
         
         for phone in phones:
-            contacts.append({
-                'name': None,
-                'email': None,
-                'phone': phone,
-                'linkedin': None,
-                'title': None,
-                'source': url
-            })
+            contacts.append(Contact(phone=phone, source=url))
         
         for linkedin in linkedin_profiles:
-            name_guess = None
-            match = re.search(r'linkedin\.com/in/([\w-]+)', linkedin)
-            if match:
-                profile_id = match.group(1).replace('-', ' ').title()
-                if not any(word.lower() in ['page', 'profile', 'company', 'business'] for word in profile_id.split()):
-                    name_guess = profile_id
-            
-            contacts.append({
-                'name': name_guess,
-                'email': None,
-                'phone': None,
-                'linkedin': linkedin,
-                'title': None,
-                'source': url
-            })
+            contacts.append(Contact(name=name_from_linkedin(linkedin), linkedin=linkedin, source=url))
         
         return contacts
 
-    def parse_contacts(self, html, base_url):
-        # Extract all contact information from a page and associate related data
-        soup = BeautifulSoup(html, 'html.parser')
-        text = soup.get_text()
+    def parse_contacts(self, page, country=None):
+        # Extract all contact information from a parsed page and associate related
+        # data; country is the region hint for numbers written in national format
+        timed = self.metrics.time
+        
+        with timed('scan_text'):
+            matches = group_matches(scan_contacts(page.text))
         
-        emails = self.extract_emails(text)
-        phones = self.extract_phone_numbers(text)
-        names = self.extract_names(soup)
-        linkedin_links = self.extract_linkedin_profiles(soup, base_url, text)
-        titles = self.extract_job_titles(soup, text)
+        emails = matches['email']
+        with timed('validate_phones'):
+            phones = self.validate_phone_numbers(matches['phone'], country)
+        with timed('extract_names'):
+            names = self.extract_names(page)
+        with timed('extract_linkedin'):
+            linkedin_links = self.extract_linkedin_profiles(page, matches['linkedin'])
+        with timed('extract_titles'):
+            titles = self.extract_job_titles(page, matches['title'])
         
-        contacts = self.associate_contacts_with_context(
-            soup, base_url, emails, phones, linkedin_links, names, titles
-        )
+        with timed('associate_contacts'):
+            contacts = self.associate_contacts_with_context(
+                page, emails, phones, linkedin_links, names, titles, country
+            )
         
         logger.info(f"Found {len(emails)} emails, {len(phones)} phones, "
-                    f"{len(linkedin_links)} LinkedIn profiles on {base_url}")
+                    f"{len(linkedin_links)} LinkedIn profiles on {page.url}")
         
         return contacts
 
-    def crawl(self, url):
-        # Process a single URL, extract contacts, and find links to crawl next
-        html = self.fetch(url)
+    def crawl(self, url, country=None, depth=0):
+        # Process a single URL, extract contacts, and find links to crawl next;
+        # returns (links, contacts), or None if the page could not be fetched
+        html, final_url = self.fetch(url)
         if not html:
+            if self.crawl_state is not None and not self.is_cancelled():
+                self.store.discard(self.crawl_state, url)
             return None
         
-        self.visited_urls.add(url)
+        return self.process_page(url, html, country, depth=depth, base_url=final_url)
+
+    def process_page(self, url, html, country=None, order=None, depth=0, base_url=None):
+        # Parse a fetched page once, add its contacts to the lead index and
+        # return (outgoing links, contacts). order is the page's place in the
+        # crawl, which decides the winning row for leads seen on several pages;
+        # it defaults to the order pages are processed in. Links resolve
+        # against base_url, where the page was served from, if it redirected.
+        #
+        # A page whose body is identical to one already seen in this crawl is
+        # not parsed at all. A near-duplicate (by SimHash of its text) is
+        # parsed, but if it adds no new leads, URLs sharing its template are
+        # pushed back in the frontier.
+        if order is None:
+            order = len(self.page_data)
+        
+        digest, done = self.admit_page(url, html, order, depth)
+        if done is not None:
+            return done
+        
+        contacts, site_links, signature = self.extract_page(url, html, country, base_url)
+        return self.finish_page(url, digest, contacts, site_links, signature, order, depth)
+
+    def admit_page(self, url, html, order, depth):
+        # The cheap first stage of process_page: mark the page visited and
+        # hash it. Returns (digest, result), where result is process_page's
+        # return value when the page needs no extraction (an exact duplicate,
+        # or unchanged since the crawl store last saw it) and None otherwise.
+        self.visited_urls.add(canonicalize_url(url))
+        
+        digest = content_hash(html)
+        original = self.fingerprints.exact_duplicate(digest, url)
+        if original is not None:
+            return digest, self.skip_duplicate_page(url, original, digest, order, depth)
+        
+        if self.crawl_state is not None:
+            stored = self.store.lookup(self.crawl_state.start_url, url)
+            if stored is not None and stored.content_hash == digest:
+                self.metrics.incr('pages_unchanged')
+                return digest, self.finish_page(url, digest, stored.contacts, stored.links, None, order, depth)
         
-        contacts = self.parse_contacts(html, url)
+        return digest, None
+
+    def extract_page(self, url, html, country=None, base_url=None):
+        # The CPU-bound stage of process_page, which a pipelined crawl runs in
+        # worker processes: parse the page and return (contacts, same-site
+        # links including visited ones, SimHash signature of its text)
+        with self.metrics.time('parse_html'):
+            page = Page(url, html, parser=self.parser, base_url=base_url)
+        contacts = self.parse_contacts(page, country)
+        self.metrics.incr('pages_parsed')
+        with self.metrics.time('extract_links'):
+            site_links = self.extract_urls(page, include_visited=True)
+        with self.metrics.time('fingerprint'):
+            signature = simhash(page.text)
+        return contacts, site_links, signature
+
+    def finish_page(self, url, digest, contacts, site_links, signature, order, depth):
+        # The last stage of process_page: checkpoint the page, index its leads
+        # and strike its template if it is a near-duplicate that added nothing
+        if self.crawl_state is not None:
+            with self.metrics.time('checkpoint'):
+                self.store.record_page(self.crawl_state, url, digest, contacts, site_links, depth, order)
+        
+        near_original = self.fingerprints.near_duplicate(signature, url)
         
-        self.all_contacts.extend(contacts)
+        with self.metrics.time('index_leads'):
+            new_leads = self.leads.add(contacts, order)
+        with self.metrics.time('resolve_people'):
+            self.people.add(contacts, order, self.domain)
         
+        if near_original is not None and not new_leads:
+            logger.info(f"{url} is a near-duplicate of {near_original}")
+            self.metrics.incr('near_duplicate_pages')
+            self.strike_template(url)
+        
+        self.page_data[url] = {
+            'contacts': len(contacts),
+            'new_leads': new_leads,
+            'timestamp': time.time()
+        }
+        
+        return [link for link in site_links if canonicalize_url(link) not in self.visited_urls], contacts
+
+    def skip_duplicate_page(self, url, original, digest, order, depth):
+        # Record a page whose body matches an earlier page of this crawl
+        # without extracting anything from it; its links were queued already
+        logger.info(f"{url} is a duplicate of {original}")
+        self.metrics.incr('duplicate_pages')
+        self.strike_template(url)
+        if self.crawl_state is not None:
+            with self.metrics.time('checkpoint'):
+                self.store.record_page(self.crawl_state, url, digest, [], [], depth, order)
         self.page_data[url] = {
-            'contacts': contacts,
+            'contacts': 0,
+            'new_leads': 0,
+            'duplicate_of': original,
             'timestamp': time.time()
         }
+        return [], []
+
+    def enqueue_urls(self, frontier, urls, depth):
+        # Push newly discovered links onto the frontier with their priority
+        # score, mirroring them into the crawl store when there is one
+        queued = []
+        for url in urls:
+            if url in frontier:
+                continue
+            if not self.is_allowed(url):
+                # Remember it so the rules are checked once per URL
+                frontier.mark_seen(url)
+                self.metrics.incr('robots_blocked')
+                continue
+            priority = self.url_priority(url, depth)
+            if frontier.push(url, priority, depth):
+                queued.append((url, priority, depth))
+        
+        if queued and self.crawl_state is not None:
+            self.store.push(self.crawl_state, queued)
+
+    def start_frontier(self, start_url):
+        # Build the frontier for a crawl of start_url. With a crawl store, an
+        # unfinished pass is restored: its visited pages, their leads and the
+        # URLs that were still queued.
+        frontier = CrawlFrontier()
+        self.load_site_policy(start_url)
+        self.crawl_state = self.store.begin(canonicalize_url(start_url)) if self.store is not None else None
         
-        soup = BeautifulSoup(html, 'html.parser')
-        return self.extract_urls(soup, url)
+        state = self.crawl_state
+        if state is None or not state.resumed or not (state.pages or state.frontier):
+            self.enqueue_urls(frontier, [start_url], 0)
+            if start_url not in frontier:
+                logger.warning(f"robots.txt disallows crawling {start_url}")
+            self.seed_from_sitemaps(frontier)
+            return frontier
+        
+        for page in state.pages:
+            self.visited_urls.add(canonicalize_url(page.url))
+            frontier.mark_seen(page.url)
+            self.fingerprints.exact_duplicate(page.content_hash, page.url)
+            self.leads.add(page.contacts, page.order)
+            self.people.add(page.contacts, page.order, self.domain)
+            self.page_data[page.url] = {
+                'contacts': len(page.contacts),
+                'new_leads': None,
+                'timestamp': time.time()
+            }
+        for url, priority, depth in state.frontier:
+            frontier.push(url, priority, depth)
+        
+        self.metrics.incr('pages_resumed', len(state.pages))
+        logger.info(f"Resuming crawl of {start_url}: {len(state.pages)} pages done, "
+                    f"{len(state.frontier)} queued")
+        return frontier
+
+    def load_site_policy(self, start_url):
+        # Start pacing the crawl and fetch (or reuse) the site's robots.txt
+        # rules and sitemap URLs; those requests are paced like pages, and a
+        # Crawl-delay they turn up applies from then on
+        self.site_policy = None
+        self.start_pacing()
+        if self.respect_robots or self.use_sitemaps:
+            with self.metrics.time('site_policy'):
+                self.site_policy = get_site_policy(
+                    start_url, self.session, self.headers, sitemaps=self.use_sitemaps,
+                    cancel_event=self.cancel_event, rate=self.rate
+                )
+            if self.robots_delay():
+                self.rate.raise_floor(self.robots_delay())
+
+    def start_pacing(self):
+        # Fresh per-host pacing for a crawl, starting from the effective delay;
+        # adaptive pacing may go below it, but never below a robots.txt
+        # Crawl-delay
+        delay = self.effective_delay()
+        min_delay = delay
+        if self.adaptive_delay:
+            min_delay = max(self.delay * MIN_DELAY_FACTOR, self.robots_delay())
+        if self.coordinator is not None:
+            self.rate = SharedHostRateController(self.coordinator, delay, min_delay=min_delay)
+        else:
+            self.rate = HostRateController(delay, min_delay=min_delay)
+        self._crawl_started = time.perf_counter()
 
-    def crawl_site(self, start_url):
+    def seed_from_sitemaps(self, frontier):
+        # Queue the high-value same-site pages a sitemap lists, so contact and
+        # team pages deep in the link graph are crawled without searching for them
+        before = len(frontier)
+        self.enqueue_urls(frontier, self.sitemap_seeds(), 1)
+        self.metrics.incr('sitemap_seeds', len(frontier) - before)
+
+    def sitemap_seeds(self):
+        # The high-value same-site URLs listed in the site's sitemaps
+        if not self.use_sitemaps or self.site_policy is None:
+            return []
+        
+        seeds = []
+        for url in self.site_policy.sitemap_urls:
+            if not url.startswith(('http://', 'https://')):
+                continue
+            url = urldefrag(url)[0]
+            if is_binary_url(url) or not self.is_valid_url(url) or not self.is_high_value_url(url):
+                continue
+            seeds.append(url)
+        return seeds
+
+    def finish_crawl(self):
+        # Record a crawl that ran to completion so the next one starts afresh,
+        # and the request rate it achieved against the site
+        if self._crawl_started is not None:
+            elapsed = time.perf_counter() - self._crawl_started
+            fetches = self.metrics.snapshot()[2].get('fetches', 0)
+            self.metrics.set('request_rate', fetches / elapsed if elapsed > 0 else 0.0)
+            self.metrics.set('host_delay', self.rate.delay_for(self.domain))
+        if self.crawl_state is not None and not self.is_cancelled():
+            self.store.finish(self.crawl_state)
+
+    def crawl_site(self, start_url, country=None):
         # Systematically crawl a website to find contact information
-        parsed = urlparse(start_url)
-        self.domain = parsed.netloc
+        for _ in self.iter_crawl_site(start_url, country):
+            pass
         
-        to_crawl = [start_url]
+        return self.leads
+
+    def iter_crawl_site(self, start_url, country=None):
+        # Crawl like crawl_site, yielding (url, contacts) as soon as each page
+        # is parsed so callers can stream leads before the crawl finishes
+        self.domain = urlparse(canonicalize_url(start_url)).netloc
         
-        html = self.fetch(start_url)
-        if html:
-            soup = BeautifulSoup(html, 'html.parser')
-            high_priority_urls = [url for url in self.extract_urls(soup, start_url) 
-                                 if self.is_high_value_url(url)]
-            
-            to_crawl = high_priority_urls + [url for url in to_crawl if url not in high_priority_urls]
+        frontier = self.start_frontier(start_url)
         
-        while to_crawl and len(self.visited_urls) < self.max_pages:
-            current_url = to_crawl.pop(0)
+        while frontier and len(self.visited_urls) < self.max_pages:
+            if self.is_cancelled():
+                logger.info(f"Crawl of {start_url} cancelled")
+                break
+            if self.byte_budget_exhausted():
+                logger.warning(f"Crawl of {start_url} stopped after {self.bytes_downloaded} bytes")
+                break
             
-            if current_url in self.visited_urls:
-                continue
+            current_url, depth = frontier.pop(self.url_priority)
             
-            new_urls = self.crawl(current_url)
-            if new_urls:
-                high_value = []
-                normal_value = []
+            crawled = self.crawl(current_url, country, depth)
+            if crawled is not None:
+                new_urls, contacts = crawled
+                self.enqueue_urls(frontier, new_urls, depth + 1)
+                yield current_url, contacts
+        
+        self.finish_crawl()
+
+    async def fetch_scheduled(self, scheduler, executor, url):
+        # Fetch url on the executor once the host scheduler lets it start
+        host = urlparse(url).netloc
+        waited = await scheduler.acquire(host)
+        self.metrics.add('politeness_sleep', waited)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, self.fetch, url, True)
+        finally:
+            scheduler.release(host)
+
+    async def crawl_site_async(self, start_url, concurrency=4, country=None, on_page=None):
+        # Crawl a website with up to `concurrency` fetches in flight per host,
+        # parsing finished pages while the remaining fetches are still waiting;
+        # on_page(url, contacts) is called as each page is parsed
+        self.domain = urlparse(canonicalize_url(start_url)).netloc
+        
+        frontier = self.start_frontier(start_url)
+        scheduler = HostScheduler(concurrency=concurrency, rate=self.rate)
+        
+        with ThreadPoolExecutor(max_workers=scheduler.concurrency) as executor:
+            in_flight = {}
+            next_order = len(self.page_data)
+            
+            while frontier or in_flight:
+                while (frontier and not self.is_cancelled() and not self.byte_budget_exhausted()
+                       and len(in_flight) < scheduler.concurrency
+                       and len(self.visited_urls) + len(in_flight) < self.max_pages):
+                    current_url, depth = frontier.pop(self.url_priority)
+                    task = asyncio.create_task(self.fetch_scheduled(scheduler, executor, current_url))
+                    in_flight[task] = (next_order, current_url, depth)
+                    next_order += 1
                 
-                for url in new_urls:
-                    if url not in self.visited_urls and url not in to_crawl:
-                        if self.is_high_value_url(url):
-                            high_value.append(url)
-                        else:
-                            normal_value.append(url)
+                if not in_flight:
+                    break
                 
-                to_crawl = high_value + to_crawl + normal_value
-            
-            time.sleep(self.delay)
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    order, current_url, depth = in_flight.pop(task)
+                    
+                    html, final_url = task.result()
+                    if not html:
+                        if self.crawl_state is not None and not self.is_cancelled():
+                            self.store.discard(self.crawl_state, current_url)
+                        continue
+                    if len(self.visited_urls) >= self.max_pages:
+                        continue
+                    
+                    # Pages finish out of order; indexing them under their
+                    # dispatch order keeps the rows in the sequential crawl's
+                    # order. The pages themselves are the same only when the
+                    # site fits in max_pages: which ones make a smaller budget
+                    # depends on the order fetches finish in
+                    new_urls, contacts = self.process_page(current_url, html, country, order, depth, final_url)
+                    self.enqueue_urls(frontier, new_urls, depth + 1)
+                    if on_page:
+                        on_page(current_url, contacts)
         
-        return self.all_contacts
+        self.finish_crawl()
+        return self.leads
 
-    def organize_results(self):
-        # Convert collected contacts into a structured DataFrame
-        if not self.all_contacts:
-            return pd.DataFrame()
-        
-        organized_data = []
-        
-        for contact in self.all_contacts:
-            if contact['email']:
-                organized_data.append({
-                    'Contact Type': 'Email',
-                    'Value': contact['email'],
-                    'Name': contact['name'] or '',
-                    'Job Title': contact['title'] or '',
-                    'Source URL': contact['source']
-                })
-            
-            if contact['phone']:
-                organized_data.append({
-                    'Contact Type': 'Phone',
-                    'Value': contact['phone'],
-                    'Name': contact['name'] or '',
-                    'Job Title': contact['title'] or '',
-                    'Source URL': contact['source']
-                })
-            
-            if contact['linkedin']:
-                organized_data.append({
-                    'Contact Type': 'LinkedIn',
-                    'Value': contact['linkedin'],
-                    'Name': contact['name'] or '',
-                    'Job Title': contact['title'] or '',
-                    'Source URL': contact['source']
-                })
+    async def crawl_site_pipelined(self, start_url, concurrency=4, country=None, on_page=None):
+        # Crawl like crawl_site_async, but with extraction moved off the event
+        # loop onto self.extract_workers worker processes, so parsing scales
+        # with cores instead of holding the GIL the fetches need. Fetched
+        # pages are hashed here (exact duplicates and unchanged stored pages
+        # never reach a worker), then queued for extraction; the frontier is
+        # updated as results come back. No new fetch starts while the queued
+        # HTML is over max_queued_bytes.
+        self.domain = urlparse(canonicalize_url(start_url)).netloc
         
-        result_df = pd.DataFrame(organized_data)
+        frontier = self.start_frontier(start_url)
+        scheduler = HostScheduler(concurrency=concurrency, rate=self.rate)
+        extraction = ExtractionPool(self.extract_workers, parser=self.parser,
+                                    max_queued_bytes=self.max_queued_bytes)
         
-        result_df = result_df.drop_duplicates(subset=['Contact Type', 'Value'])
+        def page_done(current_url, depth, new_urls, contacts):
+            self.enqueue_urls(frontier, new_urls, depth + 1)
+            if on_page:
+                on_page(current_url, contacts)
         
-        result_df = result_df.sort_values(['Contact Type', 'Name'])
+        with ThreadPoolExecutor(max_workers=scheduler.concurrency) as executor:
+            in_flight = {}
+            next_order = len(self.page_data)
+            
+            while frontier or in_flight or extraction:
+                while (frontier and not self.is_cancelled() and not self.byte_budget_exhausted()
+                       and len(in_flight) < scheduler.concurrency
+                       and len(self.visited_urls) + len(in_flight) < self.max_pages):
+                    if extraction.full():
+                        self.metrics.incr('extract_backpressure')
+                        break
+                    current_url, depth = frontier.pop(self.url_priority)
+                    task = asyncio.create_task(self.fetch_scheduled(scheduler, executor, current_url))
+                    in_flight[task] = (next_order, current_url, depth)
+                    next_order += 1
+                
+                if not in_flight and not extraction:
+                    break
+                
+                done, _ = await asyncio.wait([*in_flight, *extraction.running],
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    if future in extraction.running:
+                        (order, current_url, digest, depth), extracted = extraction.collect(future)
+                        if extracted is None:
+                            self.metrics.incr('extract_errors')
+                            if self.crawl_state is not None and not self.is_cancelled():
+                                self.store.discard(self.crawl_state, current_url)
+                            continue
+                        contacts, site_links, signature, snapshot = extracted
+                        self.metrics.merge(*snapshot)
+                        new_urls, contacts = self.finish_page(current_url, digest, contacts, site_links,
+                                                              signature, order, depth)
+                        page_done(current_url, depth, new_urls, contacts)
+                        continue
+                    
+                    order, current_url, depth = in_flight.pop(future)
+                    html, final_url = future.result()
+                    if not html:
+                        if self.crawl_state is not None and not self.is_cancelled():
+                            self.store.discard(self.crawl_state, current_url)
+                        continue
+                    if len(self.visited_urls) >= self.max_pages:
+                        continue
+                    
+                    digest, admitted = self.admit_page(current_url, html, order, depth)
+                    if admitted is not None:
+                        page_done(current_url, depth, *admitted)
+                    else:
+                        extraction.put((order, current_url, digest, depth), self.domain,
+                                       current_url, html, country, final_url)
         
-        return result_df
+        self.metrics.set('extract_queue_peak_bytes', extraction.peak_bytes)
+        self.finish_crawl()
+        return self.leads
 
-    def scrape(self, url):
-        # Main method that orchestrates the entire scraping process
-        logger.info(f"Starting to scrape {url}")
+    async def crawl_site_shared(self, start_url, concurrency=4, country=None, on_page=None):
+        # Crawl start_url together with every node sharing self.coordinator.
+        # Each node leases only as many URLs as it can start fetching, pushes
+        # the links it finds back to the shared queue (whose seen-URL filter
+        # keeps any URL from being queued twice), and paces requests to each
+        # host from one schedule for all nodes. max_pages is the budget of
+        # the whole crawl, set by the node that starts it. Each node collects
+        # the leads of the pages it crawled itself; the crawl store is not
+        # used. Returns once no URL is left to lease and no node holds one.
+        site = canonicalize_url(start_url)
+        self.domain = urlparse(site).netloc
+        coordinator = self.coordinator
+        
+        self.load_site_policy(site)
+        self.crawl_state = None
+        scheduler = HostScheduler(concurrency=concurrency, rate=self.rate)
+        
+        shared = set()
+        
+        def entries(urls, depth):
+            # Frontier entries for the URLs this node has not shared yet
+            queued = []
+            for url in urls:
+                key = canonicalize_url(url)
+                if key in shared:
+                    continue
+                shared.add(key)
+                if not self.is_allowed(url):
+                    self.metrics.incr('robots_blocked')
+                    continue
+                queued.append((url, self.url_priority(url, depth), depth))
+            return queued
+        
+        seeds = entries([start_url], 0)
+        sitemap_seeds = entries(self.sitemap_seeds(), 1)
+        loop = asyncio.get_running_loop()
+        renew_interval = LEASE_SECONDS / 3
         
+        # Coordinator calls block on shared storage, so they run on their own
+        # thread rather than on the event loop
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='coordinator') as coordination, \
+                ThreadPoolExecutor(max_workers=scheduler.concurrency) as executor:
+            def coordinate(method, *args):
+                return loop.run_in_executor(coordination, method, *args)
+            
+            if await coordinate(coordinator.open_site, site, self.max_pages, seeds + sitemap_seeds):
+                self.metrics.incr('sitemap_seeds', len(sitemap_seeds))
+                logger.info(f"Started shared crawl of {site} as {self.worker_id}")
+            else:
+                logger.info(f"Joined shared crawl of {site} as {self.worker_id}")
+            
+            in_flight = {}
+            next_order = 0
+            renewed = time.monotonic()
+            
+            while True:
+                stopping = self.is_cancelled() or self.byte_budget_exhausted()
+                if not stopping and len(in_flight) < scheduler.concurrency:
+                    leased = await coordinate(coordinator.lease, site, self.worker_id,
+                                              scheduler.concurrency - len(in_flight))
+                    for current_url, depth in leased:
+                        task = asyncio.create_task(self.fetch_scheduled(scheduler, executor, current_url))
+                        in_flight[task] = (next_order, current_url, depth)
+                        next_order += 1
+                
+                if not in_flight:
+                    if stopping or not any(await coordinate(coordinator.pending, site)):
+                        break
+                    # Other nodes still hold URLs and may queue more
+                    await asyncio.sleep(POLL_INTERVAL)
+                    continue
+                
+                # Wake up to renew the leases even while every fetch is held
+                # back (a Retry-After can be as long as a lease)
+                done, _ = await asyncio.wait(in_flight, timeout=renew_interval,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    order, current_url, depth = in_flight.pop(task)
+                    html, final_url = task.result()
+                    if not html and self.is_cancelled():
+                        await coordinate(coordinator.release, site, self.worker_id, [current_url])
+                        continue
+                    if html:
+                        new_urls, contacts = self.process_page(current_url, html, country, order, depth,
+                                                               final_url)
+                        await coordinate(coordinator.push, site, entries(new_urls, depth + 1))
+                        if on_page:
+                            on_page(current_url, contacts)
+                    if not await coordinate(coordinator.complete, site, self.worker_id, current_url, bool(html)):
+                        # Our lease ran out and another node has the URL now
+                        logger.warning(f"Lease on {current_url} was lost before it completed")
+                        self.metrics.incr('leases_lost')
+                
+                if time.monotonic() - renewed > renew_interval:
+                    await coordinate(coordinator.renew, site, self.worker_id)
+                    renewed = time.monotonic()
+        
+        self.finish_crawl()
+        return self.leads
+
+    def organize_results(self):
+        # Convert the deduplicated leads into a LeadTable (to_dataframe() on
+        # it gives a pandas DataFrame), with the people they resolve to
+        table = self.leads.to_table()
+        table.people = self.people.records()
+        return table
+
+    def default_country(self, url):
+        # Guess the phone region of a site from its top-level domain
+        hostname = urlparse(url).hostname or ''
+        return COUNTRY_BY_TLD.get(hostname.split('.')[-1])
+
+    def async_engine(self, concurrency):
+        # The asyncio crawl a scrape at this concurrency runs, or None when it
+        # runs the sequential crawl
+        if self.coordinator is not None:
+            return self.crawl_site_shared
+        if self.extract_workers:
+            return self.crawl_site_pipelined
+        if concurrency > 1:
+            return self.crawl_site_async
+        return None
+
+    def reset(self):
+        # Clear the state of any previous scrape
         self.visited_urls = set()
-        self.all_contacts = []
+        self.leads = LeadIndex()
+        self.people = PersonIndex()
         self.page_data = {}
+        self.fingerprints = PageFingerprints()
+        self.template_strikes = {}
+        self.crawl_state = None
+        self.bytes_downloaded = 0
+        self.metrics = ScrapeMetrics()
+
+    def scrape(self, url, concurrency=1):
+        # Main method that orchestrates the entire scraping process; a
+        # concurrency above 1 switches to the asyncio crawl engine, and
+        # extract_workers to the pipelined one. Those find the same leads as
+        # the sequential crawl when the site fits in max_pages; with a
+        # smaller budget the pages crawled depend on fetch timing. With a
+        # coordinator the crawl is shared with the other nodes using it
+        logger.info(f"Starting to scrape {url}")
         
-        default_country = None
-        domain_tld = urlparse(url).netloc.split('.')[-1]
-        country_map = {
-            'us': 'US', 'uk': 'GB', 'ca': 'CA', 'au': 'AU', 
-            'de': 'DE', 'fr': 'FR', 'in': 'IN'
-        }
-        if domain_tld in country_map:
-            default_country = country_map[domain_tld]
+        self.reset()
+        default_country = self.default_country(url)
+        start_time = time.perf_counter()
         
-        self.crawl_site(url)
+        try:
+            engine = self.async_engine(concurrency)
+            if engine is not None:
+                asyncio.run(engine(url, concurrency=concurrency, country=default_country))
+            else:
+                self.crawl_site(url, country=default_country)
+            
+            with self.metrics.time('organize_results'):
+                results = self.organize_results()
+        except Exception:
+            REGISTRY.record_scrape(self.metrics, time.perf_counter() - start_time, status='error')
+            raise
         
-        result_df = self.organize_results()
+        REGISTRY.record_scrape(self.metrics, time.perf_counter() - start_time,
+                               status='cancelled' if self.is_cancelled() else 'ok')
         
-        email_count = len(result_df[result_df['Contact Type'] == 'Email'])
-        phone_count = len(result_df[result_df['Contact Type'] == 'Phone'])
-        linkedin_count = len(result_df[result_df['Contact Type'] == 'LinkedIn'])
+        counts = self.leads.counts()
         
-        logger.info(f"Scraping completed: Found {email_count} unique emails, "
-                   f"{phone_count} unique phone numbers, and {linkedin_count} LinkedIn profiles")
+        logger.info(f"Scraping completed: Found {counts['Email']} unique emails, "
+                   f"{counts['Phone']} unique phone numbers, and {counts['LinkedIn']} LinkedIn profiles "
+                   f"belonging to {len(self.people)} people")
         
-        return result_df
\ No newline at end of file
+        return results
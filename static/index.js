@@ -10,30 +10,100 @@ document.getElementById('scrape-form').addEventListener('submit', function (e) {
         return false;
     }
 
-    document.getElementById('submit-btn').disabled = true;
-    document.getElementById('spinner').style.display = 'block';
+    e.preventDefault();
 
-    // Simulate status updates
+    const submitBtn = document.getElementById('submit-btn');
+    const exportFormat = document.getElementById('format').value;
     const statusUpdates = document.getElementById('status-updates');
-    const updates = [
-        "Connecting to target website...",
-        "Analyzing site structure...",
-        "Prioritizing high-value pages...",
-        "Searching for contact information...",
-        "Processing found data...",
-        "Organizing results..."
-    ];
+    const progressBar = document.querySelector('#spinner .progress-bar');
+
+    submitBtn.disabled = true;
+    document.getElementById('spinner').style.display = 'block';
 
-    let i = 0;
-    const updateInterval = setInterval(function () {
-        if (i < updates.length) {
-            statusUpdates.innerHTML += `<p class="mb-1"><small>${updates[i]}</small></p>`;
-            statusUpdates.scrollTop = statusUpdates.scrollHeight;
-            i++;
-        } else {
-            clearInterval(updateInterval);
+    // Messages may carry server or page text, so they are set as text, never as HTML
+    function showStatus(message) {
+        const line = document.createElement('p');
+        const text = document.createElement('small');
+        line.className = 'mb-1';
+        text.textContent = message;
+        line.appendChild(text);
+        statusUpdates.appendChild(line);
+        statusUpdates.scrollTop = statusUpdates.scrollHeight;
+    }
+
+    function finish(message) {
+        if (message) {
+            showStatus(message);
         }
-    }, 3000);
+        submitBtn.disabled = false;
+        progressBar.classList.remove('progress-bar-animated');
+    }
+
+    // Run the scrape as a background job and poll it for progress
+    fetch('/api/jobs', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+            url: urlInput.value,
+            max_pages: document.getElementById('max_pages').value,
+            delay: document.getElementById('delay').value,
+            format: exportFormat
+        })
+    })
+        .then(response => response.json())
+        .then(job => {
+            if (!job.job_id) {
+                finish(job.message || job.error || 'Could not start the scrape.');
+                return;
+            }
+
+            showStatus('Scrape queued...');
+            progressBar.style.width = '0%';
+
+            let polling = true;
+            function stopPolling(message) {
+                if (polling) {
+                    polling = false;
+                    clearInterval(poll);
+                    finish(message);
+                }
+            }
+
+            const poll = setInterval(function () {
+                fetch(job.links.status)
+                    .then(response => {
+                        if (!response.ok) {
+                            throw new Error(`HTTP ${response.status}`);
+                        }
+                        return response.json();
+                    })
+                    .then(state => {
+                        if (!polling) {
+                            return;
+                        }
+                        const progress = state.progress;
+                        progressBar.style.width = `${Math.round(100 * progress.pages_visited / progress.max_pages)}%`;
+
+                        if (state.status === 'running') {
+                            statusUpdates.lastElementChild.firstElementChild.textContent =
+                                `Crawled ${progress.pages_visited} of up to ${progress.max_pages} pages...`;
+                        } else if (state.status === 'done') {
+                            progressBar.style.width = '100%';
+                            if (state.results_count > 0) {
+                                stopPolling(`Found ${state.results_count} leads. Downloading...`);
+                                window.location = `${job.links.download}?format=${encodeURIComponent(exportFormat)}`;
+                            } else {
+                                stopPolling(`No leads found after scanning ${progress.pages_visited} pages. ` +
+                                    'Try a different URL or adjust the crawl settings.');
+                            }
+                        } else if (state.status === 'failed' || state.status === 'cancelled') {
+                            stopPolling(`Scrape ${state.status}: ${state.error || ''}`);
+                        }
+                    })
+                    .catch(() => stopPolling('Lost contact with the server while the scrape was running.'));
+            }, 1500);
+        })
+        .catch(() => finish('Something went wrong while starting the scrape.'));
 });
 
 // URL validation on input
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+
+from leads import contact_rows
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+
+def _iter_pages(scraper, url, concurrency, country):
+    # Yield (url, contacts) per parsed page. The sequential crawl is already a
+    # generator; the asyncio crawls run in a helper thread and hand pages
+    # over through a small queue.
+    crawl = scraper.async_engine(concurrency)
+    if crawl is None:
+        yield from scraper.iter_crawl_site(url, country)
+        return
+
+    pages = queue.Queue(maxsize=max(concurrency, 1) * 2)
+    errors = []
+
+    def run():
+        try:
+            asyncio.run(crawl(
+                url, concurrency=concurrency, country=country,
+                on_page=lambda page_url, contacts: pages.put((page_url, contacts))
+            ))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            pages.put(_END)
+
+    worker = threading.Thread(target=run, name='stream-crawl', daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = pages.get()
+            if item is _END:
+                break
+            yield item
+    finally:
+        # Stop the crawl if the consumer went away, and drain the queue so
+        # the crawl thread is never left blocked on a full queue
+        if scraper.cancel_event is not None:
+            scraper.cancel_event.set()
+        while worker.is_alive():
+            try:
+                pages.get(timeout=0.1)
+            except queue.Empty:
+                pass
+    if errors:
+        raise errors[0]
+
+
+def iter_scrape_events(scraper, url, concurrency=1):
+    # Run a scrape and yield events as pages are parsed: one 'contact' event
+    # per new (Contact Type, Value) pair, a 'progress' event per page and a
+    # final 'done' event with totals. Nothing is buffered beyond the set of
+    # keys already sent.
+    if scraper.cancel_event is None:
+        scraper.cancel_event = threading.Event()
+
+    scraper.reset()
+    start_time = time.time()
+    seen = set()
+    counts = {'Email': 0, 'Phone': 0, 'LinkedIn': 0}
+
+    try:
+        for page_url, contacts in _iter_pages(scraper, url, concurrency, scraper.default_country(url)):
+            for contact in contacts:
+                for row in contact_rows(contact):
+                    key = (row['Contact Type'], row['Value'])
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    counts[row['Contact Type']] += 1
+                    yield 'contact', row
+
+            progress = scraper.progress()
+            progress['url'] = page_url
+            progress['leads'] = len(seen)
+            yield 'progress', progress
+    except Exception as e:
+        logger.error(f"Streaming scrape error: {str(e)}")
+        REGISTRY.record_scrape(scraper.metrics, time.time() - start_time, status='error')
+        yield 'error', {'message': str(e)}
+        return
+    finally:
+        scraper.cancel_event.set()
+
+    REGISTRY.record_scrape(scraper.metrics, time.time() - start_time)
+    yield 'done', {
+        'emails': counts['Email'],
+        'phones': counts['Phone'],
+        'linkedin': counts['LinkedIn'],
+        'total': len(seen),
+        'pages_crawled': len(scraper.visited_urls),
+        'duration_seconds': round(time.time() - start_time, 2),
+        **scraper.metrics.to_dict()
+    }
+
+
+def format_ndjson(events):
+    for event, data in events:
+        yield json.dumps({'event': event, 'data': data}) + '\n'
+
+
+def format_sse(events):
+    for event, data in events:
+        yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,83 @@
+"""Leases, the page budget and the seen-URL filter of SqliteCoordinator."""
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coordination import CrawlCoordinator, SqliteCoordinator  # noqa: E402
+
+SITE = 'https://example.com/'
+
+
+@pytest.fixture
+def coordinator(tmp_path):
+    coordinator = SqliteCoordinator(str(tmp_path / 'coordinator.db'))
+    yield coordinator
+    coordinator.close()
+
+
+def test_interface_is_abstract():
+    with pytest.raises(TypeError):
+        CrawlCoordinator()
+
+
+def test_urls_are_queued_once_in_any_spelling(coordinator):
+    assert coordinator.open_site(SITE, 10, [(SITE, 0, 0)])
+    queued = coordinator.push(SITE, [
+        ('https://example.com', 0, 1),
+        ('https://EXAMPLE.com:443/#top', 0, 1),
+        ('https://example.com/team', 0, 1),
+        ('https://example.com/team?utm_source=x', 0, 1),
+    ])
+    assert queued == 1
+    assert coordinator.pending(SITE) == (2, 0)
+
+
+def test_expired_lease_is_taken_over(coordinator):
+    coordinator.open_site(SITE, 10, [(SITE, 0, 0)])
+    assert coordinator.lease(SITE, 'a', 5, lease_seconds=0.05) == [(SITE, 0)]
+    assert coordinator.lease(SITE, 'b', 5) == []
+
+    time.sleep(0.1)
+    assert coordinator.pending(SITE) == (1, 0)
+    assert coordinator.lease(SITE, 'b', 5) == [(SITE, 0)]
+
+    # The first worker's late completion must not take the URL from the second
+    assert not coordinator.complete(SITE, 'a', SITE)
+    assert coordinator.pending(SITE) == (0, 1)
+    assert coordinator.complete(SITE, 'b', SITE)
+    assert coordinator.pending(SITE) == (0, 0)
+
+
+def test_renewed_lease_is_kept(coordinator):
+    coordinator.open_site(SITE, 10, [(SITE, 0, 0)])
+    coordinator.lease(SITE, 'a', 5, lease_seconds=0.05)
+    coordinator.renew(SITE, 'a', lease_seconds=60)
+    time.sleep(0.1)
+    assert coordinator.lease(SITE, 'b', 5) == []
+
+
+def test_page_budget_covers_leased_urls(coordinator):
+    coordinator.open_site(SITE, 2, [(f'{SITE}p{i}', i, 1) for i in range(5)])
+    leased = coordinator.lease(SITE, 'a', 5)
+    assert len(leased) == 2
+    assert coordinator.lease(SITE, 'b', 5) == []
+
+    coordinator.complete(SITE, 'a', leased[0][0], fetched=False)
+    assert len(coordinator.lease(SITE, 'b', 5)) == 1
+
+
+def test_domain_leases(coordinator):
+    coordinator.add_domains(['https://a.example/', 'https://b.example/'])
+    assert coordinator.lease_domain('a', lease_seconds=0.05) == 'https://a.example/'
+    assert coordinator.lease_domain('b', lease_seconds=0.05) == 'https://b.example/'
+    coordinator.renew_domains('a', lease_seconds=60)
+
+    time.sleep(0.1)
+    assert coordinator.lease_domain('c') == 'https://b.example/'
+    coordinator.finish_domain('https://a.example/')
+    coordinator.finish_domain('https://b.example/')
+    assert coordinator.lease_domain('c') is None
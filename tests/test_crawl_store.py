@@ -0,0 +1,110 @@
+"""CrawlStore checkpoints and resuming an interrupted crawl from them."""
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawl_store import CrawlStore, content_hash  # noqa: E402
+from leads import Contact  # noqa: E402
+from scraper import GeneralizedLeadGenScraper  # noqa: E402
+
+START = 'https://example.com/'
+
+# A small site: the home page links to four pages with one contact each
+PAGES = {
+    '/': '<html><body>' + ''.join(f'<a href="/p{i}">Page {i}</a>' for i in range(1, 5)) + '</body></html>',
+    **{f'/p{i}': f'<html><body><p>Contact: person{i}@example.com</p></body></html>' for i in range(1, 5)}
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CrawlStore(str(tmp_path / 'crawls.db'))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def site():
+    requested = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requested.append(self.path)
+            body = PAGES.get(self.path)
+            if body is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{httpd.server_address[1]}/", requested
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_unfinished_pass_is_resumed(store):
+    state = store.begin(START)
+    assert (state.run, state.resumed) == (1, False)
+    store.push(state, [(f'{START}a', 0, 1), (f'{START}b', 1, 1)])
+    contacts = [Contact('Ann Lee', 'ann@example.com', None, None, None, START)]
+    store.record_page(state, START, content_hash('home'), contacts, [f'{START}a'], 0, 0)
+    store.record_page(state, f'{START}a', content_hash('a'), [], [], 1, 1)
+
+    resumed = store.begin(START)
+    assert (resumed.run, resumed.resumed) == (1, True)
+    assert [page.url for page in resumed.pages] == [START, f'{START}a']
+    assert resumed.pages[0].contacts[0].email == 'ann@example.com'
+    assert resumed.frontier == [(f'{START}b', 1, 1)]
+    assert resumed.seq == state.seq
+
+
+def test_finished_pass_starts_a_new_run_and_keeps_pages(store):
+    state = store.begin(START)
+    store.push(state, [(f'{START}a', 0, 1)])
+    store.record_page(state, START, content_hash('home'), [], [f'{START}a'], 0, 0)
+    store.finish(state)
+
+    fresh = store.begin(START)
+    assert (fresh.run, fresh.resumed, fresh.pages, fresh.frontier) == (2, False, [], [])
+    assert store.lookup(START, START).content_hash == content_hash('home')
+
+
+def test_interrupted_crawl_resumes_without_refetching(site, store):
+    url, requested = site
+    cancel = threading.Event()
+    first = GeneralizedLeadGenScraper(max_pages=10, delay=0, store=store, cancel_event=cancel,
+                                      respect_robots=False, use_sitemaps=False)
+    for done, _ in enumerate(first.iter_crawl_site(url), 1):
+        if done == 2:
+            cancel.set()
+    crawled = set(requested)
+    assert len(crawled) == 2
+
+    requested.clear()
+    second = GeneralizedLeadGenScraper(max_pages=10, delay=0, store=store,
+                                       respect_robots=False, use_sitemaps=False)
+    results = second.scrape(url)
+
+    assert not crawled & set(requested)
+    assert crawled | set(requested) == set(PAGES)
+    assert second.metrics.snapshot()[2].get('pages_resumed') == 2
+    assert {f'person{i}@example.com' for i in range(1, 5)} <= set(results['Value'])
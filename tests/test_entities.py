@@ -0,0 +1,82 @@
+"""Merging contact fragments into people with PersonIndex."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entities import PersonIndex, name_from_email, name_from_linkedin  # noqa: E402
+from leads import Contact  # noqa: E402
+
+SITE = 'example.com'
+
+
+def test_shared_email_merges_into_one_person():
+    index = PersonIndex()
+    assert index.add([Contact('Jane Doe', 'Jane.Doe@example.com', None, None, 'CTO', 'https://example.com/team')],
+                     0, SITE) == 1
+    assert index.add([Contact(None, 'jane.doe@example.com', '+1 555 0100', None, None, 'https://example.com/contact')],
+                     1, SITE) == 0
+
+    [person] = index.records()
+    assert person['Name'] == 'Jane Doe'
+    assert person['Job Title'] == 'CTO'
+    assert person['Emails'] == ['jane.doe@example.com']
+    assert person['Phones'] == ['+1 555 0100']
+    assert person['Sources'] == ['https://example.com/contact', 'https://example.com/team']
+    assert person['Provenance']['+1 555 0100'] == 'https://example.com/contact'
+
+
+def test_shared_phone_merges_into_one_person():
+    index = PersonIndex()
+    index.add([Contact('Jane Doe', None, '+1 555 0100', None, None, 'https://example.com/a')], 0, SITE)
+    index.add([Contact(None, 'jd@example.com', '+1 555 0100', None, None, 'https://example.com/b')], 1, SITE)
+
+    assert len(index) == 1
+    [person] = index.records()
+    assert (person['Name'], person['Emails']) == ('Jane Doe', ['jd@example.com'])
+
+
+def test_fragment_linking_two_people_joins_them():
+    index = PersonIndex()
+    index.add([Contact(None, 'jane@example.com', None, None, None, 'https://example.com/a'),
+               Contact(None, None, '+1 555 0100', None, None, 'https://example.com/a')], 0, SITE)
+    assert len(index) == 2
+    index.add([Contact(None, 'jane@example.com', '+1 555 0100', None, None, 'https://example.com/b')], 1, SITE)
+    assert len(index) == 1
+
+
+def test_shared_switchboard_keeps_named_people_apart():
+    index = PersonIndex()
+    index.add([Contact('Jane Doe', 'jane@example.com', '+1 555 0000', None, None, 'https://example.com/team'),
+               Contact('John Roe', 'john@example.com', '+1 555 0000', None, None, 'https://example.com/team')],
+              0, SITE)
+
+    records = index.records()
+    assert [person['Name'] for person in records] == ['Jane Doe', 'John Roe']
+    assert all(person['Phones'] == ['+1 555 0000'] for person in records)
+
+
+def test_same_name_on_one_site_merges():
+    index = PersonIndex()
+    index.add([Contact('Dr. Jane Doe', 'jane@example.com', None, None, None, 'https://example.com/a')], 0, SITE)
+    index.add([Contact('Jane Doe', None, None, 'https://www.linkedin.com/in/jane-doe', None,
+                       'https://example.com/b')], 1, SITE)
+    assert len(index) == 1
+
+    index.add([Contact('Jane Doe', 'jane@other.example', None, None, None, 'https://other.example/')],
+              2, 'other.example')
+    assert len(index) == 2
+
+
+def test_page_name_beats_guessed_name():
+    index = PersonIndex()
+    index.add([Contact('Jane Doe', 'jane.doe@example.com', None, None, None, 'https://example.com/a')], 0, SITE)
+    index.add([Contact('Jane A. Doe', 'jane.doe@example.com', None, None, None, 'https://example.com/b')], 1, SITE)
+    assert index.records()[0]['Name'] == 'Jane A. Doe'
+
+
+def test_names_from_identifiers():
+    assert name_from_email('john.smith@example.com') == 'John Smith'
+    assert name_from_email('info@example.com') is None
+    assert name_from_linkedin('https://www.linkedin.com/in/john-smith') == 'John Smith'
+    assert name_from_linkedin('https://www.linkedin.com/in/company-page') is None
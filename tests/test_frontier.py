@@ -0,0 +1,72 @@
+"""URL canonicalization and the crawl frontier."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frontier import CrawlFrontier, canonicalize_url, is_binary_url, url_template  # noqa: E402
+
+
+@pytest.mark.parametrize('url, canonical', [
+    ('https://example.com/team#contact', 'https://example.com/team'),
+    ('https://example.com:443/team', 'https://example.com/team'),
+    ('http://example.com:80/team', 'http://example.com/team'),
+    ('https://example.com:8443/team', 'https://example.com:8443/team'),
+    ('HTTPS://Example.COM./team', 'https://example.com/team'),
+    ('https://example.com', 'https://example.com/'),
+    ('https://example.com/team/', 'https://example.com/team'),
+    ('https://example.com/team//', 'https://example.com/team'),
+    ('https://example.com/?b=2&a=1', 'https://example.com/?a=1&b=2'),
+    ('https://example.com/?a=1&utm_source=x&gclid=y', 'https://example.com/?a=1'),
+    ('https://example.com/?q=', 'https://example.com/?q='),
+    ('https://[::1]:443/team', 'https://[::1]/team'),
+])
+def test_canonicalize_url(url, canonical):
+    assert canonicalize_url(url) == canonical
+
+
+def test_path_case_is_kept():
+    assert canonicalize_url('https://example.com/Team') != canonicalize_url('https://example.com/team')
+
+
+def test_url_template():
+    assert url_template('https://example.com/blog/page/2') == url_template('https://example.com/blog/page/3')
+    assert url_template('https://example.com/about') != url_template('https://example.com/team')
+    assert url_template('https://example.com/list?page=2') == url_template('https://example.com/list?page=9')
+
+
+def test_is_binary_url():
+    assert is_binary_url('https://example.com/brochure.PDF')
+    assert not is_binary_url('https://example.com/team')
+    assert not is_binary_url('https://example.com/v1.2/team')
+
+
+def test_frontier_queues_each_page_once_as_linked():
+    frontier = CrawlFrontier()
+    assert frontier.push('https://example.com/team/', priority=1)
+    assert not frontier.push('https://EXAMPLE.com:443/team#people')
+    frontier.mark_seen('https://example.com/about')
+    assert not frontier.push('https://example.com/about/')
+    assert frontier.push('https://example.com/contact', priority=0)
+
+    assert len(frontier) == 2
+    assert frontier.pop() == ('https://example.com/contact', 0)
+    assert frontier.pop() == ('https://example.com/team/', 0)
+    assert 'https://example.com/team' in frontier
+
+
+def test_frontier_ties_keep_insertion_order_and_rescore_demotes():
+    frontier = CrawlFrontier()
+    for name in ('a', 'b', 'c'):
+        frontier.push(f'https://example.com/{name}')
+
+    # 'a' has become less attractive since it was queued
+    def rescore(url, depth):
+        return 5 if url.endswith('/a') else 0
+
+    assert frontier.pop(rescore) == ('https://example.com/b', 0)
+    assert frontier.pop(rescore) == ('https://example.com/c', 0)
+    assert frontier.pop(rescore) == ('https://example.com/a', 0)
+    assert not frontier
@@ -0,0 +1,108 @@
+"""ResponseCache revalidation and body decoding against a local HTTP server."""
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_cache import ResponseCache  # noqa: E402
+from scraper import GeneralizedLeadGenScraper  # noqa: E402
+
+
+class _Page:
+    # The page the server currently serves, and the requests it received
+    def __init__(self, body, etag):
+        self.body = body
+        self.etag = etag
+        self.charset = 'utf-8'
+        self.requests = []
+
+
+@pytest.fixture
+def server():
+    page = _Page('<html><body><p>Contact: first@example.com</p></body></html>', '"v1"')
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            validator = self.headers.get('If-None-Match')
+            if validator == page.etag:
+                page.requests.append((validator, 304))
+                self.send_response(304)
+                self.send_header('ETag', page.etag)
+                self.end_headers()
+                return
+            page.requests.append((validator, 200))
+            body = page.body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', f'text/html; charset={page.charset}')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', page.etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{httpd.server_address[1]}/page", page
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'responses.db'))
+    yield cache
+    cache.close()
+
+
+def fetch(cache, url):
+    scraper = GeneralizedLeadGenScraper(delay=0, cache=cache, respect_robots=False, use_sitemaps=False)
+    html, _ = scraper.fetch(url)
+    return html, scraper.metrics.snapshot()[2]
+
+
+def test_not_modified_reuses_cached_body(server, cache):
+    url, page = server
+    first, _ = fetch(cache, url)
+    second, counters = fetch(cache, url)
+
+    assert second == first == page.body
+    assert page.requests == [(None, 200), ('"v1"', 304)]
+    assert counters.get('not_modified') == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_changed_body_is_refetched_and_stored(server, cache):
+    url, page = server
+    fetch(cache, url)
+    page.body = '<html><body><p>Contact: second@example.com</p></body></html>'
+    page.etag = '"v2"'
+
+    changed, counters = fetch(cache, url)
+    assert changed == page.body
+    assert page.requests == [(None, 200), ('"v1"', 200)]
+    assert 'not_modified' not in counters
+    assert cache.lookup(url).etag == '"v2"'
+
+    again, _ = fetch(cache, url)
+    assert again == page.body
+    assert page.requests[-1] == ('"v2"', 304)
+
+
+def test_unknown_charset_falls_back_to_utf8(server, cache):
+    url, page = server
+    page.body = '<html><body><p>Contact: j\u00fcrgen@example.com</p></body></html>'
+    page.charset = 'x-no-such-charset'
+
+    html, counters = fetch(cache, url)
+    assert html == page.body
+    assert 'fetch_errors' not in counters
@@ -0,0 +1,137 @@
+"""ScrapeResultCache: cached results and coalescing of identical scrapes."""
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_cache import ScrapeResult, ScrapeResultCache  # noqa: E402
+
+KEY = ScrapeResultCache.key('https://example.com/', 15, 1.0)
+
+
+class _Scrape:
+    # A scrape that blocks until released, counting how often it runs
+    def __init__(self, complete=True, error=None):
+        self.complete = complete
+        self.error = error
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return ScrapeResult(['lead'], 1, 0.1, complete=self.complete)
+
+
+def run_in_thread(cache, run, **kwargs):
+    outcome = {}
+
+    def target():
+        try:
+            outcome['value'] = cache.get_or_run(KEY, run, **kwargs)
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread, outcome
+
+
+def test_identical_scrapes_share_one_crawl():
+    cache = ScrapeResultCache()
+    scrape = _Scrape()
+    leader, first = run_in_thread(cache, scrape)
+    assert scrape.started.wait(5)
+    follower, second = run_in_thread(cache, scrape)
+    time.sleep(0.2)
+    scrape.release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert scrape.calls == 1
+    assert first['value'][1] == 'miss'
+    assert second['value'][1] == 'shared'
+    assert second['value'][0] is first['value'][0]
+    assert cache.get_or_run(KEY, scrape) == (first['value'][0], 'hit')
+    assert scrape.calls == 1
+
+
+def test_keys_ignore_url_spelling():
+    assert ScrapeResultCache.key('https://EXAMPLE.com:443/#top', '15', '1') == KEY
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    cache = ScrapeResultCache()
+    scrape = _Scrape(error=RuntimeError('site down'))
+    leader, first = run_in_thread(cache, scrape)
+    assert scrape.started.wait(5)
+    follower, second = run_in_thread(cache, scrape)
+    time.sleep(0.2)
+    scrape.release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert scrape.calls == 1
+    assert str(first['error']) == str(second['error']) == 'site down'
+    assert len(cache) == 0
+
+
+def test_incomplete_result_is_neither_shared_nor_cached():
+    cache = ScrapeResultCache()
+    cancelled = _Scrape(complete=False)
+    leader, first = run_in_thread(cache, cancelled)
+    assert cancelled.started.wait(5)
+    follower, second = run_in_thread(cache, cancelled)
+    time.sleep(0.2)
+    cancelled.release.set()
+    leader.join(5)
+    follower.join(5)
+
+    # The waiter started over and ran the scrape itself
+    assert cancelled.calls == 2
+    assert first['value'][1] == second['value'][1] == 'miss'
+    assert len(cache) == 0
+
+
+def test_fresh_skips_the_cache_and_ttl_expires_entries():
+    cache = ScrapeResultCache(ttl=0.1)
+    scrape = _Scrape()
+    scrape.release.set()
+    cache.get_or_run(KEY, scrape)
+    assert cache.get_or_run(KEY, scrape)[1] == 'hit'
+    assert cache.get_or_run(KEY, scrape, fresh=True)[1] == 'miss'
+
+    time.sleep(0.15)
+    assert cache.get_or_run(KEY, scrape)[1] == 'miss'
+    assert scrape.calls == 3
+
+
+def test_cancelled_waiter_stops_waiting():
+    cache = ScrapeResultCache()
+    scrape = _Scrape()
+    leader, _ = run_in_thread(cache, scrape)
+    assert scrape.started.wait(5)
+
+    cancel = threading.Event()
+    cancel.set()
+    assert cache.get_or_run(KEY, scrape, cancel_event=cancel) == (None, 'cancelled')
+    scrape.release.set()
+    leader.join(5)
+    assert scrape.calls == 1
+
+
+@pytest.mark.parametrize('max_entries', [0, 1])
+def test_entries_are_bounded(max_entries):
+    cache = ScrapeResultCache(max_entries=max_entries)
+    for pages in (1, 2, 3):
+        key = ScrapeResultCache.key('https://example.com/', pages, 1.0)
+        cache.get_or_run(key, lambda: ScrapeResult([], 0, 0.0))
+    assert len(cache) == max_entries
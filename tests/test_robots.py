@@ -0,0 +1,34 @@
+"""Site policy cache and sitemap scoping."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import robots  # noqa: E402
+
+
+def test_sitemap_indexes_stay_on_the_site():
+    base = 'https://www.example.com/'
+    assert robots._same_site('https://example.com/sitemap-2.xml', base)
+    assert robots._same_site('https://blog.example.com/sitemap.xml', base)
+    assert not robots._same_site('https://example.net/sitemap.xml', base)
+    assert not robots._same_site('https://notexample.com/sitemap.xml', base)
+
+
+def test_policy_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(robots, '_policies', robots.OrderedDict())
+    monkeypatch.setattr(robots, 'MAX_CACHED_POLICIES', 3)
+    monkeypatch.setattr(robots, 'load_site_policy',
+                        lambda base_url, *args, **kwargs: robots.SitePolicy(base_url))
+
+    first = robots.get_site_policy('https://a.example/', session=None)
+    for host in ('b', 'c', 'd'):
+        robots.get_site_policy(f'https://{host}.example/', session=None)
+    assert len(robots._policies) == 3
+    assert robots.get_site_policy('https://a.example/', session=None) is not first
+
+    # Expired policies are dropped when another one is stored
+    for policy in robots._policies.values():
+        policy.fetched_at -= robots.POLICY_TTL
+    robots.get_site_policy('https://e.example/', session=None)
+    assert list(robots._policies) == [('https://e.example/', True)]
@@ -0,0 +1,28 @@
+"""Per-host fetch slots of the asyncio crawl."""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import HostRateController, HostScheduler  # noqa: E402
+
+
+def test_cancelled_wait_gives_the_slot_back():
+    async def crawl():
+        scheduler = HostScheduler(concurrency=2, rate=HostRateController(5))
+        await scheduler.acquire('example.com')
+        scheduler.release('example.com')
+
+        # Every later acquire waits out the 5s delay; cancel each one there
+        for _ in range(3):
+            task = asyncio.create_task(scheduler.acquire('example.com'))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        return scheduler._semaphores['example.com']._value
+
+    assert asyncio.run(crawl()) == 2